@@ -0,0 +1,47 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from waveview.api.v1.data_availability import QueryParamsSerializer
+from waveview.inventory.availability import find_gaps, merge_segments
+
+
+class AvailabilityTest(unittest.TestCase):
+    def test_merge_segments(self) -> None:
+        t0 = datetime(2024, 6, 11, tzinfo=timezone.utc)
+
+        def at(seconds: float) -> datetime:
+            return t0 + timedelta(seconds=seconds)
+
+        segments = [
+            (at(4), at(5.99), 100),
+            (at(0), at(1.99), 100),
+            (at(2), at(3.99), 100),
+            (at(10), at(12), 100),
+            (at(12), at(14), 50),
+        ]
+        merged = merge_segments(segments)
+        self.assertEqual(
+            merged,
+            [(at(0), at(5.99), 100), (at(10), at(12), 100), (at(12), at(14), 50)],
+        )
+        self.assertEqual(
+            merge_segments(segments, by_sample_rate=False),
+            [(at(0), at(5.99), 100), (at(10), at(14), 100)],
+        )
+
+        gaps = find_gaps(merge_segments(segments, by_sample_rate=False), at(-1), at(20))
+        self.assertEqual(gaps, [(at(-1), at(0)), (at(5.99), at(10)), (at(14), at(20))])
+        self.assertEqual(find_gaps([], at(0), at(1)), [(at(0), at(1))])
+
+    def test_query_params(self) -> None:
+        channel_id = "9f1c2d3e-4b5a-4c6d-8e7f-0a1b2c3d4e5f"
+        params = {"start": "2024-06-11T00:00:00Z", "end": "2024-06-12T00:00:00Z"}
+        serializer = QueryParamsSerializer(data={**params, "channel_ids": channel_id})
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data["channel_ids"], [channel_id])
+
+        serializer = QueryParamsSerializer(
+            data={**params, "channel_ids": f"{channel_id},foo"}
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("channel_ids", serializer.errors)
@@ -0,0 +1,37 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from waveview.inventory.chunkcache import ChunkCache
+
+
+class ChunkCacheTest(unittest.TestCase):
+    def test_lru_eviction(self) -> None:
+        cache = ChunkCache(max_bytes=3 * 800)
+        t0 = datetime(2024, 6, 11, tzinfo=timezone.utc)
+        for i in range(3):
+            cache.put("t", t0 + timedelta(seconds=i), i, np.zeros(100))
+
+        # Touch the oldest entry so the second one is evicted next.
+        self.assertIsNotNone(cache.get("t", t0, 0))
+        cache.put("t", t0 + timedelta(seconds=3), 3, np.zeros(100))
+
+        self.assertIsNone(cache.get("t", t0 + timedelta(seconds=1), 1))
+        self.assertIsNotNone(cache.get("t", t0, 0))
+        self.assertEqual(cache.nbytes, 3 * 800)
+        self.assertEqual(cache.stats()["entries"], 3)
+
+    def test_version_and_invalidate(self) -> None:
+        cache = ChunkCache(max_bytes=1024)
+        st = datetime(2024, 6, 11, tzinfo=timezone.utc)
+        samples = np.arange(10)
+        cache.put("t", st, "v1", samples)
+        self.assertFalse(samples.flags.writeable)
+
+        self.assertIs(cache.get("t", st, "v1"), samples)
+        self.assertIsNone(cache.get("t", st, "v2"))
+        cache.invalidate("t", st)
+        self.assertIsNone(cache.get("t", st, "v1"))
+        self.assertEqual(cache.nbytes, 0)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
@@ -0,0 +1,35 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from waveview.data.sample import get_sample_waveform
+from waveview.inventory.coldstorage import read_rows, write_rows
+from waveview.inventory.datastream import decode_rows, iter_chunks, prepare_buffer
+
+
+class ColdStorageTest(unittest.TestCase):
+    def test_write_read_rows(self) -> None:
+        trace = get_sample_waveform()[0]
+        rows = [prepare_buffer(chunk) for chunk in iter_chunks(trace, 2)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "a" / "2024-06-11.npz"
+            size = write_rows(path, rows)
+            self.assertEqual(size, path.stat().st_size)
+            self.assertEqual(list(path.parent.iterdir()), [path])
+
+            self.assertEqual(read_rows(path), rows)
+
+            start = rows[3][0]
+            end = rows[10][0]
+            self.assertEqual(read_rows(path, start, end), rows[3:10])
+            self.assertEqual(read_rows(path, end=rows[0][0]), [])
+
+            buffer = decode_rows(read_rows(path), rows[0][0], rows[-1][1])
+            self.assertTrue(np.array_equal(buffer.data, trace.data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+import numpy as np
+import pytest
+import zstandard as zstd
+
+from waveview.inventory import compression
+from waveview.inventory.models import DataStreamDictionary
+
+
+@pytest.mark.django_db
+class CompressionTest(unittest.TestCase):
+    def test_compress_with_dictionary(self) -> None:
+        samples = [
+            np.random.randint(-1000, 1000, 200, dtype=np.int32).tobytes()
+            for __ in range(500)
+        ]
+        dict_id = 40000
+        data = zstd.train_dictionary(4096, samples, dict_id=dict_id)
+        DataStreamDictionary.objects.create(
+            dict_id=dict_id, dtype="int32", data=data.as_bytes(), level=3
+        )
+        compression.registry.clear()
+
+        self.assertEqual(compression.registry.get_active(None, "int32"), dict_id)
+        self.assertIsNone(compression.registry.get_active(None, "float64"))
+
+        buf = compression.compress(samples[0], dict_id=dict_id)
+        self.assertEqual(compression.get_dict_id(buf), dict_id)
+        self.assertEqual(compression.decompress(buf), samples[0])
+
+        plain = compression.compress(samples[0])
+        self.assertEqual(compression.get_dict_id(plain), 0)
+        self.assertEqual(compression.decompress(plain), samples[0])
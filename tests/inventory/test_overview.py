@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+from obspy import Stream, Trace, UTCDateTime
+
+from waveview.inventory.overview import OverviewLevel, compute_overview
+
+
+class OverviewTest(unittest.TestCase):
+    def test_compute_overview(self) -> None:
+        sample_rate = 100
+        data = np.random.randn(sample_rate * 120)
+        tr = Trace(data=data)
+        tr.stats.sampling_rate = sample_rate
+        tr.stats.starttime = UTCDateTime("2024-06-11T10:00:00")
+
+        # Split the trace with a gap of 30 seconds.
+        st = Stream([tr.slice(endtime=tr.stats.starttime + 29.99)])
+        st.append(tr.slice(starttime=tr.stats.starttime + 60))
+
+        result = compute_overview(st, [1, 10, 60])
+        self.assertEqual(len(result[1]), 90)
+        self.assertEqual(len(result[10]), 9)
+        self.assertEqual(len(result[60]), 2)
+
+        first = result[60]
+        self.assertEqual(first.index[0] * 60, tr.stats.starttime.timestamp)
+        self.assertAlmostEqual(first.min[1], data[6000:].min())
+        self.assertAlmostEqual(first.max[0], data[:3000].max())
+        self.assertEqual(first.count.tolist(), [3000, 6000])
+
+        rows = result[10].to_rows()
+        ov = OverviewLevel.from_rows(10, [row[1:] for row in rows])
+        self.assertTrue(np.array_equal(ov.index, result[10].index))
+        self.assertTrue(np.allclose(ov.sum, result[10].sum))
+
+    def test_to_trace(self) -> None:
+        ov = OverviewLevel(
+            level=10,
+            index=np.array([100, 102]),
+            min=np.array([-1.0, -2.0]),
+            max=np.array([1.0, 2.0]),
+            sum=np.array([0.0, 0.0]),
+            count=np.array([10, 10]),
+        )
+        tr = ov.to_trace(100, 104)
+        self.assertEqual(tr.stats.npts, 8)
+        self.assertEqual(tr.stats.sampling_rate, 0.2)
+        self.assertEqual(tr.stats.starttime, UTCDateTime(1000))
+        self.assertEqual(
+            np.ma.getmaskarray(tr.data).tolist(),
+            [False, False, True, True, False, False, True, True],
+        )
+        self.assertEqual(tr.data[4], -2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+from datetime import timezone
+from pathlib import Path
+
+import numpy as np
+from obspy import Stream, Trace, UTCDateTime
+
+from waveview.inventory.sds.archive import (
+    RecordIndexCache,
+    SDSArchive,
+    build_record_index,
+)
+
+STREAM_ID = "VG.MEPAS.00.HHZ"
+
+
+def make_trace(starttime: UTCDateTime, npts: int) -> Trace:
+    trace = Trace(data=np.arange(npts, dtype=np.int32) % 1000)
+    trace.stats.network = "VG"
+    trace.stats.station = "MEPAS"
+    trace.stats.location = "00"
+    trace.stats.channel = "HHZ"
+    trace.stats.sampling_rate = 100
+    trace.stats.starttime = starttime
+    return trace
+
+
+class SDSArchiveTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name) / "sds"
+        self.index_cache = RecordIndexCache(index_dir=Path(self.tmpdir.name) / "idx")
+        self.archive = SDSArchive(str(self.root), index_cache=self.index_cache)
+        self.t0 = UTCDateTime("2024-06-11T10:00:00")
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def write(self, stream: Stream, mode: str = "wb") -> Path:
+        path = self.archive.get_path(STREAM_ID, self.t0.date)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, mode) as f:
+            stream.write(f, format="MSEED", reclen=512, encoding="STEIM2")
+        return path
+
+    def test_record_index(self) -> None:
+        trace = make_trace(self.t0, 60_000)
+        path = self.write(Stream([trace]))
+        index = build_record_index(path.read_bytes())
+        self.assertGreater(len(index), 1)
+        self.assertEqual(index["start"][0], self.t0.ns)
+        self.assertEqual(index["end"][-1], trace.stats.endtime.ns)
+        self.assertTrue(np.all(index["length"] == 512))
+        self.assertTrue(np.all(np.diff(index["start"]) > 0))
+
+    def test_get_buffer(self) -> None:
+        trace = make_trace(self.t0, 60_000)
+        self.write(Stream([trace]))
+
+        start = (self.t0 + 100).datetime.replace(tzinfo=timezone.utc)
+        end = (self.t0 + 200).datetime.replace(tzinfo=timezone.utc)
+        buffer = self.archive.get_buffer(STREAM_ID, start, end)
+        expected = trace.slice(self.t0 + 100, self.t0 + 200)
+        self.assertEqual(buffer.starttime, expected.stats.starttime)
+        self.assertEqual(buffer.npts, expected.stats.npts)
+        self.assertFalse(buffer.has_gaps)
+        self.assertTrue(np.array_equal(buffer.data, expected.data))
+
+        # The index is persisted on disk.
+        self.assertEqual(len(list(self.index_cache.index_dir.glob("*.npz"))), 1)
+
+        # Nothing outside the archive.
+        start = (self.t0 + 700).datetime.replace(tzinfo=timezone.utc)
+        end = (self.t0 + 800).datetime.replace(tzinfo=timezone.utc)
+        self.assertIsNone(self.archive.get_buffer(STREAM_ID, start, end))
+
+    def test_appended_records(self) -> None:
+        self.write(Stream([make_trace(self.t0, 30_000)]))
+        start = self.t0.datetime.replace(tzinfo=timezone.utc)
+        end = (self.t0 + 600).datetime.replace(tzinfo=timezone.utc)
+        buffer = self.archive.get_buffer(STREAM_ID, start, end)
+        self.assertEqual(buffer.npts, 30_000)
+
+        # Records appended after a gap extend the cached index.
+        self.write(Stream([make_trace(self.t0 + 310, 29_000)]), mode="ab")
+        buffer = self.archive.get_buffer(STREAM_ID, start, end)
+        self.assertEqual(buffer.npts, 60_000)
+        self.assertEqual(len(buffer.segments()), 2)
+        self.assertEqual(buffer.gaps.sum(), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+
+import pytest
+from django.db import connection
+
+from waveview.inventory.benchmark import STAGES, DataStreamBenchmark
+
+
+@pytest.mark.django_db
+class TestBenchmark(unittest.TestCase):
+    def test_benchmark(self) -> None:
+        benchmark = DataStreamBenchmark(connection, channels=2, duration=600)
+        try:
+            benchmark.setup()
+            self.assertEqual(len(benchmark.tables), 2)
+            results = benchmark.run(windows=(60, 300, 3600), repeat=2)
+        finally:
+            benchmark.teardown()
+
+        self.assertEqual([result.window for result in results], [60, 300])
+        for result in results:
+            self.assertEqual(set(result.timings), set(STAGES))
+            self.assertGreater(result.samples, 0)
+            self.assertGreater(result.rows, 0)
+            self.assertTrue(all(t >= 0 for t in result.timings.values()))
+        self.assertEqual(benchmark.tables, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
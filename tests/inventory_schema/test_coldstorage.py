@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pytest
+from django.db import connection
+from django.test import override_settings
+from obspy import Stream
+
+from waveview.data.sample import get_sample_waveform
+from waveview.inventory.coldstorage import ColdStorage
+from waveview.inventory.datastream import DataStream, iter_chunks, prepare_buffer
+from waveview.inventory.models import Channel, Inventory, Network, Station
+from waveview.organization.models import Organization
+
+START = datetime(2024, 6, 11, 10, 30, tzinfo=timezone.utc)
+END = datetime(2024, 6, 11, 10, 33, tzinfo=timezone.utc)
+
+
+@pytest.mark.django_db
+class ColdStorageReadTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # Objects are bulk created to skip their signals. The datastream table
+        # of the channel is created below and dropped with the channel.
+        (organization,) = Organization.objects.bulk_create(
+            [Organization(slug=f"test-{uuid.uuid4().hex}", name="Test")]
+        )
+        self.addCleanup(organization.delete)
+        (inventory,) = Inventory.objects.bulk_create(
+            [Inventory(organization=organization, name="Test")]
+        )
+        (network,) = Network.objects.bulk_create(
+            [Network(inventory=inventory, code="VG")]
+        )
+        (station,) = Station.objects.bulk_create(
+            [Station(network=network, code="MEPAS")]
+        )
+        (self.channel,) = Channel.objects.bulk_create(
+            [
+                Channel(
+                    station=station,
+                    code="HHZ",
+                    location_code="00",
+                    latitude=0,
+                    longitude=0,
+                    elevation=0,
+                    depth=0,
+                )
+            ]
+        )
+
+        self.trace = get_sample_waveform()[0]
+        self.rows = [prepare_buffer(chunk) for chunk in iter_chunks(self.trace, 2)]
+        self.datastream = DataStream(connection)
+        self.table = self.channel.get_datastream_id()
+        self.datastream.db.create_table(self.table)
+        self.datastream.db.insert_many(self.table, self.rows)
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = Path(tmpdir.name)
+
+    def test_get_waveforms(self) -> None:
+        with override_settings(
+            COLD_STORAGE_DIR=self.root, DATASTREAM_COLD_AFTER_DAYS=1
+        ):
+            files = ColdStorage(connection, root=self.root).export(
+                self.channel, date(2024, 6, 12)
+            )
+            self.assertEqual(len(files), 1)
+            self.assertEqual(self.datastream.db.query(self.table, START, END), [])
+
+            # Rows loaded again after the export are read from the hypertable.
+            self.datastream.db.insert_many(self.table, self.rows[20:30])
+
+            streams = self.datastream.get_waveforms([self.channel.id], START, END)
+            st = streams[str(self.channel.id)]
+            st.merge(method=-1)
+            self.assertEqual(len(st), 1)
+            self.assertTrue(np.array_equal(st[0].data, self.trace.data))
+
+            chunks = list(
+                self.datastream.iter_waveform(self.channel.id, START, END, chunk_size=7)
+            )
+            self.assertGreater(len(chunks), 1)
+            st = Stream(traces=[tr for chunk in chunks for tr in chunk])
+            st.merge(method=-1)
+            self.assertTrue(np.array_equal(st[0].data, self.trace.data))
+
+        # Cold storage is not read while tiering is disabled.
+        with override_settings(DATASTREAM_COLD_AFTER_DAYS=None):
+            streams = self.datastream.get_waveforms([self.channel.id], START, END)
+            st = streams[str(self.channel.id)].merge(method=-1)
+            self.assertEqual(len(st), 1)
+            self.assertEqual(st[0].stats.starttime, self.rows[20][0])
+            self.assertEqual(st[0].stats.endtime, self.rows[29][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from django.db import connection
+from obspy import Stream, UTCDateTime
+
+from waveview.data.sample import get_sample_waveform
+from waveview.inventory.datastream import DataStream, iter_chunks, prepare_buffer
+from waveview.inventory.models import Channel, Inventory, Network, Station
+from waveview.inventory.overview import compute_overview
+from waveview.organization.models import Organization
+
+START = datetime(2024, 6, 11, 10, 30, 15, tzinfo=timezone.utc)
+END = datetime(2024, 6, 11, 10, 32, tzinfo=timezone.utc)
+SPLIT = UTCDateTime("2024-06-11T10:31:00")
+
+
+@pytest.mark.django_db
+class OverviewBackfillTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # Objects are bulk created to skip their signals. The datastream table
+        # of the channel is created below and dropped with the channel.
+        (organization,) = Organization.objects.bulk_create(
+            [Organization(slug=f"test-{uuid.uuid4().hex}", name="Test")]
+        )
+        self.addCleanup(organization.delete)
+        (inventory,) = Inventory.objects.bulk_create(
+            [Inventory(organization=organization, name="Test")]
+        )
+        (network,) = Network.objects.bulk_create(
+            [Network(inventory=inventory, code="VG")]
+        )
+        (station,) = Station.objects.bulk_create(
+            [Station(network=network, code="MEPAS")]
+        )
+        (self.channel,) = Channel.objects.bulk_create(
+            [
+                Channel(
+                    station=station,
+                    code="HHZ",
+                    location_code="00",
+                    latitude=0,
+                    longitude=0,
+                    elevation=0,
+                    depth=0,
+                )
+            ]
+        )
+
+        self.trace = get_sample_waveform()[0]
+        self.datastream = DataStream(connection)
+        self.table = self.channel.get_datastream_id()
+        self.datastream.db.create_table(self.table)
+
+        # The later half is loaded and its overview built first.
+        self.datastream.load_stream(
+            Stream([self.trace.slice(SPLIT)]), channel=self.channel
+        )
+        self.datastream.update_overview(self.channel, end=END)
+        self.expected = compute_overview(Stream([self.trace]), [1])[1]
+
+    def get_buckets(self) -> np.ndarray:
+        rows = self.datastream.db.query_overview(self.table, 1, START, END)
+        return np.array([int(row[0].timestamp()) for row in rows])
+
+    def test_load_stream(self) -> None:
+        self.datastream.load_stream(
+            Stream([self.trace.slice(endtime=SPLIT)]), channel=self.channel
+        )
+        # The periodic update continues from the latest bucket.
+        self.datastream.update_overview(self.channel, end=END)
+        self.assertTrue(np.array_equal(self.get_buckets(), self.expected.index[:-1]))
+
+    def test_get_overview(self) -> None:
+        # Late packets are inserted behind the latest bucket.
+        rows = [
+            prepare_buffer(chunk)
+            for chunk in iter_chunks(self.trace.slice(endtime=SPLIT), 2)
+        ]
+        self.datastream.db.insert_many(self.table, rows)
+        self.assertEqual(self.get_buckets()[0], SPLIT.timestamp)
+
+        trace = self.datastream.get_overview(self.channel.id, START, END, 1)
+        self.assertFalse(np.ma.getmaskarray(trace.data).any())
+        self.assertTrue(np.allclose(trace.data[::2], self.expected.min[:-1]))
+        self.assertTrue(np.allclose(trace.data[1::2], self.expected.max[:-1]))
@@ -49,6 +49,98 @@ class TimescaleQueryTest(unittest.TestCase):
         trace = np.frombuffer(dtrace, dtype=np.int32)
         self.assertTrue(np.array_equal(data, trace))
 
+    def test_iter_query(self) -> None:
+        self.schema.create_table(self.table)
+        self.schema.create_hypertable(self.table)
+
+        sample_rate = 100
+        npts = 100
+        start = timezone.now() - timedelta(minutes=5)
+        for i in range(5):
+            st = start + timedelta(seconds=i)
+            et = st + timedelta(seconds=npts / sample_rate)
+            data = np.arange(npts, dtype=np.int32) + i * npts
+            cdata = zlib.compress(data.tobytes())
+            self.schema.insert(self.table, st, et, sample_rate, "int32", cdata)
+
+        qst = start - timedelta(seconds=10)
+        qet = start + timedelta(seconds=10)
+        chunks = list(self.schema.iter_query(self.table, qst, qet, chunk_size=2))
+        self.assertEqual([len(rows) for rows in chunks], [2, 2, 1])
+
+        rows = [row for rows in chunks for row in rows]
+        self.assertEqual(rows, self.schema.query(self.table, qst, qet))
+
+    def test_query_many(self) -> None:
+        other = f"datastream_{uuid.uuid4().hex}"
+        for table in (self.table, other):
+            self.schema.create_table(table)
+            self.schema.create_hypertable(table)
+
+        sample_rate = 100
+        npts = 100
+        start = timezone.now() - timedelta(minutes=5)
+        for i, table in enumerate((self.table, other)):
+            for j in range(i + 1):
+                st = start + timedelta(seconds=j)
+                et = st + timedelta(seconds=npts / sample_rate)
+                data = np.zeros(npts, dtype=np.int32)
+                cdata = zlib.compress(data.tobytes())
+                self.schema.insert(table, st, et, sample_rate, "int32", cdata)
+
+        qst = start - timedelta(seconds=10)
+        qet = start + timedelta(seconds=10)
+        result = self.schema.query_many([self.table, other], qst, qet)
+        self.assertEqual(len(result[self.table]), 1)
+        self.assertEqual(len(result[other]), 2)
+        self.assertEqual(result[other], self.schema.query(other, qst, qet))
+
+        self.schema.drop_table(other)
+
+    def test_update_buffers(self) -> None:
+        self.schema.create_table(self.table)
+        self.schema.create_hypertable(self.table)
+
+        sample_rate = 100
+        start = timezone.now() - timedelta(minutes=5)
+        rows = []
+        for i in range(3):
+            st = start + timedelta(seconds=i)
+            et = st + timedelta(seconds=1)
+            self.schema.insert(self.table, st, et, sample_rate, "int32", b"old")
+            rows.append((st, f"new{i}".encode()))
+
+        self.schema.update_buffers(self.table, rows[:2])
+        result = self.schema.query(
+            self.table, start - timedelta(seconds=1), start + timedelta(seconds=10)
+        )
+        self.assertEqual([bytes(row[4]) for row in result], [b"new0", b"new1", b"old"])
+
+    def test_insert_many(self) -> None:
+        self.schema.create_table(self.table)
+        self.schema.create_hypertable(self.table)
+
+        sample_rate = 100
+        start = timezone.now() - timedelta(minutes=5)
+        rows = []
+        for i in range(4):
+            st = start + timedelta(seconds=i)
+            et = st + timedelta(seconds=1)
+            rows.append((st, et, sample_rate, "int32", f"buf{i}".encode()))
+
+        qst = start - timedelta(seconds=1)
+        qet = start + timedelta(seconds=10)
+        self.schema.insert_many(self.table, rows[:2], method="values")
+        # Duplicate start times are collapsed, keeping the last row.
+        self.schema.insert_many(
+            self.table, rows[1:] + [rows[3][:4] + (b"last",)], method="copy"
+        )
+        result = self.schema.query(self.table, qst, qet)
+        self.assertEqual(
+            [bytes(row[4]) for row in result], [b"buf0", b"buf1", b"buf2", b"last"]
+        )
+        self.assertEqual([row[0] for row in result], [row[0] for row in rows])
+
 
 if __name__ == "__main__":
     unittest.main()
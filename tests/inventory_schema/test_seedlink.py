@@ -0,0 +1,96 @@
+import unittest
+import uuid
+
+import pytest
+from django.db import connection
+from obspy import Trace, UTCDateTime
+
+from waveview.data.sample import get_sample_waveform
+from waveview.inventory.datastream import iter_chunks
+from waveview.inventory.db.schema import TimescaleSchemaEditor
+from waveview.inventory.models import (
+    Channel,
+    ChannelLatestPacket,
+    DataAvailability,
+    Inventory,
+    Network,
+    Station,
+)
+from waveview.inventory.seedlink.run import SeedLinkClient
+from waveview.organization.models import Organization
+
+
+class TracePacket:
+    def __init__(self, trace: Trace) -> None:
+        self.trace = trace
+
+    def get_trace(self) -> Trace:
+        return self.trace
+
+
+@pytest.mark.django_db
+class SeedLinkClientTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # Objects are bulk created to skip their signals. The datastream table
+        # of the channel is created below and dropped with the channel.
+        (organization,) = Organization.objects.bulk_create(
+            [Organization(slug=f"test-{uuid.uuid4().hex}", name="Test")]
+        )
+        self.addCleanup(organization.delete)
+        (inventory,) = Inventory.objects.bulk_create(
+            [Inventory(organization=organization, name="Test")]
+        )
+        (network,) = Network.objects.bulk_create(
+            [Network(inventory=inventory, code="VG")]
+        )
+        (station,) = Station.objects.bulk_create(
+            [Station(network=network, code="MEPAS")]
+        )
+        (self.channel,) = Channel.objects.bulk_create(
+            [
+                Channel(
+                    station=station,
+                    code="HHZ",
+                    location_code="00",
+                    latitude=0,
+                    longitude=0,
+                    elevation=0,
+                    depth=0,
+                )
+            ]
+        )
+        TimescaleSchemaEditor(connection).create_table(self.channel.get_datastream_id())
+
+        self.trace = get_sample_waveform()[0]
+        self.trace.stats.network = "VG"
+        self.trace.stats.station = "MEPAS"
+        self.trace.stats.channel = "HHZ"
+
+    def test_flush(self) -> None:
+        client = SeedLinkClient("127.0.0.1:18000", autoconnect=False)
+        chunks = list(iter_chunks(self.trace, 10))
+        for chunk in chunks[:-1]:
+            client._on_data(TracePacket(chunk))
+
+        # Packet metadata is only written on flush.
+        availability = DataAvailability.objects.filter(channel=self.channel)
+        self.assertFalse(availability.exists())
+        self.assertFalse(
+            ChannelLatestPacket.objects.filter(channel=self.channel).exists()
+        )
+
+        client.flush()
+        self.assertEqual(availability.count(), 1)
+        segment = availability.get()
+        self.assertEqual(UTCDateTime(segment.start), chunks[0].stats.starttime)
+        packet = ChannelLatestPacket.objects.get(channel=self.channel)
+        self.assertEqual(UTCDateTime(packet.st), chunks[-2].stats.starttime)
+        self.assertEqual(client.packets, {})
+        self.assertEqual(client.segments, {})
+
+        # Packets received since the last flush are written on close.
+        client._on_data(TracePacket(chunks[-1]))
+        client.close()
+        self.assertEqual(availability.count(), 1)
+        packet.refresh_from_db()
+        self.assertEqual(UTCDateTime(packet.st), chunks[-1].stats.starttime)
@@ -1,14 +1,24 @@
 import unittest
 import uuid
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 
+import numpy as np
 import pytest
 from django.db import connection
 from obspy import Stream, UTCDateTime
 
 from waveview.data.sample import get_sample_waveform
-from waveview.inventory.datastream import DataStream, build_trace
+from waveview.inventory.chunkcache import chunk_cache
+from waveview.inventory.compactor import DataStreamCompactor
+from waveview.inventory.datastream import (
+    DataStream,
+    build_trace,
+    decode_buffer,
+    decode_rows,
+    prepare_buffer,
+)
 from waveview.inventory.db.schema import TimescaleSchemaEditor
+from waveview.inventory.models import Channel, Network, Station
 
 
 @pytest.mark.django_db
@@ -61,6 +71,169 @@ class TestStreamGap(unittest.TestCase):
 
         schema.drop_table(table)
 
+    def test_bulk_load(self) -> None:
+        schema = TimescaleSchemaEditor(connection=connection)
+        table = f"datastream_{uuid.uuid4().hex}"
+        other = f"datastream_{uuid.uuid4().hex}"
+        schema.create_table(table)
+        schema.create_table(other)
+
+        st = get_sample_waveform()
+        datastream = DataStream(connection)
+        datastream.load_stream(st, table=table)
+        stats = datastream.load_stream(
+            st, table=other, bulk=True, batch_size=50, workers=2
+        )
+        self.assertGreater(stats.chunks, 50)
+
+        start = st[0].stats.starttime.datetime - timedelta(hours=1)
+        end = st[0].stats.endtime.datetime + timedelta(hours=1)
+        rows = schema.query(table, start, end)
+        self.assertEqual(len(rows), stats.chunks)
+        self.assertEqual(rows, schema.query(other, start, end))
+
+        schema.drop_table(table)
+        schema.drop_table(other)
+
+    def test_query_chunk_cache(self) -> None:
+        schema = TimescaleSchemaEditor(connection=connection)
+        table = f"datastream_{uuid.uuid4().hex}"
+        schema.create_table(table)
+
+        st = get_sample_waveform()
+        datastream = DataStream(connection)
+        datastream.load_stream(st, table=table)
+
+        start = st[0].stats.starttime.datetime
+        end = start + timedelta(seconds=60)
+        rows = schema.query(table, start, end)
+        cached = datastream._query(table, start, end)
+        hits = chunk_cache.hits
+        cached = datastream._query(table, start, end)
+        self.assertEqual(chunk_cache.hits - hits, len(rows))
+        self.assertEqual(len(cached), len(rows))
+        for row, cached_row in zip(rows, cached):
+            self.assertEqual(row[:4], cached_row[:4])
+            self.assertTrue(
+                np.array_equal(decode_buffer(row[4], row[3]), cached_row[4])
+            )
+
+        # Upserting a chunk invalidates its cache entry.
+        tr = st[0].slice(UTCDateTime(rows[0][0]), UTCDateTime(rows[0][1]))
+        tr.data = tr.data * 2
+        schema.insert(table, *prepare_buffer(tr))
+        cached = datastream._query(table, start, end)
+        self.assertTrue(np.array_equal(cached[0][4], tr.data))
+
+        schema.drop_table(table)
+
+    def test_decode_rows_gap(self) -> None:
+        schema = TimescaleSchemaEditor(connection=connection)
+        table = f"datastream_{uuid.uuid4().hex}"
+        schema.create_table(table)
+
+        st = get_sample_waveform()
+        tr = st[0].copy()
+        t = UTCDateTime("2024-06-11T10:30:20")
+        st[0].trim(endtime=t)
+        tr.trim(starttime=t + 1)
+        st.append(tr)
+
+        datastream = DataStream(connection)
+        datastream.load_stream(st, table=table)
+
+        start = st[0].stats.starttime.datetime - timedelta(hours=1)
+        end = st[-1].stats.endtime.datetime + timedelta(hours=1)
+        rows = schema.query(table, start, end)
+        buffer = decode_rows(rows, start, end)
+
+        expected = st.copy().merge(method=0, fill_value=None)[0]
+        self.assertEqual(buffer.starttime, expected.stats.starttime)
+        self.assertEqual(buffer.endtime, expected.stats.endtime)
+        self.assertEqual(buffer.npts, expected.stats.npts)
+        self.assertEqual(len(buffer.segments()), 2)
+        self.assertTrue(np.array_equal(buffer.gaps, expected.data.mask))
+        self.assertTrue(
+            np.array_equal(buffer.data[~buffer.gaps], expected.data.compressed())
+        )
+
+        schema.drop_table(table)
+
+    def test_compact(self) -> None:
+        schema = TimescaleSchemaEditor(connection=connection)
+        table = f"datastream_{uuid.uuid4().hex}"
+        schema.create_table(table)
+
+        st = get_sample_waveform()
+        tr = st[0].copy()
+        t = UTCDateTime("2024-06-11T10:30:20")
+        st[0].trim(endtime=t)
+        tr.trim(starttime=t + 1)
+        st.append(tr)
+
+        datastream = DataStream(connection)
+        datastream.load_stream(st, table=table)
+
+        start = st[0].stats.starttime.datetime - timedelta(hours=1)
+        end = st[-1].stats.endtime.datetime + timedelta(hours=1)
+        rows = schema.query(table, start, end)
+        expected = decode_rows(rows, start, end)
+
+        compactor = DataStreamCompactor(connection)
+        stats = compactor.compact_table(table, start, end, block_size=300)
+        self.assertEqual(stats.rows_before, len(rows))
+        compacted = schema.query(table, start, end)
+        self.assertEqual(stats.rows_after, len(compacted))
+        self.assertLess(len(compacted), len(rows))
+
+        buffer = decode_rows(compacted, start, end)
+        self.assertEqual(buffer.starttime, expected.starttime)
+        self.assertEqual(buffer.npts, expected.npts)
+        self.assertEqual(buffer.segments(), expected.segments())
+        self.assertTrue(np.array_equal(buffer.data, expected.data))
+
+        # Compacting again is a no-op.
+        stats = compactor.compact_table(table, start, end, block_size=300)
+        self.assertEqual(stats.blocks, 0)
+
+        schema.drop_table(table)
+
+    def test_compact_read(self) -> None:
+        station = Station(code="MEPAS", network=Network(code="VG"))
+        channel = Channel(code="HHZ", location_code="00", station=station)
+        table = channel.get_datastream_id()
+        schema = TimescaleSchemaEditor(connection=connection)
+        schema.create_table(table)
+
+        st = get_sample_waveform()
+        datastream = DataStream(connection)
+        datastream.load_stream(st, table=table)
+
+        # A window well inside a compacted block.
+        start = datetime(2024, 6, 11, 10, 31, 30, tzinfo=timezone.utc)
+        end = start + timedelta(seconds=20)
+        expected = datastream._get_waveform(channel, start, end).merge()
+        self.assertEqual(expected[0].stats.npts, 2001)
+
+        compactor = DataStreamCompactor(connection)
+        stats = compactor.compact_table(
+            table, start - timedelta(hours=1), end + timedelta(hours=1)
+        )
+        self.assertGreater(stats.blocks, 0)
+
+        tr = datastream._get_waveform(channel, start, end).merge()[0]
+        self.assertEqual(tr.stats.starttime, expected[0].stats.starttime)
+        self.assertTrue(np.array_equal(tr.data, expected[0].data))
+        streams = datastream.get_channel_waveforms([channel], start, end)
+        self.assertTrue(
+            np.array_equal(streams[str(channel.id)].merge()[0].data, tr.data)
+        )
+
+        with self.assertRaises(ValueError):
+            compactor.compact_table(table, start, end, block_size=3600)
+
+        schema.drop_table(table)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,163 @@
+import struct
+import unittest
+
+import numpy as np
+import zstandard as zstd
+from obspy import UTCDateTime
+
+from waveview.inventory.datastream import WaveformBuffer
+from waveview.signal.encoder import (
+    SAMPLE_FORMAT_INT16,
+    StreamData,
+    StreamEncoder,
+    get_stream_version,
+)
+
+HEADER_SIZE = 4 + 64 * 3 + 16 + 8 + 4 + 4 + 4 + 4
+
+
+def decode(data: bytes) -> tuple[int, np.ndarray, np.ndarray]:
+    return decode_frame(zstd.ZstdDecompressor().decompress(data))
+
+
+def decode_frame(binary: bytes) -> tuple[int, np.ndarray, np.ndarray]:
+    version = struct.unpack_from("<i", binary, 0)[0]
+    n_samples = struct.unpack_from("<i", binary, HEADER_SIZE - 12)[0]
+    offset = HEADER_SIZE
+    if version == 0:
+        values = np.frombuffer(binary, dtype="<f4", count=n_samples, offset=offset)
+        offset += 4 * n_samples
+    else:
+        sample_format, scale, value_offset = struct.unpack_from("<Bdd", binary, offset)
+        offset += 17
+        dtype = "<i2" if sample_format == SAMPLE_FORMAT_INT16 else "<i4"
+        deltas = np.frombuffer(binary, dtype=dtype, count=n_samples, offset=offset)
+        offset += deltas.nbytes
+        values = value_offset + scale * np.cumsum(deltas, dtype=np.int64)
+    gaps = np.unpackbits(np.frombuffer(binary, dtype=np.uint8, offset=offset))
+    return version, values, gaps[:n_samples].astype(bool)
+
+
+def make_data(samples: np.ndarray, gaps: np.ndarray | None = None) -> StreamData:
+    if gaps is None:
+        gaps = np.zeros(len(samples), dtype=bool)
+    buffer = WaveformBuffer(
+        starttime=UTCDateTime("2024-06-11T10:00:00"),
+        sampling_rate=100,
+        data=samples,
+        mask=np.packbits(gaps),
+    )
+    return StreamData(
+        request_id="r",
+        channel_id="c",
+        command="stream.fetch",
+        start=0,
+        end=1,
+        trace=None,
+        buffer=buffer,
+    )
+
+
+class StreamEncoderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.counts = np.cumsum(rng.integers(-300, 300, 6000)).astype(np.int32)
+
+    def test_version_0(self) -> None:
+        version, values, __ = decode(
+            StreamEncoder().encode_stream(make_data(self.counts))
+        )
+        self.assertEqual(version, 0)
+        self.assertTrue(np.array_equal(values, self.counts.astype(np.float32)))
+
+    def test_version_1_integers(self) -> None:
+        encoder = StreamEncoder(version=1)
+        data = encoder.encode_stream(make_data(self.counts))
+        version, values, __ = decode(data)
+        self.assertEqual(version, 1)
+        self.assertTrue(np.array_equal(values, self.counts))
+        self.assertLess(
+            len(data), len(StreamEncoder().encode_stream(make_data(self.counts)))
+        )
+
+        large = self.counts * 1000
+        __, values, __ = decode(encoder.encode_stream(make_data(large)))
+        self.assertTrue(np.array_equal(values, large))
+
+    def test_version_1_quantized(self) -> None:
+        samples = np.sin(np.linspace(0, 20, 6000)) * 1e-6
+        gaps = np.zeros(len(samples), dtype=bool)
+        gaps[1000:1500] = True
+        samples[gaps] = 0
+        encoder = StreamEncoder(version=1, quantize=200)
+        version, values, decoded_gaps = decode(
+            encoder.encode_stream(make_data(samples, gaps))
+        )
+        self.assertEqual(version, 1)
+        self.assertTrue(np.array_equal(decoded_gaps, gaps))
+        step = (samples.max() - samples.min()) / 199
+        self.assertLessEqual(
+            np.abs(values[~gaps] - samples[~gaps]).max(), step / 2 + 1e-15
+        )
+
+    def test_empty(self) -> None:
+        data = StreamData(
+            request_id="r",
+            channel_id="c",
+            command="stream.fetch",
+            start=0,
+            end=1,
+            trace=None,
+        )
+        version, values, __ = decode(StreamEncoder(version=1).encode_stream(data))
+        self.assertEqual(version, 1)
+        self.assertEqual(len(values), 0)
+
+    def test_all_gaps(self) -> None:
+        samples = np.zeros(100, dtype=np.int32)
+        gaps = np.ones(len(samples), dtype=bool)
+        for version in (0, 1):
+            encoder = StreamEncoder(version=version)
+            __, values, decoded_gaps = decode(
+                encoder.encode_stream(make_data(samples, gaps))
+            )
+            self.assertEqual(len(values), 100)
+            self.assertTrue(decoded_gaps.all())
+
+    def test_encode_streams(self) -> None:
+        encoder = StreamEncoder()
+        items = [make_data(self.counts), make_data(self.counts[:100] * 2)]
+        binary = zstd.ZstdDecompressor().decompress(encoder.encode_streams(items))
+        magic, count = struct.unpack_from("<4sI", binary, 0)
+        self.assertEqual((magic, count), (b"WVMF", 2))
+
+        offset = 8
+        for item in items:
+            length = struct.unpack_from("<I", binary, offset)[0]
+            frame = binary[offset + 4 : offset + 4 + length]
+            self.assertEqual(
+                frame, zstd.ZstdDecompressor().decompress(encoder.encode_stream(item))
+            )
+            __, values, __ = decode_frame(frame)
+            self.assertTrue(np.array_equal(values, item.buffer.data))
+            offset += 4 + length
+        self.assertEqual(offset, len(binary))
+
+    def test_replace_request_id(self) -> None:
+        encoder = StreamEncoder()
+        data = encoder.replace_request_id(
+            encoder.encode_stream(make_data(self.counts)), "other"
+        )
+        binary = zstd.ZstdDecompressor().decompress(data)
+        self.assertEqual(binary[4:68].rstrip(b"\0"), b"other")
+        __, values, __ = decode(data)
+        self.assertTrue(np.array_equal(values, self.counts))
+
+    def test_stream_version(self) -> None:
+        self.assertEqual(get_stream_version({}), 0)
+        self.assertEqual(get_stream_version({"encoderVersion": 1}), 1)
+        self.assertEqual(get_stream_version({"encoderVersion": 9}), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
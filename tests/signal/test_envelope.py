@@ -0,0 +1,70 @@
+import unittest
+from datetime import timezone
+
+import numpy as np
+from obspy import UTCDateTime
+
+from waveview.inventory.datastream import WaveformBuffer
+from waveview.signal.envelope import compute_envelope
+
+
+class EnvelopeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.t0 = UTCDateTime("2024-06-11T10:00:00")
+        self.data = rng.normal(0, 100, 60_000)
+        self.data[12_345] = 5000
+        self.gaps = np.zeros(len(self.data), dtype=bool)
+        self.gaps[30_000:36_000] = True
+        self.buffer = WaveformBuffer(
+            starttime=self.t0,
+            sampling_rate=100,
+            data=self.data,
+            mask=np.packbits(self.gaps),
+        )
+
+    def test_envelope(self) -> None:
+        start = self.t0.datetime.replace(tzinfo=timezone.utc)
+        end = (self.t0 + 600).datetime.replace(tzinfo=timezone.utc)
+        trace = compute_envelope(self.buffer, start, end, 100)
+        self.assertEqual(trace.stats.npts, 400)
+        self.assertEqual(trace.stats.starttime, self.t0)
+        self.assertAlmostEqual(trace.stats.sampling_rate, 400 / 600)
+
+        # Each pixel covers 600 samples.
+        envelope = trace.data.reshape(100, 4)
+        mask = np.ma.getmaskarray(trace.data).reshape(100, 4)
+        self.assertTrue(mask[50:60].all())
+        self.assertFalse(mask[:50].any())
+        for pixel in [0, 20, 99]:
+            samples = self.data[pixel * 600 : (pixel + 1) * 600]
+            first, a, b, last = envelope[pixel]
+            self.assertEqual(first, samples[0])
+            self.assertEqual(last, samples[-1])
+            self.assertEqual(min(a, b), samples.min())
+            self.assertEqual(max(a, b), samples.max())
+            if samples.argmin() < samples.argmax():
+                self.assertEqual(a, samples.min())
+            else:
+                self.assertEqual(a, samples.max())
+
+        # The spike survives.
+        self.assertEqual(trace.data.max(), 5000)
+
+    def test_partial_range(self) -> None:
+        start = (self.t0 - 300).datetime.replace(tzinfo=timezone.utc)
+        end = (self.t0 + 300).datetime.replace(tzinfo=timezone.utc)
+        trace = compute_envelope(self.buffer, start, end, 10, demean=True)
+        mask = np.ma.getmaskarray(trace.data).reshape(10, 4)
+        self.assertTrue(mask[:5].all())
+        self.assertFalse(mask[5:].any())
+
+    def test_empty_range(self) -> None:
+        start = self.t0.datetime.replace(tzinfo=timezone.utc)
+        trace = compute_envelope(self.buffer, start, start, 100)
+        self.assertEqual(trace.stats.npts, 0)
+        self.assertEqual(trace.stats.starttime, self.t0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+import struct
+import unittest
+from datetime import datetime
+
+import numpy as np
+import zstandard as zstd
+from django.core.cache.backends.locmem import LocMemCache
+from obspy import Trace, UTCDateTime, read_inventory
+
+from waveview.inventory.datastream import UUIDType, WaveformBuffer
+from waveview.inventory.models import Channel, Network, Station
+from waveview.signal.encoder import StreamData, StreamEncoder
+from waveview.signal.process import (
+    OPERATIONS,
+    ProcessChain,
+    ProcessContext,
+    ProcessRequestData,
+    TimescaleProcessAdapter,
+)
+from waveview.signal.sosfilter import filter_buffer, get_sos
+
+STARTTIME = UTCDateTime("2009-08-24T00:20:03")
+
+
+def make_buffer(data: np.ndarray, gaps: np.ndarray | None = None) -> WaveformBuffer:
+    if gaps is None:
+        gaps = np.zeros(len(data), dtype=bool)
+    return WaveformBuffer(
+        starttime=STARTTIME,
+        sampling_rate=100,
+        data=data,
+        mask=np.packbits(gaps),
+    )
+
+
+class ProcessChainTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.data = np.cumsum(rng.normal(size=30_000)).astype(np.int32)
+        self.context = ProcessContext("BW.RJOB..EHZ", inventories=[read_inventory()])
+
+    def run_chain(
+        self, operations: list[dict], buffer: WaveformBuffer
+    ) -> WaveformBuffer:
+        return ProcessChain.from_list(operations).run(buffer, self.context)
+
+    def test_registry(self) -> None:
+        for name in ("demean", "bandpass", "remove_response", "envelope", "resample"):
+            self.assertIn(name, OPERATIONS)
+        with self.assertRaises(ValueError):
+            ProcessChain.from_list([{"name": "unknown"}])
+        with self.assertRaises(ValueError):
+            ProcessChain.from_list([{"name": "highpass"}])
+        with self.assertRaises(ValueError):
+            ProcessChain.from_list([{"name": "resample", "sampleRate": 0}])
+
+    def test_filter_chain(self) -> None:
+        buffer = make_buffer(self.data)
+        processed = self.run_chain(
+            [{"name": "demean"}, {"name": "highpass", "freq": 1, "zerophase": True}],
+            buffer,
+        )
+        expected = filter_buffer(
+            buffer, get_sos("highpass", 4, (1.0,), 100.0), zerophase=True
+        )
+        self.assertTrue(np.allclose(processed.data, expected.data))
+        # The input buffer is left untouched.
+        self.assertEqual(buffer.data.dtype, np.int32)
+
+    def test_remove_response(self) -> None:
+        buffer = make_buffer(self.data)
+        processed = self.run_chain(
+            [{"name": "demean"}, {"name": "remove_response", "output": "VEL"}], buffer
+        )
+
+        trace = Trace(data=self.data.astype(np.float64))
+        trace.stats.update(
+            {"network": "BW", "station": "RJOB", "channel": "EHZ"},
+        )
+        trace.stats.sampling_rate = 100
+        trace.stats.starttime = STARTTIME
+        trace.detrend("demean")
+        trace.remove_response(inventory=read_inventory(), output="VEL", taper=False)
+        scale = np.abs(trace.data).max()
+        self.assertLess(np.abs(processed.data - trace.data).max(), 1e-3 * scale)
+
+    def test_envelope_and_resample(self) -> None:
+        gaps = np.zeros(len(self.data), dtype=bool)
+        gaps[10_000:11_000] = True
+        buffer = make_buffer(self.data, gaps)
+        processed = self.run_chain(
+            [
+                {"name": "detrend"},
+                {"name": "bandpass", "freqmin": 1, "freqmax": 5},
+                {"name": "envelope"},
+                {"name": "resample", "sampleRate": 20},
+            ],
+            buffer,
+        )
+        self.assertEqual(processed.sampling_rate, 20)
+        self.assertEqual(processed.npts, 6000)
+        self.assertEqual(processed.segments(), [(0, 2000), (2200, 6000)])
+        self.assertGreaterEqual(processed.data[2200:2400].min(), 0)
+
+    def test_resample_upsampling(self) -> None:
+        buffer = make_buffer(self.data)
+        with self.assertRaises(ValueError):
+            self.run_chain([{"name": "resample", "sampleRate": 1000}], buffer)
+
+
+class MemoryProcessAdapter(TimescaleProcessAdapter):
+    def __init__(self, buffer: WaveformBuffer, cache: LocMemCache) -> None:
+        super().__init__(cache=cache)
+        self.buffer = buffer
+        self.calls: list[tuple[datetime, datetime]] = []
+
+    def get_channel(self, channel_id: UUIDType) -> Channel:
+        station = Station(code="RJOB", network=Network(code="BW"))
+        return Channel(code="EHZ", location_code="", station=station)
+
+    def get_buffer(
+        self, channel_id: UUIDType, start: datetime, end: datetime
+    ) -> WaveformBuffer | None:
+        self.calls.append((start, end))
+        return self.buffer.slice(UTCDateTime(start), UTCDateTime(end))
+
+
+class ProcessAdapterTest(unittest.TestCase):
+    def test_cache_key(self) -> None:
+        raw = {
+            "requestId": "a",
+            "channelId": "channel",
+            "start": 0,
+            "end": 60_000,
+            "operations": [{"name": "demean"}],
+        }
+        a = ProcessRequestData.from_raw_data(raw)
+        b = ProcessRequestData.from_raw_data({**raw, "requestId": "b"})
+        c = ProcessRequestData.from_raw_data({**raw, "operations": []})
+        self.assertEqual(a.get_cache_key(), b.get_cache_key())
+        self.assertNotEqual(a.get_cache_key(), c.get_cache_key())
+
+    def test_cached_result(self) -> None:
+        payload = ProcessRequestData(
+            request_id="second",
+            channel_id="channel",
+            start=0,
+            end=60_000,
+            operations=[{"name": "demean"}],
+        )
+        cache = LocMemCache("process", {})
+        cached = StreamEncoder().encode_stream(
+            StreamData(
+                request_id="first",
+                channel_id="channel",
+                command="stream.process",
+                start=0,
+                end=60_000,
+                trace=None,
+            )
+        )
+        cache.set(payload.get_cache_key(), cached)
+
+        data = TimescaleProcessAdapter(cache=cache).process(payload)
+        binary = zstd.ZstdDecompressor().decompress(data)
+        self.assertEqual(binary[4:68].rstrip(b"\0"), b"second")
+        self.assertEqual(struct.unpack("<qq", binary[196:212]), (0, 60_000))
+
+    def test_process(self) -> None:
+        data = np.arange(30_000, dtype=np.int32)
+        start = int(STARTTIME.timestamp * 1000) + 60_000
+        payload = ProcessRequestData(
+            request_id="first",
+            channel_id="channel",
+            start=start,
+            end=start + 60_000,
+            operations=[{"name": "demean"}],
+            padding=10,
+        )
+        adapter = MemoryProcessAdapter(make_buffer(data), LocMemCache("process", {}))
+        first = zstd.ZstdDecompressor().decompress(adapter.process(payload))
+        self.assertEqual(len(adapter.calls), 1)
+        self.assertEqual(first[4:68].rstrip(b"\0"), b"first")
+        npts = struct.unpack("<i", first[224:228])[0]
+        self.assertEqual(npts, 6001)
+
+        # The second request is served from the cache.
+        payload.request_id = "second"
+        second = zstd.ZstdDecompressor().decompress(adapter.process(payload))
+        self.assertEqual(len(adapter.calls), 1)
+        self.assertEqual(second[4:68].rstrip(b"\0"), b"second")
+        self.assertEqual(second[68:], first[68:])
+
+
+if __name__ == "__main__":
+    unittest.main()
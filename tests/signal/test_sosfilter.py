@@ -0,0 +1,96 @@
+import unittest
+
+import numpy as np
+from obspy import Trace, UTCDateTime
+
+from waveview.inventory.datastream import WaveformBuffer
+from waveview.signal.sosfilter import filter_buffer, get_sos
+
+
+def make_buffer(data: np.ndarray, gaps: np.ndarray | None = None) -> WaveformBuffer:
+    if gaps is None:
+        gaps = np.zeros(len(data), dtype=bool)
+    return WaveformBuffer(
+        starttime=UTCDateTime("2024-06-11T10:00:00"),
+        sampling_rate=100,
+        data=data,
+        mask=np.packbits(gaps),
+    )
+
+
+class SOSFilterTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.data = np.cumsum(rng.normal(size=60_000)).astype(np.int32)
+
+    def test_get_sos(self) -> None:
+        get_sos.cache_clear()
+        sos = get_sos("bandpass", 4, (1.0, 10.0), 100.0)
+        self.assertIs(get_sos("bandpass", 4, (1.0, 10.0), 100.0), sos)
+        self.assertFalse(sos.flags.writeable)
+        self.assertEqual(get_sos.cache_info().hits, 1)
+        self.assertIsNone(get_sos("lowpass", 4, (60.0,), 100.0))
+        self.assertEqual(len(get_sos("bandpass", 4, (1.0, 60.0), 100.0)), 2)
+        with self.assertRaises(ValueError):
+            get_sos("highpass", 4, (60.0,), 100.0)
+
+    def test_matches_obspy(self) -> None:
+        trace = Trace(data=self.data.astype(np.float64))
+        trace.stats.sampling_rate = 100
+        trace.detrend("demean")
+        trace.filter("bandpass", freqmin=1, freqmax=10, corners=4)
+
+        buffer = make_buffer(self.data)
+        filtered = filter_buffer(buffer, get_sos("bandpass", 4, (1.0, 10.0), 100.0))
+        self.assertTrue(np.allclose(filtered.data, trace.data))
+
+    def test_gaps(self) -> None:
+        gaps = np.zeros(len(self.data), dtype=bool)
+        gaps[20_000:21_000] = True
+        buffer = make_buffer(self.data, gaps)
+        tapered = filter_buffer(buffer, None, taper_type="hann", taper_width=0.05)
+        self.assertTrue(np.array_equal(tapered.mask, buffer.mask))
+
+        # Only the outer ends are tapered, not the gap edges.
+        segment = self.data[21_000:].astype(np.float64)
+        segment -= segment.mean()
+        self.assertEqual(tapered.data[0], 0)
+        self.assertEqual(tapered.data[-1], 0)
+        self.assertTrue(np.allclose(tapered.data[21_000:21_100], segment[:100]))
+
+        filtered = filter_buffer(
+            buffer, get_sos("highpass", 2, (1.0,), 100.0), zerophase=True
+        )
+        self.assertTrue(np.isfinite(filtered.data).all())
+
+    def test_padded_ranges_join(self) -> None:
+        sos = get_sos("bandpass", 4, (1.0, 10.0), 100.0)
+        buffer = make_buffer(self.data)
+        t0 = buffer.starttime
+        whole = filter_buffer(buffer.slice(t0 + 100, t0 + 500), sos, zerophase=True)
+
+        # Each half is filtered with a 20 s margin and sliced back.
+        left = filter_buffer(buffer.slice(t0 + 100, t0 + 320), sos, zerophase=True)
+        right = filter_buffer(buffer.slice(t0 + 280, t0 + 500), sos, zerophase=True)
+        joined = np.concatenate(
+            [
+                left.slice(t0 + 200, t0 + 300 - 0.01).data,
+                right.slice(t0 + 300, t0 + 400).data,
+            ]
+        )
+        expected = whole.slice(t0 + 200, t0 + 400).data
+        self.assertEqual(len(joined), len(expected))
+        self.assertLess(np.abs(joined - expected).max(), 1e-3 * np.abs(expected).max())
+
+    def test_slice(self) -> None:
+        buffer = make_buffer(self.data)
+        t0 = buffer.starttime
+        sliced = buffer.slice(t0 + 10, t0 + 20)
+        self.assertEqual(sliced.starttime, t0 + 10)
+        self.assertEqual(sliced.npts, 1001)
+        self.assertTrue(np.array_equal(sliced.data, self.data[1000:2001]))
+        self.assertIsNone(buffer.slice(t0 + 700, t0 + 800))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,36 @@
+import io
 import time
 import unittest
 import uuid
 
 import numpy as np
+import zstandard as zstd
+from matplotlib.colors import Normalize
 from obspy import Stream, read
+from PIL import Image
+from scipy.signal import get_window
+from scipy.signal import spectrogram as scipy_spectrogram
 
 from waveview.data.sample import get_sample_file_path
-from waveview.signal.encoder import StreamEncoder
-from waveview.signal.spectrogram import SpectrogramData, spectrogram
+from waveview.signal.encoder import (
+    SPECTROGRAM_HEADER,
+    SPECTROGRAM_NORM,
+    SpectrogramFormat,
+    StreamEncoder,
+    generate_image,
+    get_colormap_lut,
+    quantize_spectrogram,
+    render_image,
+)
+from waveview.signal.spectrogram import (
+    SpectrogramData,
+    cached_spectrogram,
+    decimate,
+    interpolate_gaps,
+    spectrogram,
+    stft_power,
+)
+from waveview.signal.stftcache import STFTColumnCache
 
 
 class SpectrogramTest(unittest.TestCase):
@@ -38,6 +61,235 @@ class SpectrogramTest(unittest.TestCase):
         data = encoder.encode_spectrogram(packet)
         self.assertTrue(isinstance(data, bytes))
 
+    def test_interpolate_gaps(self) -> None:
+        data = np.array([0, 9, 9, 4, 0, -2, 9, 9, 9, 6, 9], dtype=np.int32)
+        gaps = np.array([1, 1, 0, 0, 0, 0, 1, 1, 1, 0, 1], dtype=bool)
+        filled = interpolate_gaps(data, gaps)
+        # Zero samples are data, not gaps.
+        self.assertEqual(filled[4], 0)
+        self.assertTrue(np.array_equal(filled[[0, 1]], [9, 9]))
+        self.assertTrue(np.allclose(filled[6:9], [-0.0, 2.0, 4.0]))
+        self.assertEqual(filled[10], 6)
+        with self.assertRaises(ValueError):
+            interpolate_gaps(data, np.ones(len(data), dtype=bool))
+
+    def test_spectrogram_blank_gaps(self) -> None:
+        t = np.arange(100 * 600) / 100
+        data = np.sin(2 * np.pi * 5 * t)
+        gaps = np.zeros(len(data), dtype=bool)
+        gaps[30000:31000] = True
+        data[gaps] = 0
+
+        specgram, ts, __, norm = spectrogram(
+            data, 100, freqmax=25, width=300, height=100, gaps=gaps, blank_gaps=True
+        )
+        blank = np.isnan(specgram).all(axis=0)
+        self.assertTrue(blank.any())
+        self.assertFalse(np.isnan(specgram[:, ~blank]).any())
+        self.assertTrue(np.all((ts[blank] > 290) & (ts[blank] < 320)))
+        self.assertTrue(np.isfinite(norm.vmax))
+
+        filled, *__ = spectrogram(
+            data, 100, freqmax=25, width=300, height=100, gaps=gaps
+        )
+        self.assertFalse(np.isnan(filled).any())
+
+    def test_stft_power(self) -> None:
+        data = np.random.default_rng(0).normal(size=5000)
+        window = get_window("hann", 256)
+        freq, ts, power = scipy_spectrogram(
+            data, fs=100, nperseg=256, noverlap=230, window=window, mode="psd"
+        )
+        expected = stft_power(data, 100, 256, 26)
+        self.assertTrue(np.allclose(expected[0], freq))
+        self.assertTrue(np.allclose(expected[1], ts))
+        self.assertTrue(np.allclose(expected[2], power))
+
+    def test_spectrogram_resolution(self) -> None:
+        t = np.arange(200 * 600) / 200
+        data = np.sin(2 * np.pi * 5 * t) + np.sin(2 * np.pi * 60 * t) + 1
+        specgram, ts, fs, __ = spectrogram(data, 200, freqmax=25, width=300, height=100)
+        self.assertLessEqual(fs.max(), 25)
+        self.assertGreaterEqual(len(fs), 100)
+        self.assertGreaterEqual(len(ts), 300)
+        self.assertLessEqual(len(ts), 600)
+        # The 60 Hz tone is filtered out rather than aliased.
+        self.assertAlmostEqual(fs[np.argmax(specgram.mean(axis=1))], 5, delta=0.5)
+
+        decimated, sample_rate = decimate(data, 200, 25)
+        self.assertAlmostEqual(sample_rate, 200 / 3)
+        self.assertEqual(len(decimated), len(data) // 3)
+
+    def test_cached_spectrogram(self) -> None:
+        rng = np.random.default_rng(0)
+        data = np.cumsum(rng.normal(size=100 * 4200)) + 1
+        gaps = np.zeros(len(data), dtype=bool)
+        t0 = 1718100000.0
+
+        def compute(offset: int, cache: STFTColumnCache) -> tuple:
+            window = slice(offset * 100, (offset + 3600) * 100)
+            return cached_spectrogram(
+                data[window],
+                gaps[window],
+                100,
+                t0 + offset,
+                "channel",
+                freqmax=25,
+                width=1000,
+                height=200,
+                cache=cache,
+            )
+
+        cache = STFTColumnCache(max_bytes=64 * 1024 * 1024)
+        compute(0, cache)
+        self.assertEqual(cache.hits, 0)
+
+        # Panning by a minute reuses every column the windows share.
+        specgram, ts, fs, __ = compute(60, cache)
+        self.assertGreater(cache.hits, 0.95 * len(ts))
+
+        expected = compute(60, STFTColumnCache(max_bytes=0))
+        self.assertTrue(np.allclose(specgram, expected[0]))
+        self.assertTrue(np.allclose(ts, expected[1]))
+        self.assertTrue(np.allclose(fs, expected[2]))
+
+    def test_column_cache_eviction(self) -> None:
+        cache = STFTColumnCache(max_bytes=2 * 800)
+        for i in range(3):
+            cache.put("key", i, np.zeros(100))
+        self.assertIsNone(cache.get("key", 0))
+        self.assertIsNotNone(cache.get("key", 2))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_spectrogram_matrix(self) -> None:
+        path = get_sample_file_path("sample.mseed")
+        st: Stream = read(path)
+        data = st[0].data
+        sample_rate = st[0].stats.sampling_rate
+        specgram, ts, fs, norm = spectrogram(data, sample_rate)
+
+        packet = SpectrogramData(
+            request_id="req",
+            channel_id="chan",
+            data=specgram,
+            time=ts,
+            freq=fs,
+            start=0,
+            end=1000,
+            norm=norm,
+            npoints=len(data),
+            sample_rate=sample_rate,
+            width=800,
+            height=600,
+            format=SpectrogramFormat.MATRIX,
+        )
+        raw = zstd.ZstdDecompressor().decompress(
+            StreamEncoder().encode_spectrogram(packet)
+        )
+        header = SPECTROGRAM_HEADER.unpack_from(raw)
+        self.assertEqual(header[0], 1)
+        time_length, freq_length = header[10], header[11]
+        self.assertEqual((freq_length, time_length), specgram.shape)
+
+        offset = SPECTROGRAM_HEADER.size
+        vmin, vmax = SPECTROGRAM_NORM.unpack_from(raw, offset)
+        self.assertEqual((vmin, vmax), (norm.vmin, norm.vmax))
+        offset += SPECTROGRAM_NORM.size
+        time_axis = np.frombuffer(raw, "<f4", time_length, offset)
+        offset += time_axis.nbytes
+        freq_axis = np.frombuffer(raw, "<f4", freq_length, offset)
+        offset += freq_axis.nbytes
+        matrix = np.frombuffer(raw, np.uint8, offset=offset)
+        self.assertTrue(np.allclose(time_axis, ts, rtol=1e-6))
+        self.assertTrue(np.allclose(freq_axis, fs, rtol=1e-6))
+        self.assertTrue(
+            np.array_equal(
+                matrix.reshape(freq_length, time_length),
+                quantize_spectrogram(specgram, norm),
+            )
+        )
+
+    def test_invalid_freqmax(self) -> None:
+        data = np.random.default_rng(0).normal(size=6000)
+        gaps = np.zeros(len(data), dtype=bool)
+        for freqmax in (0, -1, float("nan")):
+            with self.assertRaises(ValueError):
+                cached_spectrogram(
+                    data,
+                    gaps,
+                    100,
+                    0,
+                    "key",
+                    freqmax=freqmax,
+                    width=300,
+                    height=150,
+                    cache=STFTColumnCache(max_bytes=0),
+                )
+        with self.assertRaises(ValueError):
+            spectrogram(data, 100, freqmax=25, width=300, height=0)
+
+    def test_quantize_spectrogram(self) -> None:
+        specgram = np.array([[-1.0, 0.0, 0.5], [1.0, 2.0, np.nan]])
+        q = quantize_spectrogram(specgram, Normalize(0, 1))
+        self.assertEqual(q.dtype, np.uint8)
+        self.assertTrue(np.array_equal(q, [[0, 0, 128], [255, 255, 0]]))
+
+    def test_render_image(self) -> None:
+        # Power rises with frequency, so the bottom row is the first colormap
+        # entry and the top row the last one.
+        freq = np.arange(0, 11, dtype=np.float64)
+        time_axis = np.arange(0.5, 20, dtype=np.float64)
+        specgram = np.repeat(freq[:, None] / 10, len(time_axis), axis=1)
+        png = render_image(
+            specgram, time_axis, freq, Normalize(0, 1), 0, 20, width=200, height=100
+        )
+        image = np.asarray(Image.open(io.BytesIO(png)))
+        self.assertEqual(image.shape, (100, 200, 4))
+        lut = get_colormap_lut()
+        self.assertTrue(np.array_equal(image[-1, 0], lut[1]))
+        self.assertTrue(np.array_equal(image[0, -1], lut[254]))
+        self.assertTrue(np.all(image[:, 0] == image[:, -1]))
+
+    def test_png_formats(self) -> None:
+        freq = np.arange(0, 11, dtype=np.float64)
+        time_axis = np.arange(0.5, 20, dtype=np.float64)
+        specgram = np.repeat(freq[:, None] / 10, len(time_axis), axis=1)
+        norm = Normalize(0, 1)
+
+        def encode(format: SpectrogramFormat) -> bytes:
+            packet = SpectrogramData(
+                request_id="req",
+                channel_id="chan",
+                data=specgram,
+                time=time_axis,
+                freq=freq,
+                start=0,
+                end=1000,
+                norm=norm,
+                npoints=2000,
+                sample_rate=100,
+                width=200,
+                height=100,
+                format=format,
+            )
+            raw = zstd.ZstdDecompressor().decompress(
+                StreamEncoder().encode_spectrogram(packet)
+            )
+            self.assertEqual(SPECTROGRAM_HEADER.unpack_from(raw)[0], 0)
+            return raw[SPECTROGRAM_HEADER.size :]
+
+        tmax = 1999 / 100
+        self.assertEqual(
+            encode(SpectrogramFormat.PNG),
+            generate_image(specgram, time_axis, freq, norm, 0, tmax),
+        )
+        self.assertEqual(
+            encode(SpectrogramFormat.RASTER),
+            render_image(
+                specgram, time_axis, freq, norm, 0, tmax, width=200, height=100
+            ),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,89 @@
+import struct
+import unittest
+
+import zstandard as zstd
+from django.core.cache.backends.locmem import LocMemCache
+
+from waveview.signal.encoder import StreamData, StreamEncoder
+from waveview.signal.fetcher import BaseStreamFetcher, FetcherRequestData
+from waveview.signal.tile import TileAdapter, TileRequestData
+
+
+class CountingFetcher(BaseStreamFetcher):
+    def __init__(self) -> None:
+        self.calls: list[FetcherRequestData] = []
+
+    def fetch(self, payload: FetcherRequestData) -> bytes:
+        self.calls.append(payload)
+        return StreamEncoder().encode_stream(
+            StreamData(
+                request_id=payload.request_id,
+                channel_id=payload.channel_id,
+                command="stream.fetch",
+                start=int(payload.start),
+                end=int(payload.end),
+                trace=None,
+            )
+        )
+
+
+def decode_header(data: bytes) -> tuple[str, int, int]:
+    binary = zstd.ZstdDecompressor().decompress(data)
+    request_id = binary[4:68].rstrip(b"\0").decode("utf-8")
+    start, end = struct.unpack("<qq", binary[196:212])
+    return request_id, start, end
+
+
+class TileTest(unittest.TestCase):
+    def raw(self, request_id: str, index: int, **options: object) -> dict:
+        return {
+            "requestId": request_id,
+            "channelId": "channel",
+            "tileCommand": "stream.fetch",
+            "tileSize": 60,
+            "tileIndex": index,
+            **options,
+        }
+
+    def test_tile_shared_cache(self) -> None:
+        fetcher = CountingFetcher()
+        adapter = TileAdapter(
+            cache=LocMemCache("tiles", {}), fetcher=fetcher, filter_adapter=None
+        )
+
+        first = adapter.tile(TileRequestData.from_raw_data(self.raw("a", 10)))
+        second = adapter.tile(TileRequestData.from_raw_data(self.raw("b", 10)))
+        self.assertEqual(len(fetcher.calls), 1)
+        self.assertEqual(fetcher.calls[0].start, 600_000)
+        self.assertEqual(fetcher.calls[0].end, 660_000)
+        self.assertEqual(decode_header(first), ("a", 600_000, 660_000))
+        self.assertEqual(decode_header(second), ("b", 600_000, 660_000))
+
+        adapter.tile(TileRequestData.from_raw_data(self.raw("c", 10, sampleRate=5)))
+        adapter.tile(TileRequestData.from_raw_data(self.raw("d", 11)))
+        self.assertEqual(len(fetcher.calls), 3)
+
+    def test_tile_contended_lock(self) -> None:
+        cache = LocMemCache("contended-tiles", {})
+        fetcher = CountingFetcher()
+        adapter = TileAdapter(cache=cache, fetcher=fetcher, filter_adapter=None)
+        adapter.wait_timeout = 0.1
+
+        # Another worker holds the lock, so the tile is computed without it.
+        payload = TileRequestData.from_raw_data(self.raw("a", 10))
+        lock = f"{payload.get_cache_key()}:lock"
+        cache.add(lock, 1)
+        self.assertEqual(decode_header(adapter.tile(payload)), ("a", 600_000, 660_000))
+        self.assertEqual(len(fetcher.calls), 1)
+        self.assertEqual(cache.get(lock), 1)
+
+    def test_tile_timeout(self) -> None:
+        payload = TileRequestData.from_raw_data(self.raw("a", 10))
+        self.assertEqual(payload.get_timeout(now=660 + 3600), 86400)
+        self.assertEqual(payload.get_timeout(now=660), 5)
+
+    def test_invalid_tile_size(self) -> None:
+        raw = self.raw("a", 10)
+        raw["tileSize"] = 7
+        with self.assertRaises(ValueError):
+            TileRequestData.from_raw_data(raw)
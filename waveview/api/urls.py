@@ -14,6 +14,7 @@ from .v1.catchall import CatchallEndpoint
 from .v1.change_password import ChangePasswordEndpoint
 from .v1.channel_detail import ChannelDetailEndpoint
 from .v1.channel_index import ChannelIndexEndpoint
+from .v1.data_availability import DataAvailabilityEndpoint
 from .v1.demxyz import DEMXYZEndpoint
 from .v1.download_events import DownloadEventsEndpoint
 from .v1.event_attachment_detail import EventAttachmentDetailEndpoint
@@ -169,6 +170,11 @@ INVENTORY_URLS = [
         InventoryEndpoint.as_view(),
         name="waveview-api-1-inventory-detail",
     ),
+    path(
+        "availability/",
+        DataAvailabilityEndpoint.as_view(),
+        name="waveview-api-1-inventory-availability",
+    ),
     path(
         "networks/",
         NetworkIndexEndpoint.as_view(),
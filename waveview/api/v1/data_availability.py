@@ -0,0 +1,116 @@
+from uuid import UUID
+
+from django.utils.translation import gettext_lazy as _
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import serializers, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from waveview.api.base import Endpoint
+from waveview.api.permissions import IsOrganizationMember
+from waveview.api.serializers import CommaSeparatedListField
+from waveview.inventory.availability import find_gaps, merge_segments
+from waveview.inventory.models import Channel, DataAvailability
+from waveview.utils.uuid import is_valid_uuid
+
+
+class QueryParamsSerializer(serializers.Serializer):
+    start = serializers.DateTimeField(
+        required=True, help_text=_("Start time of the query in ISO 8601 format.")
+    )
+    end = serializers.DateTimeField(
+        required=True, help_text=_("End time of the query in ISO 8601 format.")
+    )
+    channel_ids = CommaSeparatedListField(
+        required=False,
+        help_text=_(
+            "Channel IDs in comma separated list. Defaults to all channels of "
+            "the organization."
+        ),
+    )
+
+    def validate_channel_ids(self, value: list[str]) -> list[str]:
+        for channel_id in value:
+            if not is_valid_uuid(channel_id):
+                raise serializers.ValidationError(_("Invalid channel ID format."))
+        return value
+
+
+class TimeRangeSerializer(serializers.Serializer):
+    start = serializers.DateTimeField(help_text=_("Start time of the range."))
+    end = serializers.DateTimeField(help_text=_("End time of the range."))
+
+
+class ChannelAvailabilitySerializer(serializers.Serializer):
+    channel_id = serializers.UUIDField(help_text=_("Channel ID."))
+    stream_id = serializers.CharField(help_text=_("Stream ID."))
+    coverage = serializers.FloatField(
+        help_text=_("Fraction of the time range covered by data.")
+    )
+    segments = TimeRangeSerializer(many=True, help_text=_("Ranges with data."))
+    gaps = TimeRangeSerializer(many=True, help_text=_("Ranges without data."))
+
+
+class DataAvailabilityEndpoint(Endpoint):
+    permission_classes = [IsAuthenticated, IsOrganizationMember]
+
+    @swagger_auto_schema(
+        operation_id="Get Data Availability",
+        operation_description=("""
+            Get data segments and gaps of channels in the given time range.
+            """),
+        tags=["Inventory"],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                "OK", ChannelAvailabilitySerializer(many=True)
+            ),
+        },
+        query_serializer=QueryParamsSerializer,
+    )
+    def get(self, request: Request, organization_id: UUID) -> Response:
+        organization = self.get_organization(organization_id)
+        self.check_object_permissions(request, organization)
+
+        params = QueryParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start = params.validated_data["start"]
+        end = params.validated_data["end"]
+        channel_ids = params.validated_data.get("channel_ids")
+
+        channels = Channel.objects.select_related("station__network").filter(
+            station__network__inventory__organization=organization
+        )
+        if channel_ids:
+            channels = channels.filter(id__in=channel_ids)
+        channels = list(channels)
+
+        segments: dict[UUID, list] = {channel.id: [] for channel in channels}
+        queryset = DataAvailability.objects.filter(
+            channel_id__in=segments.keys(), start__lte=end, end__gte=start
+        ).values_list("channel_id", "start", "end", "sample_rate")
+        for channel_id, seg_start, seg_end, sample_rate in queryset:
+            segments[channel_id].append(
+                (max(seg_start, start), min(seg_end, end), sample_rate)
+            )
+
+        duration = max((end - start).total_seconds(), 1e-9)
+        result = []
+        for channel in channels:
+            merged = merge_segments(segments[channel.id], by_sample_rate=False)
+            covered = sum((e - s).total_seconds() for s, e, __ in merged)
+            result.append(
+                {
+                    "channel_id": channel.id,
+                    "stream_id": channel.stream_id,
+                    "coverage": min(covered / duration, 1.0),
+                    "segments": [{"start": s, "end": e} for s, e, __ in merged],
+                    "gaps": [
+                        {"start": s, "end": e} for s, e in find_gaps(merged, start, end)
+                    ],
+                }
+            )
+
+        serializer = ChannelAvailabilitySerializer(result, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
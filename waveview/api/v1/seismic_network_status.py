@@ -15,7 +15,7 @@ from rest_framework.response import Response
 from waveview.api.base import Endpoint
 from waveview.api.permissions import IsOrganizationMember
 from waveview.inventory.db.schema import TimescaleSchemaEditor
-from waveview.inventory.models import Channel
+from waveview.inventory.models import Channel, ChannelLatestPacket
 
 
 class StateType(models.TextChoices):
@@ -110,18 +110,32 @@ class SeismicNetworkStatusEndpoint(Endpoint):
         normal_channels: list[ChannelInfo] = []
         at_risk_channels: list[ChannelInfo] = []
 
-        for channel in Channel.objects.filter(
-            station__network__inventory__organization=organization
-        ):
+        channels = list(
+            Channel.objects.select_related("station__network").filter(
+                station__network__inventory__organization=organization
+            )
+        )
+        packets = {
+            packet.channel_id: packet.st
+            for packet in ChannelLatestPacket.objects.filter(channel__in=channels)
+        }
+
+        for channel in channels:
             stream_id = channel.stream_id
-            data = db.fetch_latest_data(channel.get_datastream_id())
-            if data is None:
+            st = packets.get(channel.id)
+            if st is None:
+                # Channels ingested before latest packets were recorded.
+                packet = db.fetch_latest_packet(channel.get_datastream_id())
+                if packet is not None:
+                    st = packet[0]
+                    ChannelLatestPacket.objects.update_packet(channel.id, *packet)
+
+            if st is None:
                 at_risk_channels.append(
                     ChannelInfo(stream_id=stream_id, last_packet=None)
                 )
                 continue
 
-            st = data[0]
             if st >= one_minute_ago:
                 normal_channels.append(ChannelInfo(stream_id=stream_id, last_packet=st))
             else:
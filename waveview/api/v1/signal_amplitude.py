@@ -1,4 +1,3 @@
-import concurrent.futures
 from uuid import UUID
 
 from django.utils.translation import gettext_lazy as _
@@ -13,7 +12,7 @@ from rest_framework.response import Response
 from waveview.api.base import Endpoint
 from waveview.api.permissions import IsOrganizationMember
 from waveview.appconfig.models import PickerConfig
-from waveview.appconfig.models.picker import ChannelConfigData, PickerConfigData
+from waveview.appconfig.models.picker import PickerConfigData
 from waveview.event.amplitude import SignalAmplitude, amplitude_registry
 from waveview.event.header import AmplitudeCategory, AmplitudeUnit
 
@@ -90,19 +89,23 @@ class SignalAmplitudeEndpoint(Endpoint):
         if calculator is None:
             raise NotFound(_("Amplitude calculator not found."))
 
-        amplitudes: list[SignalAmplitude] = []
+        channels = {
+            str(channel.channel_id): channel
+            for channel in data.amplitude_config.channels
+        }
+        # Fetch the waveforms of all configured channels at once instead of
+        # querying each channel table from its own thread and connection.
+        results = calculator.calc_many(
+            time,
+            duration,
+            list(channels),
+            organization_id,
+            use_outlier_filter=use_outlier_filter,
+        )
 
-        def calculate_amplitude(channel: ChannelConfigData) -> SignalAmplitude:
-            """
-            Calculate the amplitude of the event for a single channel.
-            """
-            ampl = calculator.calc(
-                time,
-                duration,
-                channel.channel_id,
-                organization_id,
-                use_outlier_filter=use_outlier_filter,
-            )
+        amplitudes: list[SignalAmplitude] = []
+        for ampl in results:
+            channel = channels[str(ampl.channel_id)]
             if channel.is_analog:
                 slope = channel.slope or 1
                 offset = channel.offset or 0
@@ -110,7 +113,7 @@ class SignalAmplitudeEndpoint(Endpoint):
                     value = ampl.amplitude * slope + offset
                 else:
                     value = None
-                return SignalAmplitude(
+                ampl = SignalAmplitude(
                     time=time,
                     duration=duration,
                     amplitude=value,
@@ -121,16 +124,7 @@ class SignalAmplitudeEndpoint(Endpoint):
                     channel_id=channel.channel_id,
                     label=channel.label,
                 )
-            return ampl
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = [
-                executor.submit(calculate_amplitude, channel)
-                for channel in data.amplitude_config.channels
-            ]
-            for future in concurrent.futures.as_completed(futures):
-                ampl = future.result()
-                amplitudes.append(ampl)
+            amplitudes.append(ampl)
 
         return Response(
             SignalAmplitudeSerializer(
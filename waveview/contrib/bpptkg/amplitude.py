@@ -29,15 +29,12 @@ class BPPTKGAmplitudeCalculator(AmplitudeCalculator):
             return None
         return amplitude
 
-    def calc(
-        self,
-        time: datetime,
-        duration: float,
-        channel_id: str,
-        organization_id: str,
-        use_outlier_filter: bool = False,
-    ) -> SignalAmplitude:
-        inventory = Inventory.objects.get(organization_id=organization_id)
+    def get_time_window(
+        self, time: datetime, duration: float, use_outlier_filter: bool = False
+    ) -> tuple[datetime, datetime, float]:
+        """
+        Get the waveform time window and the leading buffer in seconds.
+        """
         if use_outlier_filter:
             buffer = 5  # Buffer in seconds.
             starttime = time - timedelta(seconds=buffer)
@@ -46,22 +43,32 @@ class BPPTKGAmplitudeCalculator(AmplitudeCalculator):
             buffer = 0
             starttime = time
             endtime = time + timedelta(seconds=duration)
+        return starttime, endtime, buffer
 
-        def remove_response(st: Stream) -> Stream:
-            return remove_instrument_response(inventory, st)
+    def calc_stream(
+        self,
+        time: datetime,
+        duration: float,
+        channel: Channel,
+        inventory: Inventory,
+        stream: Stream,
+        use_outlier_filter: bool = False,
+    ) -> SignalAmplitude:
+        """
+        Calculate the amplitude of an already fetched waveform stream.
+        """
+        __, __, buffer = self.get_time_window(time, duration, use_outlier_filter)
 
         try:
-            channel = Channel.objects.get(id=channel_id)
-            stream = self.datastream.get_waveform(channel.id, starttime, endtime)
             if len(stream) > 0:
-                stream = remove_response(stream)
+                stream = remove_instrument_response(inventory, stream)
                 data = stream[0].data
                 if use_outlier_filter:
                     data = remove_outliers(data)
                 amax = self.get_amax(data)
             else:
                 logger.warning(
-                    f"No data found for channel {channel_id} in the specified time range."
+                    f"No data found for channel {channel.id} in the specified time range."
                 )
                 amax = None
         except Exception as e:
@@ -80,9 +87,76 @@ class BPPTKGAmplitudeCalculator(AmplitudeCalculator):
             method=self.method,
             category=AmplitudeCategory.DURATION,
             unit=AmplitudeUnit.UM.label,
-            channel_id=channel_id,
+            channel_id=channel.id,
             stream_id=channel.stream_id,
             label=channel.stream_id,
             begin=buffer,
             end=duration + buffer,
         )
+
+    def calc(
+        self,
+        time: datetime,
+        duration: float,
+        channel_id: str,
+        organization_id: str,
+        use_outlier_filter: bool = False,
+    ) -> SignalAmplitude:
+        inventory = Inventory.objects.get(organization_id=organization_id)
+        channel = Channel.objects.get(id=channel_id)
+        starttime, endtime, __ = self.get_time_window(
+            time, duration, use_outlier_filter
+        )
+
+        try:
+            stream = self.datastream.get_waveform(channel.id, starttime, endtime)
+        except Exception as e:
+            logger.error(f"Failed to fetch waveform: {e}")
+            stream = Stream()
+
+        return self.calc_stream(
+            time,
+            duration,
+            channel,
+            inventory,
+            stream,
+            use_outlier_filter=use_outlier_filter,
+        )
+
+    def calc_many(
+        self,
+        time: datetime,
+        duration: float,
+        channel_ids: list[str],
+        organization_id: str,
+        use_outlier_filter: bool = False,
+    ) -> list[SignalAmplitude]:
+        inventory = Inventory.objects.get(organization_id=organization_id)
+        starttime, endtime, __ = self.get_time_window(
+            time, duration, use_outlier_filter
+        )
+        channels = list(
+            Channel.objects.select_related("station__network").filter(
+                id__in=channel_ids
+            )
+        )
+
+        try:
+            streams = self.datastream.get_channel_waveforms(
+                channels, starttime, endtime
+            )
+        except Exception as e:
+            logger.error(f"Failed to fetch waveforms: {e}")
+            streams = {}
+
+        return [
+            self.calc_stream(
+                time,
+                duration,
+                channel,
+                inventory,
+                streams.get(str(channel.id), Stream()),
+                use_outlier_filter=use_outlier_filter,
+            )
+            for channel in channels
+        ]
@@ -130,20 +130,26 @@ class BPPTKGMagnitudeEstimator:
 
         amplitude_calculator = BPPTKGAmplitudeCalculator()
 
-        for channel in Channel.objects.filter(
-            station__network__inventory__organization_id=organization_id
-        ).all():
-            logger.info(
-                f"Processing channel {channel.stream_id} for event {event.id}..."
+        channels = {
+            str(channel.id): channel
+            for channel in Channel.objects.select_related("station__network").filter(
+                station__network__inventory__organization_id=organization_id
             )
+        }
+        # Fetch the waveforms of all channels at once instead of querying each
+        # channel table separately.
+        signal_amplitudes = amplitude_calculator.calc_many(
+            event.time,
+            event.duration,
+            list(channels),
+            organization_id,
+            use_outlier_filter=use_outlier_filter,
+        )
 
-            channel_id = channel.id
-            sa = amplitude_calculator.calc(
-                event.time,
-                event.duration,
-                channel_id,
-                organization_id,
-                use_outlier_filter=use_outlier_filter,
+        for sa in signal_amplitudes:
+            channel = channels[str(sa.channel_id)]
+            logger.info(
+                f"Processing channel {channel.stream_id} for event {event.id}..."
             )
 
             amax = sa.amplitude
@@ -40,6 +40,23 @@ class AmplitudeCalculator:
     ) -> SignalAmplitude:
         raise NotImplementedError
 
+    def calc_many(
+        self,
+        time: datetime,
+        duration: float,
+        channel_ids: list[str],
+        organization_id: str,
+        **options,
+    ) -> list[SignalAmplitude]:
+        """
+        Calculate amplitudes for several channels. Subclasses may override this
+        method to fetch the waveforms of all channels at once.
+        """
+        return [
+            self.calc(time, duration, channel_id, organization_id, **options)
+            for channel_id in channel_ids
+        ]
+
 
 class AmplitudeCalculatorRegistry:
     def __init__(self):
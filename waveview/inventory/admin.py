@@ -2,7 +2,10 @@ from django.contrib import admin
 
 from waveview.inventory.models import (
     Channel,
+    ColdStorageFile,
     DataSource,
+    DataStreamDictionary,
+    DataStreamPolicy,
     Inventory,
     InventoryFile,
     Network,
@@ -98,3 +101,43 @@ class DataSourceAdmin(admin.ModelAdmin):
         "created_at",
         "updated_at",
     )
+
+
+@admin.register(DataStreamDictionary)
+class DataStreamDictionaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "dict_id",
+        "channel",
+        "dtype",
+        "level",
+        "sample_count",
+        "is_active",
+        "created_at",
+        "updated_at",
+    )
+    exclude = ("data",)
+
+
+@admin.register(DataStreamPolicy)
+class DataStreamPolicyAdmin(admin.ModelAdmin):
+    list_display = (
+        "inventory",
+        "channel",
+        "compress_after",
+        "drop_after",
+        "created_at",
+        "updated_at",
+    )
+
+
+@admin.register(ColdStorageFile)
+class ColdStorageFileAdmin(admin.ModelAdmin):
+    list_display = (
+        "channel",
+        "date",
+        "path",
+        "row_count",
+        "size",
+        "updated_at",
+    )
+    list_filter = ("date",)
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+SegmentType = tuple[datetime, datetime, float]
+
+# Rows closer than this many sample intervals are considered contiguous.
+GAP_TOLERANCE = 1.5
+
+
+def get_tolerance(sample_rate: float) -> timedelta:
+    return timedelta(seconds=GAP_TOLERANCE / sample_rate)
+
+
+def merge_segments(
+    segments: list[SegmentType], by_sample_rate: bool = True
+) -> list[SegmentType]:
+    """
+    Merge overlapping or contiguous (start, end, sample_rate) segments.
+
+    Parameters
+    ----------
+    segments : list[SegmentType]
+        Segments in any order.
+    by_sample_rate : bool, optional
+        Only merge segments with the same sampling rate. Default is True.
+
+    Returns
+    -------
+    list[SegmentType]
+        Merged segments sorted by start time.
+    """
+    result: list[SegmentType] = []
+    for start, end, sample_rate in sorted(segments):
+        if result:
+            last_start, last_end, last_rate = result[-1]
+            same_rate = last_rate == sample_rate or not by_sample_rate
+            tolerance = get_tolerance(min(last_rate, sample_rate))
+            if same_rate and start <= last_end + tolerance:
+                result[-1] = (last_start, max(last_end, end), last_rate)
+                continue
+        result.append((start, end, sample_rate))
+    return result
+
+
+def find_gaps(
+    segments: list[SegmentType], start: datetime, end: datetime
+) -> list[tuple[datetime, datetime]]:
+    """
+    Find the time ranges within [start, end] not covered by the segments.
+    Segments must be merged and sorted, e.g. by :func:`merge_segments`.
+    """
+    gaps: list[tuple[datetime, datetime]] = []
+    cursor = start
+    for seg_start, seg_end, sample_rate in segments:
+        if seg_end < cursor:
+            continue
+        if seg_start > cursor + get_tolerance(sample_rate):
+            gaps.append((cursor, min(seg_start, end)))
+        cursor = max(cursor, seg_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
@@ -0,0 +1,256 @@
+import platform
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+import numpy as np
+import obspy
+import psycopg2
+from obspy import Stream, Trace, UTCDateTime
+from scipy.signal import lfilter
+
+from waveview.inventory import compression
+from waveview.inventory.datastream import (
+    DataStream,
+    WaveformBuffer,
+    decode_buffer,
+    decode_rows,
+)
+from waveview.signal.encoder import StreamData, StreamEncoder
+from waveview.signal.spectrogram import spectrogram
+
+STAGES = (
+    "query",
+    "decompress",
+    "merge",
+    "detrend",
+    "resample",
+    "filter",
+    "encode",
+    "compress",
+    "spectrogram",
+)
+
+DEFAULT_WINDOWS = (60, 600, 3600, 6 * 3600, 24 * 3600)
+
+
+def generate_stream(
+    channels: int,
+    starttime: UTCDateTime,
+    duration: float,
+    sample_rate: float = 100,
+    gaps: int = 2,
+    gap_length: float = 30,
+    seed: int = 0,
+) -> Stream:
+    """
+    Generate synthetic int32 waveforms resembling seismic records: coloured
+    background noise with a few transient events. Each channel gets
+    ``gaps`` gaps of ``gap_length`` seconds at random positions.
+    """
+    rng = np.random.default_rng(seed)
+    npts = int(duration * sample_rate)
+    traces = []
+    for i in range(channels):
+        data = lfilter([1.0], [1.0, -0.95], rng.normal(0, 100, npts))
+        for __ in range(max(1, int(duration // 600))):
+            onset = rng.integers(0, max(1, npts - 1))
+            length = min(npts - onset, int(20 * sample_rate))
+            t = np.arange(length) / sample_rate
+            data[onset : onset + length] += (
+                rng.uniform(1e3, 1e4)
+                * np.exp(-t / 4)
+                * np.sin(2 * np.pi * rng.uniform(1, 10) * t)
+            )
+
+        trace = Trace(data=data.astype(np.int32))
+        trace.stats.network = "XX"
+        trace.stats.station = f"B{i:03d}"
+        trace.stats.channel = "HHZ"
+        trace.stats.sampling_rate = sample_rate
+        trace.stats.starttime = starttime
+
+        cuts = np.sort(rng.uniform(0, duration - gap_length, gaps))
+        pieces = []
+        t0 = starttime
+        for cut in cuts:
+            if starttime + cut > t0:
+                pieces.append(trace.slice(t0, starttime + cut))
+            t0 = starttime + cut + gap_length
+        pieces.append(trace.slice(t0, trace.stats.endtime))
+        traces.extend(piece for piece in pieces if piece.stats.npts > 0)
+    return Stream(traces=traces)
+
+
+@dataclass
+class BenchmarkResult:
+    window: int
+    channels: int
+    repeat: int
+    samples: int = 0
+    rows: int = 0
+    nbytes: int = 0
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class StageTimer:
+    """
+    Accumulate wall-clock time per stage.
+    """
+
+    def __init__(self) -> None:
+        self.elapsed: dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.elapsed[name] += time.perf_counter() - t0
+
+
+def get_environment() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "obspy": obspy.__version__,
+    }
+
+
+class DataStreamBenchmark:
+    """
+    Time the stages of the waveform read, filter, encode and spectrogram
+    paths on synthetic data loaded into temporary datastream tables.
+    """
+
+    def __init__(
+        self,
+        connection: psycopg2.extensions.connection,
+        channels: int = 3,
+        duration: float = 24 * 3600,
+        sample_rate: float = 100,
+        seed: int = 0,
+    ) -> None:
+        self.datastream = DataStream(connection)
+        self.channels = channels
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.seed = seed
+        self.starttime = UTCDateTime("2024-01-01T00:00:00")
+        self.tables: list[str] = []
+
+    def setup(self) -> None:
+        """
+        Create one temporary datastream table per channel and load the
+        synthetic data into it.
+        """
+        stream = generate_stream(
+            self.channels,
+            self.starttime,
+            self.duration,
+            sample_rate=self.sample_rate,
+            seed=self.seed,
+        )
+        for i in range(self.channels):
+            table = f"datastream_bench_{uuid.uuid4().hex}"
+            self.datastream.db.create_table(table)
+            self.tables.append(table)
+            station = f"B{i:03d}"
+            self.datastream.load_stream(
+                stream.select(station=station), table=table, bulk=True
+            )
+
+    def teardown(self) -> None:
+        for table in self.tables:
+            self.datastream.db.drop_table(table)
+        self.tables.clear()
+
+    def run(
+        self, windows: tuple[int, ...] = DEFAULT_WINDOWS, repeat: int = 3
+    ) -> list[BenchmarkResult]:
+        """
+        Run every stage for each window size. Timings are the mean seconds
+        per window read of a single channel.
+        """
+        results = []
+        for window in windows:
+            if window > self.duration:
+                continue
+            result = BenchmarkResult(
+                window=window, channels=len(self.tables), repeat=repeat
+            )
+            timer = StageTimer()
+            for i in range(repeat):
+                offset = (self.duration - window) * i / max(repeat, 1)
+                start = (self.starttime + offset).datetime.replace(tzinfo=timezone.utc)
+                end = start + timedelta(seconds=window)
+                for table in self.tables:
+                    self.run_once(timer, result, table, start, end)
+            n = repeat * max(len(self.tables), 1)
+            result.timings = {stage: timer.elapsed[stage] / n for stage in STAGES}
+            result.samples //= n
+            result.rows //= n
+            result.nbytes //= n
+            results.append(result)
+        return results
+
+    def run_once(
+        self,
+        timer: StageTimer,
+        result: BenchmarkResult,
+        table: str,
+        start: datetime,
+        end: datetime,
+    ) -> None:
+        with timer.stage("query"):
+            rows = self.datastream.db.query(table, start - timedelta(seconds=8), end)
+        with timer.stage("decompress"):
+            decoded = [
+                (st, et, sr, dtype, decode_buffer(buf, dtype))
+                for st, et, sr, dtype, buf in rows
+            ]
+        with timer.stage("merge"):
+            buffer: WaveformBuffer | None = decode_rows(decoded, start, end)
+        if buffer is None:
+            return
+        result.samples += buffer.npts
+        result.rows += len(rows)
+        result.nbytes += sum(len(row[4]) for row in rows)
+
+        with timer.stage("detrend"):
+            centered = buffer.demean()
+        st = Stream(traces=[centered.to_trace()]).split()
+        with timer.stage("resample"):
+            st.copy().resample(10)
+        with timer.stage("filter"):
+            st.taper(max_percentage=0.05)
+            st.filter("bandpass", freqmin=1, freqmax=10, corners=4, zerophase=True)
+        with timer.stage("encode"):
+            StreamEncoder().encode_stream(
+                StreamData(
+                    request_id="",
+                    channel_id="",
+                    command="stream.fetch",
+                    start=0,
+                    end=0,
+                    trace=None,
+                    buffer=centered,
+                )
+            )
+        with timer.stage("compress"):
+            compression.compress(np.ascontiguousarray(buffer.data))
+        with timer.stage("spectrogram"):
+            try:
+                spectrogram(buffer.data, buffer.sampling_rate, gaps=buffer.gaps)
+            except ValueError:
+                pass
@@ -0,0 +1,93 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Hashable
+
+import numpy as np
+from django.conf import settings
+
+
+class ChunkCache:
+    """
+    Process-wide LRU cache of decoded datastream chunks.
+
+    Entries are keyed by (table, chunk start) and store read-only numpy
+    arrays, so they can be shared by every caller in the process. Each entry
+    also records a version of the row it was decoded from, e.g. its end time
+    and size. A lookup with a different version is a miss, which catches rows
+    rewritten by other processes.
+    """
+
+    def __init__(self, max_bytes: int | None = None) -> None:
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[
+            tuple[str, datetime], tuple[Hashable, np.ndarray]
+        ] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_bytes(self) -> int:
+        if self._max_bytes is None:
+            return settings.DATASTREAM_CHUNK_CACHE_SIZE
+        return self._max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, table: str, st: datetime, version: Hashable) -> np.ndarray | None:
+        key = (table, st)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(
+        self, table: str, st: datetime, version: Hashable, samples: np.ndarray
+    ) -> None:
+        if samples.nbytes > self.max_bytes:
+            return
+        samples.flags.writeable = False
+        key = (table, st)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1].nbytes
+            self._entries[key] = (version, samples)
+            self.nbytes += samples.nbytes
+            while self.nbytes > self.max_bytes:
+                __, (__, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def invalidate(self, table: str, st: datetime) -> None:
+        with self._lock:
+            entry = self._entries.pop((table, st), None)
+            if entry is not None:
+                self.nbytes -= entry[1].nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+chunk_cache = ChunkCache()
@@ -0,0 +1,210 @@
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import psycopg2
+from django.conf import settings
+from django.db import transaction
+
+from waveview.inventory.datastream import from_nanoseconds, to_nanoseconds
+from waveview.inventory.db.schema import TimescaleSchemaEditor
+from waveview.inventory.models import Channel, ColdStorageFile
+
+logger = logging.getLogger(__name__)
+
+RowType = tuple[datetime, datetime, float, str, bytes]
+
+
+def write_rows(path: Path, rows: list[RowType]) -> int:
+    """
+    Write datastream rows to an npz file and return its size in bytes.
+
+    Row buffers are stored as is, i.e. still zstd-compressed, concatenated
+    into a single array with their offsets. The file is written to a
+    temporary path first, so readers never see a partial file.
+    """
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(row[4]) for row in rows])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp.npz")
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            st=np.array([to_nanoseconds(row[0]) for row in rows], dtype=np.int64),
+            et=np.array([to_nanoseconds(row[1]) for row in rows], dtype=np.int64),
+            sr=np.array([row[2] for row in rows], dtype=np.float64),
+            dtype=np.array([row[3] for row in rows], dtype=np.str_),
+            offsets=offsets,
+            buf=np.frombuffer(b"".join(bytes(row[4]) for row in rows), dtype=np.uint8),
+        )
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+def read_rows(
+    path: Path, start: datetime | None = None, end: datetime | None = None
+) -> list[RowType]:
+    """
+    Read datastream rows from an npz file, optionally only the rows whose
+    start time is in [start, end).
+    """
+    with np.load(path) as f:
+        st = f["st"]
+        mask = np.ones(len(st), dtype=bool)
+        if start is not None:
+            mask &= st >= to_nanoseconds(start)
+        if end is not None:
+            mask &= st < to_nanoseconds(end)
+        indices = np.flatnonzero(mask)
+        if len(indices) == 0:
+            return []
+        et = f["et"]
+        sr = f["sr"]
+        dtype = f["dtype"]
+        offsets = f["offsets"]
+        buf = f["buf"]
+        return [
+            (
+                from_nanoseconds(int(st[i])),
+                from_nanoseconds(int(et[i])),
+                float(sr[i]),
+                str(dtype[i]),
+                buf[offsets[i] : offsets[i + 1]].tobytes(),
+            )
+            for i in indices
+        ]
+
+
+class ColdStorage:
+    """
+    Tier aged datastream rows out of the hypertables into one file per
+    channel-day under COLD_STORAGE_DIR, recorded in the ColdStorageFile
+    catalog.
+    """
+
+    def __init__(
+        self, connection: psycopg2.extensions.connection, root: Path | None = None
+    ) -> None:
+        self.db = TimescaleSchemaEditor(connection)
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        if self._root is None:
+            return Path(settings.COLD_STORAGE_DIR)
+        return self._root
+
+    def get_path(self, channel: Channel, day: date) -> str:
+        return f"{channel.id.hex}/{day.year}/{day.isoformat()}.npz"
+
+    def export_day(self, channel: Channel, day: date) -> ColdStorageFile | None:
+        """
+        Export the rows of a channel starting on a UTC day to cold storage
+        and delete them from the hypertable. Rows of a day that was already
+        exported are merged into its file. Returns None if the day has no
+        rows.
+        """
+        table = channel.get_datastream_id()
+        start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+        end = start + timedelta(days=1)
+
+        with transaction.atomic(using=self.db.connection.alias):
+            rows = self.db.query_for_update(table, start, end)
+            if not rows:
+                return None
+
+            file = ColdStorageFile.objects.filter(channel=channel, date=day).first()
+            path = self.get_path(channel, day)
+            exported = rows
+            if file is not None:
+                hot = {row[0] for row in rows}
+                exported = sorted(
+                    [
+                        row
+                        for row in read_rows(self.root / file.path)
+                        if row[0] not in hot
+                    ]
+                    + rows,
+                    key=lambda row: row[0],
+                )
+
+            size = write_rows(self.root / path, exported)
+            if file is None:
+                file = ColdStorageFile(channel=channel, date=day)
+            file.path = path
+            file.start = exported[0][0]
+            file.end = max(row[1] for row in exported)
+            file.row_count = len(exported)
+            file.size = size
+            file.save()
+            self.db.delete_rows(table, [row[0] for row in rows])
+        return file
+
+    def export(self, channel: Channel, before: date) -> list[ColdStorageFile]:
+        """
+        Export every day of a channel before the given UTC day.
+        """
+        table = channel.get_datastream_id()
+        earliest = self.db.fetch_earliest_time(table)
+        if earliest is None:
+            return []
+
+        files = []
+        day = earliest.astimezone(timezone.utc).date()
+        while day < before:
+            file = self.export_day(channel, day)
+            if file is not None:
+                files.append(file)
+            day += timedelta(days=1)
+        return files
+
+    def get_rows(
+        self, channel_id: str, start: datetime, end: datetime
+    ) -> list[RowType]:
+        """
+        Get rows of a channel from cold storage whose start time is in
+        [start, end), sorted by start time.
+        """
+        return list(self.iter_rows(channel_id, start, end))
+
+    def iter_rows(
+        self, channel_id: str, start: datetime, end: datetime
+    ) -> Iterator[RowType]:
+        """
+        Iterate over rows of a channel from cold storage whose start time is
+        in [start, end), sorted by start time. Only one file is read at a
+        time.
+        """
+        for file in ColdStorageFile.objects.get_files(channel_id, start, end):
+            yield from self._read_file(file, start, end)
+
+    def get_rows_many(
+        self, channel_ids: list[str], start: datetime, end: datetime
+    ) -> dict[str, list[RowType]]:
+        """
+        Get rows of several channels from cold storage whose start time is in
+        [start, end), with a single catalog query. Returns a mapping of
+        channel ID string to its rows sorted by start time.
+        """
+        result: dict[str, list[RowType]] = defaultdict(list)
+        files = ColdStorageFile.objects.filter(
+            channel_id__in=channel_ids, start__lte=end, end__gte=start
+        ).order_by("channel_id", "start")
+        for file in files:
+            result[str(file.channel_id)].extend(self._read_file(file, start, end))
+        return result
+
+    def _read_file(
+        self, file: ColdStorageFile, start: datetime, end: datetime
+    ) -> list[RowType]:
+        try:
+            return read_rows(self.root / file.path, start, end)
+        except OSError as e:
+            logger.error(f"Failed to read cold storage file {file.path}: {e}")
+            return []
@@ -0,0 +1,185 @@
+import logging
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import psycopg2
+from django.conf import settings
+from django.db import transaction
+from obspy import Trace
+from obspy.core import Stats
+
+from waveview.inventory import compression
+from waveview.inventory.availability import get_tolerance
+from waveview.inventory.datastream import (
+    BufferType,
+    decode_rows,
+    get_row_lookback,
+    prepare_buffer,
+)
+from waveview.inventory.db.schema import TimescaleSchemaEditor
+from waveview.inventory.models import Channel
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompactStats:
+    blocks: int = 0
+    rows_before: int = 0
+    rows_after: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"Compacted {self.blocks:,} blocks from {self.rows_before:,} rows "
+            f"into {self.rows_after:,} rows."
+        )
+
+
+def group_runs(rows: list[tuple]) -> list[list[tuple]]:
+    """
+    Group rows sorted by start time into runs of contiguous data with the
+    same sampling rate and data type. Only the (st, et, sr, dtype) fields of
+    each row are used, so both full rows and row metadata are accepted.
+    """
+    runs: list[list[tuple]] = []
+    run_end = None
+    for row in rows:
+        if runs:
+            last = runs[-1][-1]
+            if (
+                row[2] == last[2]
+                and row[3] == last[3]
+                and row[0] <= run_end + get_tolerance(row[2])
+            ):
+                runs[-1].append(row)
+                run_end = max(run_end, row[1])
+                continue
+        runs.append([row])
+        run_end = row[1]
+    return runs
+
+
+def compact_rows(
+    rows: list[BufferType], dict_id: int | None = None
+) -> list[BufferType]:
+    """
+    Repack rows into one row per run of contiguous data. Overlapping samples
+    are taken from the later row, as when reading. Gaps are preserved.
+    """
+    result: list[BufferType] = []
+    for run in group_runs(rows):
+        start = run[0][0]
+        end = max(row[1] for row in run)
+        buffer = decode_rows(run, start, end)
+        if buffer is None:
+            continue
+        for lo, hi in buffer.segments():
+            stats = Stats()
+            stats.starttime = buffer.starttime + lo / buffer.sampling_rate
+            stats.sampling_rate = buffer.sampling_rate
+            stats.npts = hi - lo
+            trace = Trace(data=np.ascontiguousarray(buffer.data[lo:hi]), header=stats)
+            result.append(prepare_buffer(trace, dict_id=dict_id))
+    return result
+
+
+class DataStreamCompactor:
+    """
+    Repack small datastream rows, e.g. one per SeedLink packet, into large
+    contiguous blocks.
+
+    Rows are grouped into blocks of ``block_size`` seconds aligned to the
+    epoch by their start time. Each block is rewritten in a single
+    transaction, so readers see either the old rows or the new ones.
+    """
+
+    def __init__(self, connection: psycopg2.extensions.connection) -> None:
+        self.db = TimescaleSchemaEditor(connection)
+
+    def compact(
+        self,
+        channel: Channel,
+        start: datetime,
+        end: datetime,
+        block_size: int | None = None,
+    ) -> CompactStats:
+        """
+        Compact the blocks of a channel that lie entirely in [start, end).
+
+        Parameters
+        ----------
+        channel : Channel
+            Channel object.
+        start : datetime
+            Start time in UTC.
+        end : datetime
+            End time in UTC. Data after it is left untouched, so it must be
+            old enough that no more packets arrive for it.
+        block_size : int, optional
+            Block size in seconds. Defaults to DATASTREAM_COMPACT_BLOCK_SIZE.
+            Readers only look back that far for rows overlapping a time
+            range, so larger blocks are rejected.
+
+        Returns
+        -------
+        CompactStats
+            Compaction statistics.
+        """
+        return self.compact_table(
+            channel.get_datastream_id(),
+            start,
+            end,
+            block_size=block_size,
+            channel_id=channel.id,
+        )
+
+    def compact_table(
+        self,
+        table: str,
+        start: datetime,
+        end: datetime,
+        block_size: int | None = None,
+        channel_id: str | None = None,
+    ) -> CompactStats:
+        """
+        Compact the blocks of a datastream table that lie entirely in
+        [start, end). If ``channel_id`` is given, blocks are compressed with
+        the active dictionary of the channel.
+        """
+        if block_size is None:
+            block_size = settings.DATASTREAM_COMPACT_BLOCK_SIZE
+        if block_size > get_row_lookback().total_seconds():
+            raise ValueError(
+                f"Block size {block_size} s is larger than "
+                f"DATASTREAM_COMPACT_BLOCK_SIZE, so readers would miss its rows."
+            )
+        stats = CompactStats()
+
+        first = math.ceil(start.timestamp() / block_size) * block_size
+        last = math.floor(end.timestamp() / block_size) * block_size
+        for bs in range(first, last, block_size):
+            ws = datetime.fromtimestamp(bs, timezone.utc)
+            we = ws + timedelta(seconds=block_size)
+
+            # Skip blocks that are already compact without locking them.
+            meta = self.db.query_meta(table, ws, we)
+            if len(group_runs(meta)) == len(meta):
+                continue
+
+            with transaction.atomic(using=self.db.connection.alias):
+                rows = self.db.query_for_update(table, ws, we)
+                if not rows:
+                    continue
+                dict_id = None
+                if channel_id is not None:
+                    dict_id = compression.registry.get_active(channel_id, rows[0][3])
+                compacted = compact_rows(rows, dict_id=dict_id)
+                self.db.delete_rows(table, [row[0] for row in rows])
+                self.db.insert_many(table, compacted, method="values")
+
+            stats.blocks += 1
+            stats.rows_before += len(rows)
+            stats.rows_after += len(compacted)
+        return stats
@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+
+import zstandard as zstd
+from django.conf import settings
+
+from waveview.inventory.models import DataStreamDictionary
+
+logger = logging.getLogger(__name__)
+
+# Refresh interval in seconds of the active dictionary lookup, so long-running
+# ingest processes pick up newly trained dictionaries.
+ACTIVE_DICTIONARY_TTL = 60
+
+_local = threading.local()
+
+
+class DictionaryRegistry:
+    """
+    Process-wide cache of trained zstd dictionaries.
+
+    Dictionaries are immutable once stored, so they are loaded from the
+    database only once per process.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._dictionaries: dict[int, zstd.ZstdCompressionDict] = {}
+        self._active: dict[tuple[str, str], tuple[int | None, float]] = {}
+
+    def get(self, dict_id: int) -> zstd.ZstdCompressionDict:
+        with self._lock:
+            dictionary = self._dictionaries.get(dict_id)
+        if dictionary is not None:
+            return dictionary
+
+        try:
+            instance = DataStreamDictionary.objects.get(dict_id=dict_id)
+        except DataStreamDictionary.DoesNotExist:
+            raise ValueError(f"Dictionary {dict_id} does not exist")
+        dictionary = zstd.ZstdCompressionDict(bytes(instance.data))
+        with self._lock:
+            self._dictionaries[dict_id] = dictionary
+        return dictionary
+
+    def preload(self, dictionaries: dict[int, bytes]) -> None:
+        """
+        Add dictionaries by ID without reading them from the database, e.g.
+        in worker processes.
+        """
+        with self._lock:
+            for dict_id, data in dictionaries.items():
+                self._dictionaries[dict_id] = zstd.ZstdCompressionDict(data)
+
+    def get_active(self, channel_id: str | None, dtype: str) -> int | None:
+        """
+        Get the ID of the active dictionary for a channel and data type. A
+        dictionary trained for the channel takes precedence over a dictionary
+        shared by all channels of the same data type.
+        """
+        key = (str(channel_id), dtype)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._active.get(key)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        queryset = DataStreamDictionary.objects.filter(dtype=dtype, is_active=True)
+        instance = None
+        if channel_id is not None:
+            instance = (
+                queryset.filter(channel_id=channel_id).order_by("-created_at").first()
+            )
+        if instance is None:
+            instance = (
+                queryset.filter(channel__isnull=True).order_by("-created_at").first()
+            )
+        dict_id = instance.dict_id if instance is not None else None
+        with self._lock:
+            self._active[key] = (dict_id, now + ACTIVE_DICTIONARY_TTL)
+        return dict_id
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dictionaries.clear()
+            self._active.clear()
+
+
+registry = DictionaryRegistry()
+
+
+def preload_dictionaries(dictionaries: dict[int, bytes]) -> None:
+    registry.preload(dictionaries)
+
+
+def get_compression_level() -> int:
+    return settings.DATASTREAM_COMPRESSION_LEVEL
+
+
+def get_compressor(
+    dict_id: int | None = None, level: int | None = None
+) -> zstd.ZstdCompressor:
+    """
+    Get a compression context of the current thread. Contexts are reused
+    across calls as creating them has a measurable cost for small chunks.
+    """
+    if level is None:
+        level = get_compression_level()
+    compressors = getattr(_local, "compressors", None)
+    if compressors is None:
+        compressors = _local.compressors = {}
+    key = (dict_id, level)
+    compressor = compressors.get(key)
+    if compressor is None:
+        if dict_id:
+            compressor = zstd.ZstdCompressor(
+                level=level, dict_data=registry.get(dict_id)
+            )
+        else:
+            compressor = zstd.ZstdCompressor(level=level)
+        compressors[key] = compressor
+    return compressor
+
+
+def get_decompressor(dict_id: int = 0) -> zstd.ZstdDecompressor:
+    """
+    Get a decompression context of the current thread.
+    """
+    decompressors = getattr(_local, "decompressors", None)
+    if decompressors is None:
+        decompressors = _local.decompressors = {}
+    decompressor = decompressors.get(dict_id)
+    if decompressor is None:
+        if dict_id:
+            decompressor = zstd.ZstdDecompressor(dict_data=registry.get(dict_id))
+        else:
+            decompressor = zstd.ZstdDecompressor()
+        decompressors[dict_id] = decompressor
+    return decompressor
+
+
+def compress(
+    data: bytes, dict_id: int | None = None, level: int | None = None
+) -> bytes:
+    return get_compressor(dict_id, level).compress(data)
+
+
+def decompress(buf: bytes) -> bytes:
+    """
+    Decompress a zstd frame, using the dictionary recorded in its header.
+    """
+    dict_id = zstd.get_frame_parameters(buf).dict_id
+    return get_decompressor(dict_id).decompress(buf)
+
+
+def get_dict_id(buf: bytes) -> int:
+    """
+    Get the dictionary ID recorded in the header of a zstd frame, or 0 if the
+    frame is compressed without a dictionary.
+    """
+    return zstd.get_frame_parameters(buf).dict_id
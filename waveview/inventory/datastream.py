@@ -1,26 +1,68 @@
+import functools
+import heapq
+import itertools
 import logging
+import math
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Iterator
 from uuid import UUID
 
 import numpy as np
 import psycopg2
-import zstandard as zstd
+from django.conf import settings
+from django.db import ProgrammingError
 from django.utils import timezone
 from obspy import Stream, Trace, UTCDateTime
 from obspy.core import Stats
 
+from waveview.inventory import compression
+from waveview.inventory.availability import SegmentType, merge_segments
+from waveview.inventory.chunkcache import chunk_cache
 from waveview.inventory.db.schema import TimescaleSchemaEditor
-from waveview.inventory.models import Channel
+from waveview.inventory.models import (
+    Channel,
+    ChannelLatestPacket,
+    DataAvailability,
+    DataStreamPolicy,
+)
+from waveview.inventory.overview import OverviewLevel, compute_overview
+
+if TYPE_CHECKING:
+    from waveview.inventory.coldstorage import ColdStorage
 
 logger = logging.getLogger(__name__)
 
 UUIDType = UUID | str
 BufferType = tuple[datetime, datetime, float, str, bytes]
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Margin in seconds read around a time range, so rows of ingested packets that
+# start before the range but still overlap it are included.
+ROW_MARGIN = 8
+
 
-def prepare_buffer(trace: Trace) -> BufferType:
+def get_row_lookback() -> timedelta:
+    """
+    Get how far before a time range rows are read. Rows are queried by their
+    start time, so the lookback must cover the longest row: a few seconds for
+    ingested packets and up to DATASTREAM_COMPACT_BLOCK_SIZE seconds for rows
+    repacked by the compactor.
+    """
+    return timedelta(seconds=max(ROW_MARGIN, settings.DATASTREAM_COMPACT_BLOCK_SIZE))
+
+
+def prepare_buffer(trace: Trace, dict_id: int | None = None) -> BufferType:
     """
     Prepare trace data for insertion into the database.
+
+    If ``dict_id`` is given, the data is compressed with that trained
+    dictionary. The dictionary ID is recorded in the zstd frame header.
     """
     starttime: UTCDateTime = trace.stats.starttime
     endtime: UTCDateTime = trace.stats.endtime
@@ -28,18 +70,69 @@ def prepare_buffer(trace: Trace) -> BufferType:
     dtype = str(trace.data.dtype)
     st = starttime.datetime.replace(tzinfo=timezone.utc)
     et = endtime.datetime.replace(tzinfo=timezone.utc)
-    compressor = zstd.ZstdCompressor()
-    buf = compressor.compress(trace.data.tobytes())
+    buf = compression.compress(np.ascontiguousarray(trace.data), dict_id=dict_id)
     return st, et, sample_rate, dtype, buf
 
 
+def iter_chunks(trace: Trace, chunksize: float) -> Iterator[Trace]:
+    """
+    Split a trace into consecutive chunks of ``chunksize`` seconds.
+    """
+    starttime = trace.stats.starttime
+    endtime = trace.stats.endtime
+    while starttime < endtime:
+        chunk_end = min(starttime + chunksize, endtime)
+        yield trace.slice(starttime, chunk_end)
+        starttime = chunk_end
+
+
+@dataclass
+class LoadStats:
+    """
+    Statistics of a stream load into the database.
+    """
+
+    chunks: int = 0
+    nbytes: int = 0
+    compressed: int = 0
+    elapsed: float = 0.0
+
+    def add(self, chunk: Trace, row: BufferType) -> None:
+        self.chunks += 1
+        self.nbytes += chunk.data.nbytes
+        self.compressed += len(row[4])
+
+    @property
+    def compression_ratio(self) -> float:
+        return (self.compressed / self.nbytes) * 100 if self.nbytes else 0.0
+
+    def __str__(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        return (
+            f"Data loaded: {self.nbytes:,} bytes, compressed: {self.compressed:,} "
+            f"bytes ({self.compression_ratio:.2f}%). "
+            f"{self.chunks:,} chunks in {self.elapsed:.2f} s "
+            f"({self.chunks / elapsed:,.1f} chunks/s, "
+            f"{self.nbytes / 1e6 / elapsed:,.2f} MB/s)."
+        )
+
+
+def decode_buffer(buf: bytes | np.ndarray, dtype: str) -> np.ndarray:
+    """
+    Decode a row buffer into samples. Buffers that are already decoded, e.g.
+    taken from the chunk cache, are returned as is.
+    """
+    if isinstance(buf, np.ndarray):
+        return buf
+    return np.frombuffer(compression.decompress(buf), dtype=dtype)
+
+
 def merge_buffer(rows: list[BufferType]) -> np.ndarray:
     """
     Merge buffer data into a single numpy array.
     """
-    decompressor = zstd.ZstdDecompressor()
     return np.frombuffer(
-        b"".join([decompressor.decompress(row[4]) for row in rows]), dtype=rows[0][3]
+        b"".join([compression.decompress(row[4]) for row in rows]), dtype=rows[0][3]
     )
 
 
@@ -50,8 +143,7 @@ def build_trace(
     Build an ObsPy Trace object from a row of buffer data.
     """
     st, et, sr, dtype, buf = row
-    decompressor = zstd.ZstdDecompressor()
-    data = np.frombuffer(decompressor.decompress(buf), dtype=dtype)
+    data = decode_buffer(buf, dtype)
     starttime = UTCDateTime(st)
 
     stats = Stats()
@@ -87,6 +179,188 @@ def build_traces(rows: BufferType, channel: Channel) -> Stream:
     return st
 
 
+def to_nanoseconds(dt: datetime) -> int:
+    """
+    Convert datetime to integer nanoseconds since epoch without going through
+    a float timestamp. Naive datetimes are assumed to be in UTC.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def from_nanoseconds(ns: int) -> datetime:
+    """
+    Convert integer nanoseconds since epoch to an aware UTC datetime.
+    """
+    return EPOCH + timedelta(microseconds=ns // 1000)
+
+
+@dataclass
+class WaveformBuffer:
+    """
+    Contiguous waveform samples of a single channel.
+
+    Samples are indexed by their offset from ``starttime``. Missing samples
+    are flagged in ``mask``, a bit-packed array (see ``numpy.packbits``) where
+    a set bit marks a gap.
+    """
+
+    starttime: UTCDateTime
+    sampling_rate: float
+    data: np.ndarray
+    mask: np.ndarray
+
+    @property
+    def npts(self) -> int:
+        return len(self.data)
+
+    @property
+    def endtime(self) -> UTCDateTime:
+        return self.starttime + (self.npts - 1) / self.sampling_rate
+
+    @property
+    def gaps(self) -> np.ndarray:
+        """
+        Unpacked boolean gap mask.
+        """
+        return np.unpackbits(self.mask, count=self.npts).astype(bool)
+
+    @property
+    def has_gaps(self) -> bool:
+        return bool(self.mask.any())
+
+    def segments(self) -> list[tuple[int, int]]:
+        """
+        Get (start, end) sample offsets of the contiguous runs of valid data.
+        """
+        valid = np.r_[False, ~self.gaps, False].astype(np.int8)
+        edges = np.flatnonzero(np.diff(valid))
+        return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+    def demean(self) -> "WaveformBuffer":
+        """
+        Remove the mean of each contiguous segment.
+        """
+        data = self.data.astype(np.float64)
+        for lo, hi in self.segments():
+            data[lo:hi] -= data[lo:hi].mean()
+        return WaveformBuffer(
+            starttime=self.starttime,
+            sampling_rate=self.sampling_rate,
+            data=data,
+            mask=self.mask,
+        )
+
+    def slice(self, start: datetime, end: datetime) -> "WaveformBuffer | None":
+        """
+        Get the samples in the range [start, end]. Returns None if there are
+        none.
+        """
+        delta = 1 / self.sampling_rate
+        lo = max(0, math.ceil((UTCDateTime(start) - self.starttime) / delta - 1e-6))
+        hi = min(
+            self.npts,
+            math.floor((UTCDateTime(end) - self.starttime) / delta + 1e-6) + 1,
+        )
+        if hi <= lo:
+            return None
+        return WaveformBuffer(
+            starttime=self.starttime + lo * delta,
+            sampling_rate=self.sampling_rate,
+            data=self.data[lo:hi],
+            mask=np.packbits(self.gaps[lo:hi]),
+        )
+
+    def to_trace(
+        self,
+        network: str = "",
+        station: str = "",
+        location: str = "",
+        channel: str = "",
+    ) -> Trace:
+        """
+        Convert buffer to an ObsPy Trace object. Gaps are masked.
+        """
+        stats = Stats()
+        stats.network = network
+        stats.station = station
+        stats.location = location
+        stats.channel = channel
+        stats.starttime = self.starttime
+        stats.sampling_rate = self.sampling_rate
+        stats.npts = self.npts
+        if self.has_gaps:
+            data = np.ma.masked_array(self.data, mask=self.gaps)
+        else:
+            data = self.data
+        return Trace(data=data, header=stats)
+
+
+def decode_rows(
+    rows: list[BufferType], start: datetime, end: datetime
+) -> WaveformBuffer | None:
+    """
+    Decompress rows straight into a single preallocated buffer covering the
+    range [start, end].
+
+    The sample grid is anchored at the first row. Rows with a different
+    sampling rate than the first row are skipped. Overlapping samples are
+    taken from the later row. Returns None if no samples fall in the range.
+    """
+    if len(rows) == 0:
+        return None
+
+    sample_rate = rows[0][2]
+    dtype = np.result_type(*{row[3] for row in rows if row[2] == sample_rate})
+    delta = 1e9 / sample_rate
+    anchor = to_nanoseconds(rows[0][0])
+    first = math.ceil((to_nanoseconds(start) - anchor) / delta)
+    t0 = anchor + round(first * delta)
+    npts = math.floor((to_nanoseconds(end) - t0) / delta) + 1
+    if npts <= 0:
+        return None
+
+    data = np.zeros(npts, dtype=dtype)
+    valid = np.zeros(npts, dtype=bool)
+    for st, et, sr, dt, buf in rows:
+        if sr != sample_rate:
+            logger.debug(f"Skipping chunk at {st} with sampling rate {sr}.")
+            continue
+        offset = round((to_nanoseconds(st) - t0) / delta)
+        samples = decode_buffer(buf, dt)
+        lo = max(0, -offset)
+        hi = min(len(samples), npts - offset)
+        if lo >= hi:
+            continue
+        data[offset + lo : offset + hi] = samples[lo:hi]
+        valid[offset + lo : offset + hi] = True
+
+    indices = np.flatnonzero(valid)
+    if len(indices) == 0:
+        return None
+    lo, hi = indices[0], indices[-1] + 1
+    return WaveformBuffer(
+        starttime=UTCDateTime(ns=t0 + round(lo * delta)),
+        sampling_rate=sample_rate,
+        data=data[lo:hi],
+        mask=np.packbits(~valid[lo:hi]),
+    )
+
+
+def merge_cold_rows(rows: list[BufferType], cold: list[BufferType]) -> list[BufferType]:
+    """
+    Merge rows read from cold storage into hypertable rows, ordered by start
+    time. Hot rows take precedence over cold rows with the same start time.
+    """
+    if not cold:
+        return rows
+    hot = {row[0] for row in rows}
+    rows = [row for row in cold if row[0] not in hot] + rows
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+
 class DataStream:
     """
     DataStream class is a wrapper around the TimescaleSchemaEditor class to
@@ -96,6 +370,102 @@ class DataStream:
     def __init__(self, connection: psycopg2.extensions.connection) -> None:
         self.db = TimescaleSchemaEditor(connection)
 
+    @functools.cached_property
+    def cold_storage(self) -> "ColdStorage":
+        from waveview.inventory.coldstorage import ColdStorage
+
+        return ColdStorage(self.db.connection)
+
+    @property
+    def cold_storage_enabled(self) -> bool:
+        """
+        Whether rows can be tiered out to cold storage files. Cold storage is
+        not looked up at all if it is disabled.
+        """
+        return settings.DATASTREAM_COLD_AFTER_DAYS is not None
+
+    def _query(self, table: str, start: datetime, end: datetime) -> list[BufferType]:
+        """
+        Query rows in the time range, with buffers decoded through the chunk
+        cache. Only buffers of rows missing from the cache are transferred
+        and decompressed.
+        """
+        if not chunk_cache.enabled:
+            return self.db.query(table, start, end)
+
+        meta = self.db.query_meta(table, start, end)
+        cached = {}
+        missing = []
+        for st, et, sr, dtype, size in meta:
+            samples = chunk_cache.get(table, st, (et, sr, dtype, size))
+            if samples is None:
+                missing.append(st)
+            else:
+                cached[st] = samples
+
+        buffers = self.db.query_buffers(table, missing)
+        rows = []
+        for st, et, sr, dtype, size in meta:
+            samples = cached.get(st)
+            if samples is None:
+                buf = buffers.get(st)
+                if buf is None:
+                    # Row deleted between the two queries.
+                    continue
+                samples = decode_buffer(buf, dtype)
+                chunk_cache.put(table, st, (et, sr, dtype, size), samples)
+            rows.append((st, et, sr, dtype, samples))
+        return rows
+
+    def _query_channel(
+        self, channel: Channel, start: datetime, end: datetime
+    ) -> list[BufferType]:
+        """
+        Query rows of a channel from both its hypertable and the cold storage
+        files. Hot rows take precedence over cold rows with the same start
+        time.
+        """
+        rows = self._query(channel.get_datastream_id(), start, end)
+        if not self.cold_storage_enabled:
+            return rows
+        cold = self.cold_storage.get_rows(channel.id, start, end)
+        return merge_cold_rows(rows, cold)
+
+    def _iter_query_channel(
+        self, channel: Channel, start: datetime, end: datetime, chunk_size: int
+    ) -> Iterator[list[BufferType]]:
+        """
+        Iterate over rows of a channel from both its hypertable and the cold
+        storage files in lists of at most ``chunk_size`` rows ordered by start
+        time. Cold storage files are read one at a time.
+        """
+        table = self.db.iter_query(
+            channel.get_datastream_id(), start, end, chunk_size=chunk_size
+        )
+        if not self.cold_storage_enabled:
+            yield from table
+            return
+
+        # Hot rows come first on ties, so they take precedence over cold rows
+        # with the same start time.
+        merged = heapq.merge(
+            itertools.chain.from_iterable(table),
+            self.cold_storage.iter_rows(channel.id, start, end),
+            key=lambda row: row[0],
+        )
+        chunk: list[BufferType] = []
+        last = None
+        for row in merged:
+            if row[0] == last:
+                continue
+            last = row[0]
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
     def get_waveform(
         self, channel_id: UUIDType, start: datetime, end: datetime
     ) -> Stream:
@@ -122,22 +492,428 @@ class DataStream:
         except Channel.DoesNotExist:
             raise ValueError(f"Channel {channel_id} does not exist")
 
-        # Add buffer in seconds to start and end time to ensure we get all the
-        # chunks of data within the range.
-        buffer = timedelta(seconds=8)
-        table = channel.get_datastream_id()
-        rows = self.db.query(table, start - buffer, end + buffer)
+        return self._get_waveform(channel, start, end)
+
+    def _get_waveform(self, channel: Channel, start: datetime, end: datetime) -> Stream:
+        # Read rows that start before the range but still overlap it.
+        lookback = get_row_lookback()
+        rows = self._query_channel(
+            channel, start - lookback, end + timedelta(seconds=ROW_MARGIN)
+        )
         st = build_traces(rows, channel)
         st.trim(starttime=UTCDateTime(start), endtime=UTCDateTime(end))
         return st
 
+    def get_buffer(
+        self, channel_id: UUIDType, start: datetime, end: datetime
+    ) -> WaveformBuffer | None:
+        """
+        Get waveform data for a given channel and time range as a single
+        contiguous buffer, without building intermediate ObsPy objects.
+
+        Parameters
+        ----------
+        channel_id : UUIDType
+            Channel ID.
+        start : datetime
+            Start time of the waveform data to retrieve in UTC.
+        end : datetime
+            End time of the waveform data to retrieve in UTC.
+
+        Returns
+        -------
+        WaveformBuffer | None
+            Waveform buffer, or None if there is no data in the range.
+        """
+        try:
+            channel = Channel.objects.get(id=channel_id)
+        except Channel.DoesNotExist:
+            raise ValueError(f"Channel {channel_id} does not exist")
+
+        lookback = get_row_lookback()
+        rows = self._query_channel(
+            channel, start - lookback, end + timedelta(seconds=ROW_MARGIN)
+        )
+        return decode_rows(rows, start, end)
+
+    def get_waveforms(
+        self, channel_ids: list[UUIDType], start: datetime, end: datetime
+    ) -> dict[str, Stream]:
+        """
+        Get waveform data for several channels and the same time range.
+
+        Channels are resolved with a single ORM query and all datastream
+        tables are read in a single database round trip.
+
+        Parameters
+        ----------
+        channel_ids : list[UUIDType]
+            List of channel IDs.
+        start : datetime
+            Start time of the waveform data to retrieve in UTC.
+        end : datetime
+            End time of the waveform data to retrieve in UTC.
+
+        Returns
+        -------
+        dict[str, Stream]
+            Mapping of channel ID string to ObsPy Stream object. Channels that
+            do not exist are omitted.
+        """
+        channels = list(
+            Channel.objects.select_related("station__network").filter(
+                id__in=channel_ids
+            )
+        )
+        if len(channels) < len(set(str(c) for c in channel_ids)):
+            logger.warning("Some channels do not exist and are skipped.")
+        return self.get_channel_waveforms(channels, start, end)
+
+    def get_channel_waveforms(
+        self, channels: list[Channel], start: datetime, end: datetime
+    ) -> dict[str, Stream]:
+        """
+        Get waveform data for several already resolved channels and the same
+        time range, with all datastream tables read in a single database
+        round trip. Channels should be fetched with their station and network,
+        e.g. with ``select_related("station__network")``.
+
+        Parameters
+        ----------
+        channels : list[Channel]
+            List of channel objects.
+        start : datetime
+            Start time of the waveform data to retrieve in UTC.
+        end : datetime
+            End time of the waveform data to retrieve in UTC.
+
+        Returns
+        -------
+        dict[str, Stream]
+            Mapping of channel ID string to ObsPy Stream object.
+        """
+        tables = {channel.get_datastream_id(): channel for channel in channels}
+        lookback = get_row_lookback()
+        margin = timedelta(seconds=ROW_MARGIN)
+        result = self.db.query_many(list(tables), start - lookback, end + margin)
+        if self.cold_storage_enabled:
+            cold = self.cold_storage.get_rows_many(
+                [channel.id for channel in channels],
+                start - lookback,
+                end + margin,
+            )
+            for table, channel in tables.items():
+                result[table] = merge_cold_rows(
+                    result[table], cold.get(str(channel.id), [])
+                )
+
+        streams: dict[str, Stream] = {}
+        for table, rows in result.items():
+            channel = tables[table]
+            st = build_traces(rows, channel)
+            st.trim(starttime=UTCDateTime(start), endtime=UTCDateTime(end))
+            streams[str(channel.id)] = st
+        return streams
+
+    def iter_waveform(
+        self,
+        channel_id: UUIDType,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 1000,
+    ) -> Iterator[Stream]:
+        """
+        Iterate over waveform data for a given channel and time range.
+
+        Rows are read through a server-side cursor and decoded incrementally,
+        so long time ranges can be processed in bounded memory.
+
+        Parameters
+        ----------
+        channel_id : UUIDType
+            Channel ID.
+        start : datetime
+            Start time of the waveform data to retrieve in UTC.
+        end : datetime
+            End time of the waveform data to retrieve in UTC.
+        chunk_size : int, optional
+            Number of rows to decode per yielded stream. Default is 1000.
+
+        Yields
+        ------
+        Stream
+            ObsPy Stream object containing the waveform data of one chunk of
+            rows, trimmed to the requested time range.
+        """
+
+        try:
+            channel = Channel.objects.get(id=channel_id)
+        except Channel.DoesNotExist:
+            raise ValueError(f"Channel {channel_id} does not exist")
+
+        lookback = get_row_lookback()
+        for rows in self._iter_query_channel(
+            channel,
+            start - lookback,
+            end + timedelta(seconds=ROW_MARGIN),
+            chunk_size,
+        ):
+            st = build_traces(rows, channel)
+            st.merge(method=-1)
+            st.trim(starttime=UTCDateTime(start), endtime=UTCDateTime(end))
+            if len(st) > 0:
+                yield st
+
+    def select_overview_level(
+        self, start: datetime, end: datetime, sample_rate: float
+    ) -> int | None:
+        """
+        Select the coarsest overview level whose bucket rate still satisfies
+        the requested sample rate. Returns None if the raw samples should be
+        used instead.
+        """
+        duration = (end - start).total_seconds()
+        if duration < settings.DATASTREAM_OVERVIEW_MIN_DURATION:
+            return None
+        levels = [
+            level
+            for level in settings.DATASTREAM_OVERVIEW_LEVELS
+            if 1 / level >= sample_rate
+        ]
+        if not levels:
+            return None
+        return max(levels)
+
+    def get_overview(
+        self,
+        channel_id: UUIDType,
+        start: datetime,
+        end: datetime,
+        level: int,
+        demean: bool = False,
+    ) -> Trace:
+        """
+        Get min/max envelope of a channel from its overview level.
+
+        Buckets that have not been built yet, e.g. at the live edge or for
+        packets that arrived late, are computed from the raw samples.
+
+        Parameters
+        ----------
+        channel_id : UUIDType
+            Channel ID.
+        start : datetime
+            Start time of the waveform data to retrieve in UTC.
+        end : datetime
+            End time of the waveform data to retrieve in UTC.
+        level : int
+            Overview bucket size in seconds.
+        demean : bool, optional
+            Remove the mean of the envelope. Default is False.
+
+        Returns
+        -------
+        Trace
+            ObsPy Trace object with the minimum and maximum of each bucket.
+        """
+        try:
+            channel = Channel.objects.get(id=channel_id)
+        except Channel.DoesNotExist:
+            raise ValueError(f"Channel {channel_id} does not exist")
+
+        table = channel.get_datastream_id()
+        first = math.floor(start.timestamp() / level)
+        last = math.ceil(end.timestamp() / level)
+        bucket_start = datetime.fromtimestamp(first * level, timezone.utc)
+        try:
+            rows = self.db.query_overview(table, level, bucket_start, end)
+        except ProgrammingError:
+            logger.warning(f"Overview table of {table} does not exist.")
+            rows = []
+        ov = OverviewLevel.from_rows(level, rows)
+
+        # The latest bucket may still be incomplete, so it is computed again
+        # along with any bucket missing in between.
+        if len(ov) > 0:
+            ov = ov.select(first, int(ov.index[-1]))
+        missing = np.setdiff1d(np.arange(first, last), ov.index)
+        runs = np.split(missing, np.flatnonzero(np.diff(missing) != 1) + 1)
+        for run in runs:
+            if len(run) == 0:
+                continue
+            lo, hi = int(run[0]), int(run[-1]) + 1
+            st = self._get_waveform(
+                channel,
+                datetime.fromtimestamp(lo * level, timezone.utc),
+                min(datetime.fromtimestamp(hi * level, timezone.utc), end),
+            )
+            ov = ov.concat(compute_overview(st, [level])[level].select(lo, hi))
+
+        return ov.to_trace(
+            first,
+            last,
+            network=channel.station.network.code,
+            station=channel.station.code,
+            location=channel.location_code,
+            channel=channel.code,
+            demean=demean,
+        )
+
+    def update_overview(
+        self,
+        channel: Channel,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        window: int = 3600,
+    ) -> int:
+        """
+        Build or refresh the overview levels of a channel.
+
+        Parameters
+        ----------
+        channel : Channel
+            Channel object.
+        start : datetime, optional
+            Start time in UTC. If not provided, continue from the latest
+            overview bucket, or from the earliest stored data if the overview
+            is empty. Default is None.
+        end : datetime, optional
+            End time in UTC. Default is now.
+        window : int, optional
+            Window size in seconds of raw data decoded at a time. Default is
+            3600 seconds.
+
+        Returns
+        -------
+        int
+            Number of overview buckets written.
+        """
+        levels = sorted(settings.DATASTREAM_OVERVIEW_LEVELS)
+        coarsest = levels[-1]
+        table = channel.get_datastream_id()
+        if not self.db.is_table_exists(self.db.get_overview_table(table)):
+            self.db.create_overview_table(table)
+
+        if start is None:
+            start = self.db.fetch_overview_watermark(table, coarsest)
+        if start is None:
+            start = self.db.fetch_earliest_time(table)
+        if start is None:
+            return 0
+        if end is None:
+            end = timezone.now()
+
+        first = math.floor(start.timestamp() / coarsest) * coarsest
+        last = math.ceil(end.timestamp())
+        step = max(window // coarsest, 1) * coarsest
+        count = 0
+        for ws in range(first, last, step):
+            we = min(ws + step, last)
+            st = self._get_waveform(
+                channel,
+                datetime.fromtimestamp(ws, timezone.utc),
+                datetime.fromtimestamp(we, timezone.utc),
+            )
+            for level, ov in compute_overview(st, levels).items():
+                ov = ov.select(ws // level, math.ceil(we / level))
+                self.db.upsert_overview(table, ov.to_rows())
+                count += len(ov)
+        return count
+
+    def refresh_overview(self, channel: Channel, segments: list[SegmentType]) -> int:
+        """
+        Recompute the overview buckets covering time ranges of written rows.
+        The periodic update only continues from the latest bucket, so rows
+        loaded behind it, e.g. by a backfill, need their buckets rebuilt.
+
+        Parameters
+        ----------
+        channel : Channel
+            Channel object.
+        segments : list[SegmentType]
+            List of (st, et, sr) of written rows.
+
+        Returns
+        -------
+        int
+            Number of overview buckets written.
+        """
+        coarsest = max(settings.DATASTREAM_OVERVIEW_LEVELS)
+        count = 0
+        for start, end, __ in merge_segments(segments, by_sample_rate=False):
+            # Whole buckets are rebuilt, so none is cut short at the end.
+            end = datetime.fromtimestamp(
+                math.ceil(end.timestamp() / coarsest) * coarsest, timezone.utc
+            )
+            count += self.update_overview(channel, start, end)
+        return count
+
+    def update_availability(
+        self, channel: Channel, segments: list[SegmentType]
+    ) -> None:
+        """
+        Add time ranges of inserted rows to the availability index of a
+        channel. Contiguous rows are merged first, so a long load costs one
+        update per continuous run of data.
+
+        Parameters
+        ----------
+        channel : Channel
+            Channel object.
+        segments : list[SegmentType]
+            List of (st, et, sr) of inserted rows.
+        """
+        for start, end, sample_rate in merge_segments(segments):
+            DataAvailability.objects.add_segment(channel.id, start, end, sample_rate)
+
+    def update_latest_packet(self, channel: Channel) -> None:
+        """
+        Record the latest row of a channel's datastream table as its latest
+        packet, e.g. after loading a stream or for channels ingested before
+        latest packets were recorded.
+
+        Parameters
+        ----------
+        channel : Channel
+            Channel object.
+        """
+        packet = self.db.fetch_latest_packet(channel.get_datastream_id())
+        if packet is not None:
+            ChannelLatestPacket.objects.update_packet(channel.id, *packet)
+
+    def apply_policy(self, channel: Channel) -> DataStreamPolicy:
+        """
+        Apply the effective compression and retention policy of a channel to
+        its datastream table.
+
+        Parameters
+        ----------
+        channel : Channel
+            Channel object.
+
+        Returns
+        -------
+        DataStreamPolicy
+            Policy applied to the table.
+        """
+        policy = DataStreamPolicy.objects.get_for_channel(channel)
+        table = channel.get_datastream_id()
+        self.db.set_compression_policy(table, policy.compress_after)
+        self.db.set_retention_policy(table, policy.drop_after)
+        return policy
+
     def load_stream(
         self,
         stream: Stream,
         chunksize: float = 2,
         table: str = None,
         print_stats: bool = False,
-    ) -> None:
+        bulk: bool = False,
+        batch_size: int = 1000,
+        workers: int | None = None,
+        method: str = "copy",
+        channel: Channel | None = None,
+    ) -> LoadStats:
         """
         Load a stream of data into the database.
 
@@ -152,42 +928,110 @@ class DataStream:
             will be fetched from the channel object. Default is None.
         print_stats : bool, optional
             Print data load statistics. Default is False.
+        bulk : bool, optional
+            Compress chunks in a process pool and write them in batches
+            instead of one statement per chunk. Default is False.
+        batch_size : int, optional
+            Number of chunks written per statement in bulk mode. Default is
+            1000.
+        workers : int, optional
+            Number of worker processes in bulk mode. Defaults to the number
+            of CPUs.
+        method : str, optional
+            Bulk write method, either ``copy`` or ``values``. Default is
+            ``copy``.
+        channel : Channel, optional
+            Channel to load all traces into regardless of their IDs. Takes
+            precedence over ``table``. Default is None.
+
+        Returns
+        -------
+        LoadStats
+            Data load statistics.
         """
-        nbytes: int = 0
-        compressed: int = 0
+        stats = LoadStats()
+        t0 = time.perf_counter()
 
+        targets: list[tuple[Trace, str, int | None]] = []
+        channels: dict[str, Channel] = {}
         for trace in stream:
             trace: Trace
-            stream_id = trace.id
-            if table is None:
+            instance = channel
+            if instance is None and table is None:
                 try:
-                    channel = Channel.objects.get_by_stream_id(stream_id)
+                    instance = Channel.objects.get_by_stream_id(trace.id)
                 except Channel.DoesNotExist:
-                    logger.warning(f"Channel {stream_id} not found. Skipping.")
+                    logger.warning(f"Channel {trace.id} not found. Skipping.")
                     continue
-                table = channel.get_datastream_id()
+            if instance is not None:
+                target = instance.get_datastream_id()
+                dict_id = compression.registry.get_active(
+                    instance.id, str(trace.data.dtype)
+                )
+                channels[target] = instance
+            else:
+                target = table
+                dict_id = None
+            targets.append((trace, target, dict_id))
 
-            starttime = trace.stats.starttime
-            endtime = trace.stats.endtime
-
-            while starttime < endtime:
-                chunk_start = starttime
-                chunk_end = starttime + chunksize
-                if chunk_end > endtime:
-                    chunk_end = endtime
-
-                chunk = trace.slice(chunk_start, chunk_end)
-                st, et, sr, dtype, buf = prepare_buffer(chunk)
-                self.db.insert(table, st, et, sr, dtype, buf)
-
-                nbytes += chunk.data.nbytes
-                compressed += len(buf)
+        segments: dict[str, list[SegmentType]] = defaultdict(list)
+        if bulk:
+            self._bulk_load(
+                targets, chunksize, batch_size, workers, method, stats, segments
+            )
+        else:
+            for trace, target, dict_id in targets:
+                for chunk in iter_chunks(trace, chunksize):
+                    row = prepare_buffer(chunk, dict_id=dict_id)
+                    self.db.insert(target, *row)
+                    stats.add(chunk, row)
+                    segments[target].append(row[:3])
 
-                starttime = chunk_end
+        for target, instance in channels.items():
+            self.update_availability(instance, segments[target])
+            self.update_latest_packet(instance)
+            self.refresh_overview(instance, segments[target])
 
+        stats.elapsed = time.perf_counter() - t0
         if print_stats:
-            logger.info(
-                f"Data loaded: {nbytes:,} bytes, compressed: {compressed:,} bytes."
-            )
-            compression_ratio = (compressed / nbytes) * 100
-            logger.info(f"Compression ratio: {compression_ratio:.2f}%")
+            logger.info(str(stats))
+        return stats
+
+    def _bulk_load(
+        self,
+        targets: list[tuple[Trace, str, int | None]],
+        chunksize: float,
+        batch_size: int,
+        workers: int | None,
+        method: str,
+        stats: LoadStats,
+        segments: dict[str, list[SegmentType]],
+    ) -> None:
+        # Workers get the dictionaries up front so they never touch the
+        # database connection inherited from this process.
+        dictionaries = {
+            dict_id: compression.registry.get(dict_id).as_bytes()
+            for __, __, dict_id in targets
+            if dict_id
+        }
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=compression.preload_dictionaries,
+            initargs=(dictionaries,),
+        ) as executor:
+            for trace, target, dict_id in targets:
+                chunks = iter_chunks(trace, chunksize)
+                while batch := list(itertools.islice(chunks, batch_size)):
+                    rows = list(
+                        executor.map(
+                            prepare_buffer,
+                            batch,
+                            itertools.repeat(dict_id),
+                            chunksize=max(1, len(batch) // (4 * workers)),
+                        )
+                    )
+                    self.db.insert_many(target, rows, method=method)
+                    for chunk, row in zip(batch, rows):
+                        stats.add(chunk, row)
+                        segments[target].append(row[:3])
@@ -1,8 +1,14 @@
-from datetime import datetime
+import csv
+import io
+from datetime import datetime, timedelta
+from typing import Iterator
 
 import psycopg2
-from django.db import ProgrammingError
+from django.db import ProgrammingError, transaction
 from django.db.backends.postgresql.schema import DatabaseSchemaEditor
+from psycopg2.extras import execute_values
+
+from waveview.inventory.chunkcache import chunk_cache
 
 
 class TimescaleSchemaEditor(DatabaseSchemaEditor):
@@ -19,16 +25,65 @@ class TimescaleSchemaEditor(DatabaseSchemaEditor):
         "SELECT create_hypertable('{table}', by_range('st', 86400000000))"
     )
     sql_drop_table = "DROP TABLE {table} CASCADE"
+    sql_drop_table_if_exists = "DROP TABLE IF EXISTS {table} CASCADE"
     sql_table_exists = "SELECT * FROM {table} LIMIT 1"
     sql_insert = "INSERT INTO {table} (st, et, sr, dtype, buf) VALUES (%s, %s, %s, %s, %s) ON CONFLICT (st) DO UPDATE SET et = EXCLUDED.et, sr = EXCLUDED.sr, dtype = EXCLUDED.dtype, buf = EXCLUDED.buf"
+    sql_insert_many = "INSERT INTO {table} (st, et, sr, dtype, buf) VALUES %s ON CONFLICT (st) DO UPDATE SET et = EXCLUDED.et, sr = EXCLUDED.sr, dtype = EXCLUDED.dtype, buf = EXCLUDED.buf"
+    sql_create_staging = (
+        "CREATE TEMP TABLE IF NOT EXISTS {staging} ("
+        "st TIMESTAMPTZ,"
+        "et TIMESTAMPTZ,"
+        "sr DOUBLE PRECISION,"
+        "dtype VARCHAR,"
+        "buf BYTEA"
+        ") ON COMMIT DELETE ROWS"
+    )
+    sql_clear_staging = "DELETE FROM {staging}"
+    sql_copy_staging = (
+        "COPY {staging} (st, et, sr, dtype, buf) FROM STDIN WITH (FORMAT csv)"
+    )
+    sql_upsert_from_staging = "INSERT INTO {table} (st, et, sr, dtype, buf) SELECT st, et, sr, dtype, buf FROM {staging} ON CONFLICT (st) DO UPDATE SET et = EXCLUDED.et, sr = EXCLUDED.sr, dtype = EXCLUDED.dtype, buf = EXCLUDED.buf"
     sql_is_table_exists = (
         "SELECT * FROM information_schema.tables WHERE table_name = '{table}'"
     )
-    sql_query_table = "SELECT st, et, sr, dtype, buf FROM {table} WHERE st >= '{start}' AND st < '{end}' ORDER BY st"
+    sql_update_buffer = "UPDATE {table} AS t SET buf = v.buf FROM (VALUES %s) AS v(st, buf) WHERE t.st = v.st"
+    sql_query_table = "SELECT st, et, sr, dtype, buf FROM {table} WHERE st >= %s AND st < %s ORDER BY st"
+    sql_query_table_for_update = "SELECT st, et, sr, dtype, buf FROM {table} WHERE st >= %s AND st < %s ORDER BY st FOR UPDATE"
+    sql_delete_rows = "DELETE FROM {table} WHERE st = ANY(%s)"
+    sql_query_table_meta = "SELECT st, et, sr, dtype, octet_length(buf) FROM {table} WHERE st >= %s AND st < %s ORDER BY st"
+    sql_query_table_buffers = "SELECT st, buf FROM {table} WHERE st = ANY(%s)"
+    sql_query_table_tagged = "SELECT %s::varchar AS tbl, st, et, sr, dtype, buf FROM {table} WHERE st >= %s AND st < %s"
+    sql_is_compression_enabled = "SELECT compression_enabled FROM timescaledb_information.hypertables WHERE hypertable_name = %s"
+    sql_enable_compression = "ALTER TABLE {table} SET (timescaledb.compress, timescaledb.compress_orderby = 'st', timescaledb.compress_segmentby = '')"
+    sql_add_compression_policy = "SELECT add_compression_policy('{table}', compress_after => %s, if_not_exists => true)"
+    sql_remove_compression_policy = (
+        "SELECT remove_compression_policy('{table}', if_exists => true)"
+    )
+    sql_compress_chunks = "SELECT count(compress_chunk(c, if_not_compressed => true)) FROM show_chunks('{table}', older_than => %s) c"
+    sql_add_retention_policy = "SELECT add_retention_policy('{table}', drop_after => %s, if_not_exists => true)"
+    sql_remove_retention_policy = (
+        "SELECT remove_retention_policy('{table}', if_exists => true)"
+    )
     sql_hypertable_size = "SELECT hypertable_size('{table}')"
     sql_get_latest_data = (
         "SELECT st, et, sr, dtype, buf FROM {table} ORDER BY st DESC LIMIT 1"
     )
+    sql_get_latest_packet = "SELECT st, et, sr FROM {table} ORDER BY st DESC LIMIT 1"
+    sql_get_earliest_time = "SELECT st FROM {table} ORDER BY st ASC LIMIT 1"
+    sql_create_overview = (
+        "CREATE TABLE {table} ("
+        "level INTEGER,"
+        "st TIMESTAMPTZ,"
+        "min DOUBLE PRECISION,"
+        "max DOUBLE PRECISION,"
+        "mean DOUBLE PRECISION,"
+        "count INTEGER,"
+        "UNIQUE (level, st)"
+        ")"
+    )
+    sql_upsert_overview = "INSERT INTO {table} (level, st, min, max, mean, count) VALUES %s ON CONFLICT (level, st) DO UPDATE SET min = EXCLUDED.min, max = EXCLUDED.max, mean = EXCLUDED.mean, count = EXCLUDED.count"
+    sql_query_overview = "SELECT st, min, max, mean, count FROM {table} WHERE level = %s AND st >= %s AND st < %s ORDER BY st"
+    sql_get_overview_watermark = "SELECT max(st) FROM {table} WHERE level = %s"
 
     def create_table(self, table: str) -> None:
         self.execute(self.sql_create_model.format(table=self.quote_name(table)))
@@ -39,6 +94,24 @@ class TimescaleSchemaEditor(DatabaseSchemaEditor):
     def drop_table(self, table: str) -> None:
         self.execute(self.sql_drop_table.format(table=self.quote_name(table)))
 
+    @staticmethod
+    def get_overview_table(table: str) -> str:
+        return f"{table}_overview"
+
+    def create_overview_table(self, table: str) -> None:
+        """
+        Create the min/max overview hypertable companion of a datastream table.
+        """
+        overview = self.get_overview_table(table)
+        self.execute(self.sql_create_overview.format(table=self.quote_name(overview)))
+        self.execute(self.sql_create_hypertable.format(table=overview))
+
+    def drop_overview_table(self, table: str) -> None:
+        overview = self.get_overview_table(table)
+        self.execute(
+            self.sql_drop_table_if_exists.format(table=self.quote_name(overview))
+        )
+
     def assert_table_exists(self, table: str) -> bool:
         try:
             self.execute(self.sql_table_exists.format(table=self.quote_name(table)))
@@ -60,6 +133,83 @@ class TimescaleSchemaEditor(DatabaseSchemaEditor):
             ),
             params=(st.isoformat(), et.isoformat(), sr, dtype, buf),
         )
+        chunk_cache.invalidate(table, st)
+
+    def insert_many(
+        self,
+        table: str,
+        rows: list[tuple[datetime, datetime, float, str, bytes]],
+        method: str = "copy",
+    ) -> None:
+        """
+        Insert or update many (st, et, sr, dtype, buf) rows in one statement.
+
+        With the ``copy`` method, rows are copied into a temporary staging
+        table and upserted into the hypertable from there. With the
+        ``values`` method, rows are sent as a multi-row VALUES list. If a
+        start time appears more than once, the last row wins.
+        """
+        rows = list({row[0]: row for row in rows}.values())
+        if not rows:
+            return
+        for row in rows:
+            chunk_cache.invalidate(table, row[0])
+        if method == "values":
+            with self.connection.cursor() as cursor:
+                execute_values(
+                    cursor,
+                    self.sql_insert_many.format(table=self.quote_name(table)),
+                    rows,
+                    page_size=len(rows),
+                )
+        elif method == "copy":
+            self._copy_many(table, rows)
+        else:
+            raise ValueError(f"Unknown insert method: {method}")
+
+    def _copy_many(
+        self, table: str, rows: list[tuple[datetime, datetime, float, str, bytes]]
+    ) -> None:
+        staging = self.quote_name("datastream_staging")
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for st, et, sr, dtype, buf in rows:
+            writer.writerow(
+                [st.isoformat(), et.isoformat(), repr(sr), dtype, "\\x" + buf.hex()]
+            )
+        buffer.seek(0)
+
+        with transaction.atomic(using=self.connection.alias):
+            with self.connection.cursor() as cursor:
+                cursor.execute(self.sql_create_staging.format(staging=staging))
+                # Rows of an earlier copy are only deleted on commit, which
+                # has not happened yet if called inside an outer transaction.
+                cursor.execute(self.sql_clear_staging.format(staging=staging))
+                cursor.copy_expert(
+                    self.sql_copy_staging.format(staging=staging), buffer
+                )
+                cursor.execute(
+                    self.sql_upsert_from_staging.format(
+                        table=self.quote_name(table), staging=staging
+                    )
+                )
+
+    def update_buffers(self, table: str, rows: list[tuple[datetime, bytes]]) -> None:
+        """
+        Replace the buffer of existing rows, given as (st, buf) tuples.
+        """
+        if not rows:
+            return
+        for st, __ in rows:
+            chunk_cache.invalidate(table, st)
+        with self.connection.cursor() as cursor:
+            execute_values(
+                cursor,
+                self.sql_update_buffer.format(table=self.quote_name(table)),
+                rows,
+                template="(%s::timestamptz, %s::bytea)",
+                page_size=1000,
+            )
 
     def query(
         self, table: str, start: datetime | int, end: datetime | int
@@ -72,19 +222,236 @@ class TimescaleSchemaEditor(DatabaseSchemaEditor):
         self.connection: psycopg2.extensions.connection
         with self.connection.cursor() as cursor:
             cursor.execute(
-                self.sql_query_table.format(
-                    table=table,
-                    start=start.isoformat(),
-                    end=end.isoformat(),
-                )
+                self.sql_query_table.format(table=table),
+                (start, end),
+            )
+            return cursor.fetchall()
+
+    def query_for_update(
+        self, table: str, start: datetime, end: datetime
+    ) -> list[tuple[datetime, datetime, float, str, bytes]]:
+        """
+        Query rows in the time range and lock them until the end of the
+        current transaction.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                self.sql_query_table_for_update.format(table=table), (start, end)
+            )
+            return cursor.fetchall()
+
+    def delete_rows(self, table: str, sts: list[datetime]) -> None:
+        """
+        Delete rows with the given start times.
+        """
+        if not sts:
+            return
+        for st in sts:
+            chunk_cache.invalidate(table, st)
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.sql_delete_rows.format(table=table), (sts,))
+
+    def query_meta(
+        self, table: str, start: datetime, end: datetime
+    ) -> list[tuple[datetime, datetime, float, str, int]]:
+        """
+        Query (st, et, sr, dtype, size) of rows in the time range, without
+        transferring their buffers.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                self.sql_query_table_meta.format(table=table),
+                (start, end),
+            )
+            return cursor.fetchall()
+
+    def query_buffers(self, table: str, sts: list[datetime]) -> dict[datetime, bytes]:
+        """
+        Query the buffers of rows with the given start times.
+        """
+        if not sts:
+            return {}
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.sql_query_table_buffers.format(table=table), (sts,))
+            return dict(cursor.fetchall())
+
+    def iter_query(
+        self,
+        table: str,
+        start: datetime | int,
+        end: datetime | int,
+        chunk_size: int = 1000,
+    ) -> Iterator[list[tuple[datetime, datetime, float, str, bytes]]]:
+        """
+        Query rows in the range [start, end) using a server-side cursor.
+
+        Rows are yielded in lists of at most ``chunk_size`` rows, so only one
+        chunk of compressed buffers is held in memory at a time.
+        """
+        if isinstance(start, int):
+            start = datetime.fromtimestamp(start)
+        if isinstance(end, int):
+            end = datetime.fromtimestamp(end)
+
+        with self.connection.chunked_cursor() as cursor:
+            cursor.execute(
+                self.sql_query_table.format(table=table),
+                (start, end),
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+    def query_many(
+        self, tables: list[str], start: datetime | int, end: datetime | int
+    ) -> dict[str, list[tuple[datetime, datetime, float, str, bytes]]]:
+        """
+        Query rows in the range [start, end) from several tables in a single
+        round trip. Returns a mapping of table name to its rows ordered by st.
+        """
+        if isinstance(start, int):
+            start = datetime.fromtimestamp(start)
+        if isinstance(end, int):
+            end = datetime.fromtimestamp(end)
+
+        result: dict[str, list[tuple[datetime, datetime, float, str, bytes]]] = {
+            table: [] for table in tables
+        }
+        if not tables:
+            return result
+
+        sql = " UNION ALL ".join(
+            f"({self.sql_query_table_tagged.format(table=table)})" for table in tables
+        )
+        sql += " ORDER BY tbl, st"
+        params = []
+        for table in tables:
+            params.extend([table, start, end])
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            for tbl, *row in cursor.fetchall():
+                result[tbl].append(tuple(row))
+        return result
+
+    def fetch_earliest_time(self, table: str) -> datetime | None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.sql_get_earliest_time.format(table=table))
+            result = cursor.fetchone()
+            if result is None:
+                return None
+            return result[0]
+
+    def upsert_overview(
+        self, table: str, rows: list[tuple[int, datetime, float, float, float, int]]
+    ) -> None:
+        """
+        Insert or update (level, st, min, max, mean, count) overview rows.
+        """
+        if not rows:
+            return
+        overview = self.get_overview_table(table)
+        with self.connection.cursor() as cursor:
+            execute_values(
+                cursor,
+                self.sql_upsert_overview.format(table=self.quote_name(overview)),
+                rows,
+                page_size=1000,
+            )
+
+    def query_overview(
+        self, table: str, level: int, start: datetime, end: datetime
+    ) -> list[tuple[datetime, float, float, float, int]]:
+        overview = self.get_overview_table(table)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                self.sql_query_overview.format(table=self.quote_name(overview)),
+                (level, start, end),
             )
             return cursor.fetchall()
 
+    def fetch_overview_watermark(self, table: str, level: int) -> datetime | None:
+        """
+        Get the start time of the latest overview bucket of the given level.
+        """
+        overview = self.get_overview_table(table)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                self.sql_get_overview_watermark.format(table=self.quote_name(overview)),
+                (level,),
+            )
+            return cursor.fetchone()[0]
+
+    def is_compression_enabled(self, table: str) -> bool:
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.sql_is_compression_enabled, (table,))
+            result = cursor.fetchone()
+            return bool(result and result[0])
+
+    def enable_compression(self, table: str) -> None:
+        """
+        Enable native compression of a datastream hypertable. Each table
+        holds a single channel, so chunks are not segmented and are ordered
+        by start time.
+        """
+        if self.is_compression_enabled(table):
+            return
+        self.execute(self.sql_enable_compression.format(table=self.quote_name(table)))
+
+    def set_compression_policy(
+        self, table: str, compress_after: timedelta | None
+    ) -> None:
+        """
+        Compress chunks older than ``compress_after``, replacing any existing
+        policy. If ``compress_after`` is None, the policy is removed.
+        """
+        self.execute(self.sql_remove_compression_policy.format(table=table))
+        if compress_after is None:
+            return
+        self.enable_compression(table)
+        self.execute(
+            self.sql_add_compression_policy.format(table=table),
+            params=(compress_after,),
+        )
+
+    def set_retention_policy(self, table: str, drop_after: timedelta | None) -> None:
+        """
+        Drop chunks older than ``drop_after``, replacing any existing policy.
+        If ``drop_after`` is None, the policy is removed.
+        """
+        self.execute(self.sql_remove_retention_policy.format(table=table))
+        if drop_after is None:
+            return
+        self.execute(
+            self.sql_add_retention_policy.format(table=table), params=(drop_after,)
+        )
+
+    def compress_chunks(self, table: str, older_than: timedelta) -> int:
+        """
+        Compress chunks older than ``older_than`` now instead of waiting for
+        the policy job. Returns the number of chunks processed.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.sql_compress_chunks.format(table=table), (older_than,))
+            return cursor.fetchone()[0]
+
     def hypertable_size(self, table: str) -> int:
         with self.connection.cursor() as cursor:
             cursor.execute(self.sql_hypertable_size.format(table=table))
             return cursor.fetchone()[0]
 
+    def fetch_latest_packet(
+        self, table: str
+    ) -> tuple[datetime, datetime, float] | None:
+        """
+        Get (st, et, sr) of the latest row, without transferring its buffer.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.sql_get_latest_packet.format(table=table))
+            return cursor.fetchone()
+
     def fetch_latest_data(
         self, table: str
     ) -> tuple[datetime, datetime, float, str, bytes] | None:
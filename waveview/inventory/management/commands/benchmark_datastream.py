@@ -0,0 +1,100 @@
+import json
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+
+from waveview.inventory.benchmark import (
+    DEFAULT_WINDOWS,
+    STAGES,
+    DataStreamBenchmark,
+    get_environment,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the datastream read, filter, encode and spectrogram paths "
+        "on synthetic data loaded into temporary tables."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--channels",
+            type=int,
+            default=3,
+            help="Number of synthetic channels.",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=24,
+            help="Duration in hours of the synthetic data.",
+        )
+        parser.add_argument(
+            "--sample-rate",
+            type=float,
+            default=100,
+            help="Sampling rate of the synthetic data.",
+        )
+        parser.add_argument(
+            "--windows",
+            type=str,
+            default=",".join(str(window) for window in DEFAULT_WINDOWS),
+            help="Comma separated window sizes in seconds.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of reads per window size and channel.",
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            help="Write the results as JSON to this file.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        windows = tuple(int(window) for window in options["windows"].split(","))
+        benchmark = DataStreamBenchmark(
+            connection,
+            channels=options["channels"],
+            duration=options["duration"] * 3600,
+            sample_rate=options["sample_rate"],
+        )
+
+        self.stdout.write("Loading synthetic data...")
+        try:
+            benchmark.setup()
+            results = benchmark.run(windows, repeat=options["repeat"])
+        finally:
+            benchmark.teardown()
+
+        self.stdout.write(
+            f"{'window':>8} {'samples':>10} "
+            + " ".join(f"{stage:>11}" for stage in STAGES)
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result.window:>8} {result.samples:>10} "
+                + " ".join(
+                    f"{result.timings[stage] * 1000:>9.2f}ms" for stage in STAGES
+                )
+            )
+
+        if options.get("output"):
+            report = {
+                "environment": get_environment(),
+                "config": {
+                    "channels": options["channels"],
+                    "duration": options["duration"] * 3600,
+                    "sample_rate": options["sample_rate"],
+                    "repeat": options["repeat"],
+                },
+                "results": [result.to_dict() for result in results],
+            }
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from dateutil.parser import parse
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+
+from waveview.inventory.datastream import DataStream
+from waveview.inventory.models import Channel, DataAvailability
+
+
+class Command(BaseCommand):
+    help = "Rebuild the data availability index from datastream tables."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--stream_id",
+            type=str,
+            help="Stream ID, e.g. 'IU.ANMO.00.BHZ'. Defaults to all channels.",
+        )
+        parser.add_argument(
+            "--start",
+            type=str,
+            help="Start time in UTC. Defaults to the earliest data of the channel.",
+        )
+        parser.add_argument("--end", type=str, help="End time in UTC. Defaults to now.")
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=86400,
+            help="Window size in seconds of rows scanned at a time.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        stream_id: str | None = options.get("stream_id")
+        window = timedelta(seconds=options["window"])
+
+        if stream_id:
+            try:
+                channels = [Channel.objects.get_by_stream_id(stream_id)]
+            except Channel.DoesNotExist:
+                self.stderr.write(self.style.ERROR("Channel not found."))
+                return
+        else:
+            channels = Channel.objects.all()
+
+        datastream = DataStream(connection)
+        for channel in channels:
+            table = channel.get_datastream_id()
+            start = parse(options["start"]) if options.get("start") else None
+            end = (
+                parse(options["end"])
+                if options.get("end")
+                else datetime.now(timezone.utc)
+            )
+            if start is None:
+                start = datastream.db.fetch_earliest_time(table)
+                if start is None:
+                    self.stdout.write(f"No data for {channel.stream_id}.")
+                    continue
+
+            self.stdout.write(f"Building availability of {channel.stream_id}...")
+            # Drop segments fully inside the range; segments crossing its
+            # bounds are merged with the rebuilt ones.
+            DataAvailability.objects.filter(
+                channel=channel, start__gte=start, end__lte=end
+            ).delete()
+
+            count = 0
+            ws = start
+            while ws < end:
+                we = min(ws + window, end)
+                rows = datastream.db.query_meta(table, ws, we)
+                datastream.update_availability(channel, [row[:3] for row in rows])
+                count += len(rows)
+                ws = we
+
+            segments = DataAvailability.objects.filter(
+                channel=channel, start__lte=end, end__gte=start
+            ).count()
+            self.stdout.write(f"Scanned {count:,} rows into {segments:,} segments.")
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,55 @@
+from typing import Any
+
+from dateutil.parser import parse
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+
+from waveview.inventory.datastream import DataStream
+from waveview.inventory.models import Channel
+
+
+class Command(BaseCommand):
+    help = "Build min/max overview levels of datastream tables."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--stream_id",
+            type=str,
+            help="Stream ID, e.g. 'IU.ANMO.00.BHZ'. Defaults to all channels.",
+        )
+        parser.add_argument(
+            "--start",
+            type=str,
+            help="Start time in UTC. Defaults to the latest overview bucket.",
+        )
+        parser.add_argument("--end", type=str, help="End time in UTC. Defaults to now.")
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=3600,
+            help="Window size in seconds of raw data decoded at a time.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        stream_id: str | None = options.get("stream_id")
+        start = parse(options["start"]) if options.get("start") else None
+        end = parse(options["end"]) if options.get("end") else None
+        window: int = options["window"]
+
+        if stream_id:
+            try:
+                channels = [Channel.objects.get_by_stream_id(stream_id)]
+            except Channel.DoesNotExist:
+                self.stderr.write(self.style.ERROR("Channel not found."))
+                return
+        else:
+            channels = Channel.objects.all()
+
+        datastream = DataStream(connection)
+        for channel in channels:
+            self.stdout.write(f"Building overview of {channel.stream_id}...")
+            count = datastream.update_overview(
+                channel, start=start, end=end, window=window
+            )
+            self.stdout.write(f"Written {count:,} overview buckets.")
+        self.stdout.write(self.style.SUCCESS("Done."))
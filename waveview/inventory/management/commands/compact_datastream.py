@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from dateutil.parser import parse
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+
+from waveview.inventory.compactor import DataStreamCompactor
+from waveview.inventory.models import Channel
+
+
+class Command(BaseCommand):
+    help = "Repack small datastream rows into large contiguous blocks."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--stream_id",
+            type=str,
+            help="Stream ID, e.g. 'IU.ANMO.00.BHZ'. Defaults to all channels.",
+        )
+        parser.add_argument(
+            "--start",
+            type=str,
+            help="Start time in UTC. Defaults to the earliest data of the channel.",
+        )
+        parser.add_argument(
+            "--end",
+            type=str,
+            help="End time in UTC. Defaults to DATASTREAM_COMPACT_AFTER minutes ago.",
+        )
+        parser.add_argument(
+            "--block-size",
+            type=int,
+            help=(
+                "Block size in seconds, at most DATASTREAM_COMPACT_BLOCK_SIZE. "
+                "Defaults to DATASTREAM_COMPACT_BLOCK_SIZE."
+            ),
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        stream_id: str | None = options.get("stream_id")
+        block_size: int | None = options.get("block_size")
+        if options.get("end"):
+            end = parse(options["end"])
+        else:
+            end = datetime.now(timezone.utc) - timedelta(
+                minutes=settings.DATASTREAM_COMPACT_AFTER
+            )
+
+        if stream_id:
+            try:
+                channels = [Channel.objects.get_by_stream_id(stream_id)]
+            except Channel.DoesNotExist:
+                self.stderr.write(self.style.ERROR("Channel not found."))
+                return
+        else:
+            channels = Channel.objects.all()
+
+        compactor = DataStreamCompactor(connection)
+        for channel in channels:
+            if options.get("start"):
+                start = parse(options["start"])
+            else:
+                start = compactor.db.fetch_earliest_time(channel.get_datastream_id())
+                if start is None:
+                    self.stdout.write(f"No data for {channel.stream_id}.")
+                    continue
+
+            self.stdout.write(f"Compacting {channel.stream_id}...")
+            try:
+                stats = compactor.compact(channel, start, end, block_size=block_size)
+            except ValueError as e:
+                self.stderr.write(self.style.ERROR(str(e)))
+                return
+            self.stdout.write(str(stats))
+        self.stdout.write(self.style.SUCCESS("Done."))
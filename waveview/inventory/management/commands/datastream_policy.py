@@ -0,0 +1,125 @@
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+
+from waveview.inventory.datastream import DataStream
+from waveview.inventory.models import Channel, DataStreamPolicy, Inventory
+
+
+class Command(BaseCommand):
+    help = "Set and apply compression and retention policies of datastream tables."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--stream_id",
+            type=str,
+            help="Stream ID, e.g. 'IU.ANMO.00.BHZ'. Defaults to all channels.",
+        )
+        parser.add_argument(
+            "--inventory_id",
+            type=str,
+            help="Inventory ID. Applies to all channels of the inventory.",
+        )
+        parser.add_argument(
+            "--compress-after",
+            type=float,
+            help="Compress chunks older than this many days.",
+        )
+        parser.add_argument(
+            "--drop-after",
+            type=float,
+            help="Drop chunks older than this many days.",
+        )
+        parser.add_argument(
+            "--no-compression", action="store_true", help="Disable compression."
+        )
+        parser.add_argument(
+            "--no-retention", action="store_true", help="Keep data forever."
+        )
+        parser.add_argument(
+            "--compress-now",
+            action="store_true",
+            help="Compress eligible chunks now instead of waiting for the policy job.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        stream_id: str | None = options.get("stream_id")
+        inventory_id: str | None = options.get("inventory_id")
+
+        channel = None
+        inventory = None
+        if stream_id:
+            try:
+                channel = Channel.objects.get_by_stream_id(stream_id)
+            except Channel.DoesNotExist:
+                self.stderr.write(self.style.ERROR("Channel not found."))
+                return
+            channels = [channel]
+        elif inventory_id:
+            try:
+                inventory = Inventory.objects.get(id=inventory_id)
+            except Inventory.DoesNotExist:
+                self.stderr.write(self.style.ERROR("Inventory not found."))
+                return
+            channels = Channel.objects.filter(station__network__inventory=inventory)
+        else:
+            channels = Channel.objects.all()
+
+        changes = self.get_changes(options)
+        if changes:
+            if channel is None and inventory is None:
+                self.stderr.write(
+                    self.style.ERROR("Stream ID or inventory ID is required.")
+                )
+                return
+            policy, __ = DataStreamPolicy.objects.get_or_create(
+                channel=channel, inventory=inventory
+            )
+            for key, value in changes.items():
+                setattr(policy, key, value)
+            policy.save()
+
+        datastream = DataStream(connection)
+        total_before = 0
+        total_after = 0
+        for chan in channels:
+            table = chan.get_datastream_id()
+            before = datastream.db.hypertable_size(table)
+            policy = datastream.apply_policy(chan)
+            if options["compress_now"] and policy.compress_after is not None:
+                datastream.db.compress_chunks(table, policy.compress_after)
+            after = datastream.db.hypertable_size(table)
+            total_before += before
+            total_after += after
+            self.stdout.write(
+                f"{chan.stream_id}: {self.describe(policy)}, "
+                f"{before:,} -> {after:,} bytes"
+            )
+
+        self.stdout.write(f"Total size: {total_before:,} -> {total_after:,} bytes")
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    def get_changes(self, options: dict[str, Any]) -> dict[str, timedelta | None]:
+        changes: dict[str, timedelta | None] = {}
+        if options["no_compression"]:
+            changes["compress_after"] = None
+        elif options.get("compress_after") is not None:
+            changes["compress_after"] = timedelta(days=options["compress_after"])
+        if options["no_retention"]:
+            changes["drop_after"] = None
+        elif options.get("drop_after") is not None:
+            changes["drop_after"] = timedelta(days=options["drop_after"])
+        return changes
+
+    def describe(self, policy: DataStreamPolicy) -> str:
+        if policy.compress_after is None:
+            compression = "no compression"
+        else:
+            compression = f"compress after {policy.compress_after}"
+        if policy.drop_after is None:
+            retention = "keep forever"
+        else:
+            retention = f"drop after {policy.drop_after}"
+        return f"{compression}, {retention}"
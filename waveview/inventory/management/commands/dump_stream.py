@@ -17,11 +17,18 @@ class Command(BaseCommand):
         )
         parser.add_argument("start", type=str, help="Start time in UTC.")
         parser.add_argument("end", type=str, help="End time in UTC.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of rows to read from the database at a time.",
+        )
 
     def handle(self, *args: Any, **options: Any) -> None:
         stream_id: str = options["stream_id"]
         start: str = options["start"]
         end: str = options["end"]
+        chunk_size: int = options["chunk_size"]
         sid = stream_id.split(".")
         if len(sid) != 4:
             self.stderr.write(self.style.ERROR("Invalid stream ID."))
@@ -41,11 +48,18 @@ class Command(BaseCommand):
         self.stdout.write(
             f"Dumping stream {stream_id} from {starttime} to {endtime}..."
         )
-        st = datastream.get_waveform(chan.id, starttime, endtime)
-        self.stdout.write(str(st))
         datefmt = "%Y%m%dT%H%M%S"
-        st.write(
-            f"{stream_id}_{starttime.strftime(datefmt)}_{endtime.strftime(datefmt)}.msd",
-            format="MSEED",
+        path = (
+            f"{stream_id}_{starttime.strftime(datefmt)}_{endtime.strftime(datefmt)}.msd"
         )
+        npts = 0
+        with open(path, "wb") as f:
+            for st in datastream.iter_waveform(
+                chan.id, starttime, endtime, chunk_size=chunk_size
+            ):
+                # MiniSEED records can be concatenated, so each chunk is
+                # appended to the file as soon as it is decoded.
+                st.write(f, format="MSEED")
+                npts += sum(tr.stats.npts for tr in st)
+        self.stdout.write(f"Written {npts:,} samples to {path}.")
         self.stdout.write("Done.")
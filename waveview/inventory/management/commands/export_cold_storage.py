@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from dateutil.parser import parse
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+
+from waveview.inventory.coldstorage import ColdStorage
+from waveview.inventory.models import Channel
+
+
+class Command(BaseCommand):
+    help = "Export aged datastream days to cold storage files."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--stream_id",
+            type=str,
+            help="Stream ID, e.g. 'IU.ANMO.00.BHZ'. Defaults to all channels.",
+        )
+        parser.add_argument(
+            "--before",
+            type=str,
+            help=(
+                "Export days before this UTC date. "
+                "Defaults to DATASTREAM_COLD_AFTER_DAYS days ago."
+            ),
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        stream_id: str | None = options.get("stream_id")
+        # Cold storage files are only read while tiering is enabled, so do not
+        # export rows that would not be readable anymore.
+        if settings.DATASTREAM_COLD_AFTER_DAYS is None:
+            self.stderr.write(
+                self.style.ERROR(
+                    "DATASTREAM_COLD_AFTER_DAYS is not set, cold storage is disabled."
+                )
+            )
+            return
+        if options.get("before"):
+            before = parse(options["before"]).date()
+        else:
+            before = (
+                datetime.now(timezone.utc)
+                - timedelta(days=settings.DATASTREAM_COLD_AFTER_DAYS)
+            ).date()
+
+        if stream_id:
+            try:
+                channels = [Channel.objects.get_by_stream_id(stream_id)]
+            except Channel.DoesNotExist:
+                self.stderr.write(self.style.ERROR("Channel not found."))
+                return
+        else:
+            channels = Channel.objects.all()
+
+        storage = ColdStorage(connection)
+        for channel in channels:
+            self.stdout.write(f"Exporting {channel.stream_id} before {before}...")
+            for file in storage.export(channel, before):
+                self.stdout.write(
+                    f"  {file.date}: {file.row_count:,} rows, {file.size:,} bytes"
+                )
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pathlib import Path
 from typing import Any
 
@@ -5,7 +6,8 @@ from django.core.management.base import BaseCommand, CommandParser
 from django.db import connection
 from obspy import Trace, read
 
-from waveview.inventory.datastream import prepare_buffer
+from waveview.inventory.compression import registry
+from waveview.inventory.datastream import DataStream, prepare_buffer
 from waveview.inventory.db.schema import TimescaleSchemaEditor
 from waveview.inventory.models import Channel
 
@@ -28,6 +30,29 @@ class Command(BaseCommand):
             "--print-info", action="store_true", help="Print trace information."
         )
         parser.add_argument("--table", type=str, help="Table name to store the data.")
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Compress chunks in parallel and write them in batches.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of chunks written per statement in bulk mode.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Number of worker processes in bulk mode. Defaults to CPU count.",
+        )
+        parser.add_argument(
+            "--method",
+            type=str,
+            choices=["copy", "values"],
+            default="copy",
+            help="Bulk write method.",
+        )
 
     def handle(self, *args: Any, **options: Any) -> None:
         path: str = options["path"]
@@ -38,6 +63,7 @@ class Command(BaseCommand):
         print_info: bool = options["print_info"]
         stream_id: str = options.get("stream_id", "")
         table_name: str = options.get("table", "")
+        chan: Channel | None = None
         if table_name:
             table = table_name
         elif stream_id:
@@ -59,10 +85,25 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR("Stream ID or table name is missing."))
             return
 
-        schema = TimescaleSchemaEditor(connection)
         chunksize = options["chunksize"]
+        if options["bulk"]:
+            stats = DataStream(connection).load_stream(
+                read(path, format="mseed"),
+                chunksize=chunksize,
+                table=table,
+                bulk=True,
+                batch_size=options["batch_size"],
+                workers=options.get("workers"),
+                method=options["method"],
+                channel=chan,
+            )
+            self.stdout.write(str(stats))
+            return
+
+        schema = TimescaleSchemaEditor(connection)
         nbytes: int = 0
         compressed: int = 0
+        segments: list[tuple[datetime, datetime, float]] = []
 
         st = read(path, format="mseed")
         for trace in st:
@@ -77,8 +118,12 @@ class Command(BaseCommand):
                     chunk_end = endtime
 
                 chunk = trace.slice(chunk_start, chunk_end)
-                st, et, sr, dtype, buf = prepare_buffer(chunk)
+                dict_id = None
+                if chan is not None:
+                    dict_id = registry.get_active(chan.id, str(chunk.data.dtype))
+                st, et, sr, dtype, buf = prepare_buffer(chunk, dict_id=dict_id)
                 schema.insert(table, st, et, sr, dtype, buf)
+                segments.append((st, et, sr))
 
                 nbytes += chunk.data.nbytes
                 compressed += len(buf)
@@ -88,6 +133,12 @@ class Command(BaseCommand):
 
                 starttime = chunk_end
 
+        if chan is not None:
+            datastream = DataStream(connection)
+            datastream.update_availability(chan, segments)
+            datastream.update_latest_packet(chan)
+            datastream.refresh_overview(chan, segments)
+
         self.stdout.write(
             "Data loaded: {:,} bytes, compressed: {:,} bytes.".format(
                 nbytes, compressed
@@ -0,0 +1,219 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import zstandard as zstd
+from dateutil.parser import parse
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+
+from waveview.inventory import compression
+from waveview.inventory.db.schema import TimescaleSchemaEditor
+from waveview.inventory.models import Channel, DataStreamDictionary
+
+
+class Command(BaseCommand):
+    help = "Train zstd dictionaries for datastream chunks."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--stream_id",
+            type=str,
+            help="Stream ID, e.g. 'IU.ANMO.00.BHZ'. Defaults to all channels.",
+        )
+        parser.add_argument(
+            "--shared",
+            action="store_true",
+            help="Train a single dictionary per data type shared by all channels.",
+        )
+        parser.add_argument(
+            "--start",
+            type=str,
+            help="Start time in UTC of the training data. Defaults to 1 day ago.",
+        )
+        parser.add_argument(
+            "--end",
+            type=str,
+            help="End time in UTC of the training data. Defaults to now.",
+        )
+        parser.add_argument(
+            "--max-samples",
+            type=int,
+            default=5000,
+            help="Maximum number of chunks used in training per dictionary.",
+        )
+        parser.add_argument(
+            "--dict-size",
+            type=int,
+            default=16384,
+            help="Dictionary size in bytes.",
+        )
+        parser.add_argument(
+            "--level",
+            type=int,
+            help="Compression level. Defaults to DATASTREAM_COMPRESSION_LEVEL.",
+        )
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="Recompress existing chunks in the time range with the new dictionary.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        stream_id: str | None = options.get("stream_id")
+        shared: bool = options["shared"]
+        now = datetime.now(timezone.utc)
+        end = parse(options["end"]) if options.get("end") else now
+        start = (
+            parse(options["start"]) if options.get("start") else now - timedelta(days=1)
+        )
+        max_samples: int = options["max_samples"]
+        dict_size: int = options["dict_size"]
+        level: int = options.get("level") or compression.get_compression_level()
+
+        if stream_id:
+            try:
+                channels = [Channel.objects.get_by_stream_id(stream_id)]
+            except Channel.DoesNotExist:
+                self.stderr.write(self.style.ERROR("Channel not found."))
+                return
+        else:
+            channels = list(Channel.objects.all())
+
+        schema = TimescaleSchemaEditor(connection)
+        groups: dict[tuple[Channel | None, str], list[bytes]] = {}
+        for channel in channels:
+            table = channel.get_datastream_id()
+            for key, samples in self.collect_samples(
+                schema, table, start, end, max_samples
+            ).items():
+                group = groups.setdefault((None if shared else channel, key), [])
+                group.extend(samples[: max_samples - len(group)])
+
+        for (channel, dtype), samples in groups.items():
+            name = channel.stream_id if channel is not None else "all channels"
+            self.stdout.write(
+                f"Training {dtype} dictionary of {name} from {len(samples):,} chunks..."
+            )
+            try:
+                dictionary = self.train(channel, dtype, samples, dict_size, level)
+            except zstd.ZstdError as e:
+                self.stderr.write(self.style.ERROR(f"Training failed: {e}"))
+                continue
+            self.report(dictionary, samples, level)
+
+            if options["backfill"]:
+                targets = [channel] if channel is not None else channels
+                for target in targets:
+                    count = self.backfill(
+                        schema,
+                        target.get_datastream_id(),
+                        dtype,
+                        dictionary,
+                        level,
+                        start,
+                        end,
+                    )
+                    self.stdout.write(
+                        f"Recompressed {count:,} chunks of {target.stream_id}."
+                    )
+
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    def collect_samples(
+        self,
+        schema: TimescaleSchemaEditor,
+        table: str,
+        start: datetime,
+        end: datetime,
+        max_samples: int,
+    ) -> dict[str, list[bytes]]:
+        samples: dict[str, list[bytes]] = {}
+        for rows in schema.iter_query(table, start, end):
+            for __, __, __, dtype, buf in rows:
+                group = samples.setdefault(dtype, [])
+                if len(group) < max_samples:
+                    group.append(compression.decompress(buf))
+            if all(len(group) >= max_samples for group in samples.values()):
+                break
+        return samples
+
+    def train(
+        self,
+        channel: Channel | None,
+        dtype: str,
+        samples: list[bytes],
+        dict_size: int,
+        level: int,
+    ) -> DataStreamDictionary:
+        dict_id = random.randint(32768, 2**31 - 1)
+        while DataStreamDictionary.objects.filter(dict_id=dict_id).exists():
+            dict_id = random.randint(32768, 2**31 - 1)
+
+        data = zstd.train_dictionary(dict_size, samples, dict_id=dict_id, level=level)
+        DataStreamDictionary.objects.filter(
+            channel=channel, dtype=dtype, is_active=True
+        ).update(is_active=False)
+        dictionary = DataStreamDictionary.objects.create(
+            dict_id=dict_id,
+            channel=channel,
+            dtype=dtype,
+            data=data.as_bytes(),
+            level=level,
+            sample_count=len(samples),
+        )
+        compression.registry.clear()
+        return dictionary
+
+    def report(
+        self, dictionary: DataStreamDictionary, samples: list[bytes], level: int
+    ) -> None:
+        nbytes = sum(len(sample) for sample in samples)
+        for label, dict_id in [
+            ("no dictionary", None),
+            ("dictionary", dictionary.dict_id),
+        ]:
+            compressor = compression.get_compressor(dict_id, level)
+            t0 = time.perf_counter()
+            frames = [compressor.compress(sample) for sample in samples]
+            t1 = time.perf_counter()
+            for frame in frames:
+                compression.decompress(frame)
+            t2 = time.perf_counter()
+
+            compressed = sum(len(frame) for frame in frames)
+            ratio = (compressed / nbytes) * 100 if nbytes else 0
+            self.stdout.write(
+                f"  {label}: {compressed:,} bytes ({ratio:.2f}%), "
+                f"compress {nbytes / 1e6 / max(t1 - t0, 1e-9):.1f} MB/s, "
+                f"decompress {nbytes / 1e6 / max(t2 - t1, 1e-9):.1f} MB/s"
+            )
+
+    def backfill(
+        self,
+        schema: TimescaleSchemaEditor,
+        table: str,
+        dtype: str,
+        dictionary: DataStreamDictionary,
+        level: int,
+        start: datetime,
+        end: datetime,
+    ) -> int:
+        count = 0
+        for rows in schema.iter_query(table, start, end):
+            updates = [
+                (
+                    st,
+                    compression.compress(
+                        compression.decompress(buf),
+                        dict_id=dictionary.dict_id,
+                        level=level,
+                    ),
+                )
+                for st, __, __, dt, buf in rows
+                if dt == dtype and compression.get_dict_id(buf) != dictionary.dict_id
+            ]
+            schema.update_buffers(table, updates)
+            count += len(updates)
+        return count
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataStreamDictionary",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "dict_id",
+                    models.PositiveIntegerField(
+                        help_text="Dictionary ID written in zstd frame headers.",
+                        unique=True,
+                    ),
+                ),
+                (
+                    "dtype",
+                    models.CharField(
+                        help_text="Data type of the samples, e.g. int32.", max_length=32
+                    ),
+                ),
+                ("data", models.BinaryField(help_text="Dictionary content.")),
+                (
+                    "level",
+                    models.IntegerField(
+                        help_text="Compression level used in training."
+                    ),
+                ),
+                (
+                    "sample_count",
+                    models.IntegerField(
+                        default=0, help_text="Number of chunks used in training."
+                    ),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        default=True,
+                        help_text="Whether the dictionary is used to compress new chunks. Inactive dictionaries are kept to decompress existing chunks.",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "channel",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Channel the dictionary is trained for. If empty, the dictionary is shared by all channels of the same data type.",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dictionaries",
+                        related_query_name="dictionary",
+                        to="inventory.channel",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "datastream dictionary",
+                "verbose_name_plural": "datastream dictionaries",
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0002_datastreamdictionary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataStreamPolicy",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "compress_after",
+                    models.DurationField(
+                        blank=True,
+                        help_text="Compress chunks older than this. If empty, disable compression.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "drop_after",
+                    models.DurationField(
+                        blank=True,
+                        help_text="Drop chunks older than this. If empty, keep data forever.",
+                        null=True,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "channel",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="datastream_policy",
+                        to="inventory.channel",
+                    ),
+                ),
+                (
+                    "inventory",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="datastream_policy",
+                        to="inventory.inventory",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "datastream policy",
+                "verbose_name_plural": "datastream policies",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="datastreampolicy",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    ("inventory__isnull", True),
+                    ("channel__isnull", True),
+                    _connector="XOR",
+                ),
+                name="datastream_policy_inventory_xor_channel",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0003_datastreampolicy"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChannelLatestPacket",
+            fields=[
+                (
+                    "channel",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="latest_packet",
+                        serialize=False,
+                        to="inventory.channel",
+                    ),
+                ),
+                (
+                    "st",
+                    models.DateTimeField(help_text="Start time of the latest packet."),
+                ),
+                (
+                    "et",
+                    models.DateTimeField(help_text="End time of the latest packet."),
+                ),
+                (
+                    "sr",
+                    models.FloatField(help_text="Sampling rate of the latest packet."),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "channel latest packet",
+                "verbose_name_plural": "channel latest packets",
+                "db_table": "channel_latest_packet",
+            },
+        ),
+    ]
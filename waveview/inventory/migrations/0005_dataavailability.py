@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0004_channellatestpacket"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataAvailability",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("start", models.DateTimeField(help_text="Start time of the segment.")),
+                ("end", models.DateTimeField(help_text="End time of the segment.")),
+                (
+                    "sample_rate",
+                    models.FloatField(help_text="Sampling rate of the segment."),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "channel",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="availability",
+                        related_query_name="availability",
+                        to="inventory.channel",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "data availability",
+                "verbose_name_plural": "data availability",
+                "indexes": [
+                    models.Index(
+                        fields=["channel", "start"],
+                        name="inventory_d_channel_3146c0_idx",
+                    ),
+                    models.Index(
+                        fields=["channel", "end"], name="inventory_d_channel_ec2cd0_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
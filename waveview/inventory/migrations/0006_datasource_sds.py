@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0005_dataavailability"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="datasource",
+            name="source",
+            field=models.CharField(
+                choices=[
+                    ("seedlink", "Seedlink"),
+                    ("scream", "Scream"),
+                    ("arclink", "Arclink"),
+                    ("fdsnws", "FDSN Web Service"),
+                    ("earthworm", "Earthworm"),
+                    ("winston", "Winston Wave Server"),
+                    ("file", "File"),
+                    ("sds", "SDS Archive"),
+                ],
+                max_length=50,
+            ),
+        ),
+    ]
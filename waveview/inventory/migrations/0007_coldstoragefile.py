@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:51
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0006_datasource_sds"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ColdStorageFile",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("date", models.DateField(help_text="UTC day of the exported rows.")),
+                (
+                    "path",
+                    models.CharField(
+                        help_text="File path relative to COLD_STORAGE_DIR.",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "start",
+                    models.DateTimeField(help_text="Start time of the first row."),
+                ),
+                ("end", models.DateTimeField(help_text="End time of the last row.")),
+                (
+                    "row_count",
+                    models.IntegerField(help_text="Number of rows in the file."),
+                ),
+                ("size", models.BigIntegerField(help_text="File size in bytes.")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "channel",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cold_storage_files",
+                        related_query_name="cold_storage_file",
+                        to="inventory.channel",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "cold storage file",
+                "verbose_name_plural": "cold storage files",
+                "indexes": [
+                    models.Index(
+                        fields=["channel", "start"],
+                        name="inventory_c_channel_cea962_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="coldstoragefile",
+            constraint=models.UniqueConstraint(
+                fields=("channel", "date"), name="unique_cold_storage_channel_date"
+            ),
+        ),
+    ]
@@ -1,5 +1,10 @@
+from .availability import DataAvailability  # noqa
 from .channel import Channel  # noqa
+from .coldstorage import ColdStorageFile  # noqa
 from .datasource import DataSource  # noqa
+from .dictionary import DataStreamDictionary  # noqa
 from .inventory import Inventory, InventoryFile  # noqa
 from .network import Network  # noqa
+from .packet import ChannelLatestPacket  # noqa
+from .policy import DataStreamPolicy  # noqa
 from .station import Station  # noqa
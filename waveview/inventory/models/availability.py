@@ -0,0 +1,102 @@
+import uuid
+from datetime import datetime
+
+from django.db import models, transaction
+from django.utils.translation import gettext_lazy as _
+
+from waveview.inventory.availability import SegmentType, get_tolerance
+
+
+class DataAvailabilityManager(models.Manager):
+    def add_segment(
+        self, channel_id: str, start: datetime, end: datetime, sample_rate: float
+    ) -> None:
+        """
+        Add a time range of data to the availability index of a channel,
+        merging it with overlapping or contiguous segments of the same
+        sampling rate.
+        """
+        tolerance = get_tolerance(sample_rate)
+        with transaction.atomic():
+            segments = list(
+                self.select_for_update()
+                .filter(
+                    channel_id=channel_id,
+                    sample_rate=sample_rate,
+                    start__lte=end + tolerance,
+                    end__gte=start - tolerance,
+                )
+                .order_by("start")
+            )
+            if not segments:
+                self.create(
+                    channel_id=channel_id,
+                    start=start,
+                    end=end,
+                    sample_rate=sample_rate,
+                )
+                return
+
+            first = segments[0]
+            new_start = min(start, first.start)
+            new_end = max(end, *[segment.end for segment in segments])
+            if first.start != new_start or first.end != new_end:
+                first.start = new_start
+                first.end = new_end
+                first.save(update_fields=["start", "end", "updated_at"])
+            if len(segments) > 1:
+                self.filter(id__in=[segment.id for segment in segments[1:]]).delete()
+
+    def get_segments(
+        self, channel_id: str, start: datetime, end: datetime
+    ) -> list[SegmentType]:
+        """
+        Get the segments of a channel that intersect [start, end], clipped to
+        the range.
+        """
+        queryset = self.filter(
+            channel_id=channel_id, start__lte=end, end__gte=start
+        ).order_by("start")
+        return [
+            (max(seg_start, start), min(seg_end, end), sample_rate)
+            for seg_start, seg_end, sample_rate in queryset.values_list(
+                "start", "end", "sample_rate"
+            )
+        ]
+
+
+class DataAvailability(models.Model):
+    """
+    This class describes a contiguous time range of data of a channel. It is
+    maintained by the ingest path so data coverage and gaps can be listed
+    without decoding waveforms.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    channel = models.ForeignKey(
+        "inventory.Channel",
+        on_delete=models.CASCADE,
+        related_name="availability",
+        related_query_name="availability",
+    )
+    start = models.DateTimeField(help_text=_("Start time of the segment."))
+    end = models.DateTimeField(help_text=_("End time of the segment."))
+    sample_rate = models.FloatField(help_text=_("Sampling rate of the segment."))
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DataAvailabilityManager()
+
+    class Meta:
+        verbose_name = _("data availability")
+        verbose_name_plural = _("data availability")
+        indexes = [
+            models.Index(fields=["channel", "start"]),
+            models.Index(fields=["channel", "end"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.channel_id} ({self.start} - {self.end})"
+
+    def __repr__(self) -> str:
+        return f"<DataAvailability: {self.channel_id}>"
@@ -0,0 +1,62 @@
+import uuid
+from datetime import datetime
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ColdStorageFileManager(models.Manager):
+    def get_files(
+        self, channel_id: str, start: datetime, end: datetime
+    ) -> models.QuerySet["ColdStorageFile"]:
+        """
+        Get the cold storage files of a channel that intersect [start, end].
+        """
+        return self.filter(
+            channel_id=channel_id, start__lte=end, end__gte=start
+        ).order_by("start")
+
+
+class ColdStorageFile(models.Model):
+    """
+    This class describes a channel-day of datastream rows exported from the
+    hypertable to a file in the cold storage directory.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    channel = models.ForeignKey(
+        "inventory.Channel",
+        on_delete=models.CASCADE,
+        related_name="cold_storage_files",
+        related_query_name="cold_storage_file",
+    )
+    date = models.DateField(help_text=_("UTC day of the exported rows."))
+    path = models.CharField(
+        max_length=255, help_text=_("File path relative to COLD_STORAGE_DIR.")
+    )
+    start = models.DateTimeField(help_text=_("Start time of the first row."))
+    end = models.DateTimeField(help_text=_("End time of the last row."))
+    row_count = models.IntegerField(help_text=_("Number of rows in the file."))
+    size = models.BigIntegerField(help_text=_("File size in bytes."))
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ColdStorageFileManager()
+
+    class Meta:
+        verbose_name = _("cold storage file")
+        verbose_name_plural = _("cold storage files")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["channel", "date"], name="unique_cold_storage_channel_date"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["channel", "start"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.channel_id} ({self.date})"
+
+    def __repr__(self) -> str:
+        return f"<ColdStorageFile: {self.channel_id} {self.date}>"
@@ -26,6 +26,11 @@ class FdsnwsData:
     server_url: str
 
 
+@dataclass
+class SDSData:
+    root: str
+
+
 class DataSourceType(models.TextChoices):
     SEEDLINK = "seedlink", "Seedlink"
     SCREAM = "scream", "Scream"
@@ -34,6 +39,7 @@ class DataSourceType(models.TextChoices):
     EARTHWORM = "earthworm", "Earthworm"
     WINSTON = "winston", "Winston Wave Server"
     FILE = "file", "File"
+    SDS = "sds", "SDS Archive"
 
 
 class DataSource(models.Model):
@@ -0,0 +1,59 @@
+import uuid
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class DataStreamDictionary(models.Model):
+    """
+    This class describes a trained zstd dictionary used to compress datastream
+    chunks.
+
+    The dictionary ID is written in the header of every zstd frame compressed
+    with the dictionary, so each stored chunk records which dictionary is
+    needed to decompress it.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    dict_id = models.PositiveIntegerField(
+        unique=True, help_text=_("Dictionary ID written in zstd frame headers.")
+    )
+    channel = models.ForeignKey(
+        "inventory.Channel",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="dictionaries",
+        related_query_name="dictionary",
+        help_text=_(
+            "Channel the dictionary is trained for. If empty, the dictionary is "
+            "shared by all channels of the same data type."
+        ),
+    )
+    dtype = models.CharField(
+        max_length=32, help_text=_("Data type of the samples, e.g. int32.")
+    )
+    data = models.BinaryField(help_text=_("Dictionary content."))
+    level = models.IntegerField(help_text=_("Compression level used in training."))
+    sample_count = models.IntegerField(
+        default=0, help_text=_("Number of chunks used in training.")
+    )
+    is_active = models.BooleanField(
+        default=True,
+        help_text=_(
+            "Whether the dictionary is used to compress new chunks. Inactive "
+            "dictionaries are kept to decompress existing chunks."
+        ),
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("datastream dictionary")
+        verbose_name_plural = _("datastream dictionaries")
+
+    def __str__(self) -> str:
+        return f"{self.dict_id} ({self.dtype})"
+
+    def __repr__(self) -> str:
+        return f"<DataStreamDictionary: {self.dict_id}>"
@@ -0,0 +1,70 @@
+from datetime import datetime
+from uuid import UUID
+
+from django.db import connection, models
+from django.utils.translation import gettext_lazy as _
+
+
+class ChannelLatestPacketManager(models.Manager):
+    sql_upsert = (
+        "INSERT INTO {table} (channel_id, st, et, sr, updated_at) "
+        "VALUES (%s, %s, %s, %s, now()) "
+        "ON CONFLICT (channel_id) DO UPDATE SET st = EXCLUDED.st, et = EXCLUDED.et, "
+        "sr = EXCLUDED.sr, updated_at = EXCLUDED.updated_at "
+        "WHERE {table}.st <= EXCLUDED.st"
+    )
+
+    def update_packet(
+        self, channel_id: UUID | str, st: datetime, et: datetime, sr: float
+    ) -> None:
+        """
+        Record a packet of a channel if it is not older than the one already
+        recorded. It is a single statement, so it can be called on every
+        insert of the ingest path.
+        """
+        self.update_packets([(channel_id, st, et, sr)])
+
+    def update_packets(
+        self, packets: list[tuple[UUID | str, datetime, datetime, float]]
+    ) -> None:
+        """
+        Record the (channel_id, st, et, sr) packets of several channels in
+        one batch, e.g. once per flush of the ingest path.
+        """
+        if not packets:
+            return
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.executemany(self.sql_upsert.format(table=table), packets)
+
+
+class ChannelLatestPacket(models.Model):
+    """
+    This class describes the latest packet received for a channel. It is
+    maintained by the ingest path so the network status does not need to
+    query every datastream table.
+    """
+
+    channel = models.OneToOneField(
+        "inventory.Channel",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="latest_packet",
+    )
+    st = models.DateTimeField(help_text=_("Start time of the latest packet."))
+    et = models.DateTimeField(help_text=_("End time of the latest packet."))
+    sr = models.FloatField(help_text=_("Sampling rate of the latest packet."))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ChannelLatestPacketManager()
+
+    class Meta:
+        db_table = "channel_latest_packet"
+        verbose_name = _("channel latest packet")
+        verbose_name_plural = _("channel latest packets")
+
+    def __str__(self) -> str:
+        return f"{self.channel_id} ({self.st})"
+
+    def __repr__(self) -> str:
+        return f"<ChannelLatestPacket: {self.channel_id}>"
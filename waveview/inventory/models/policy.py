@@ -0,0 +1,87 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from waveview.inventory.models.channel import Channel
+
+
+class DataStreamPolicyManager(models.Manager):
+    def get_for_channel(self, channel: Channel) -> "DataStreamPolicy":
+        """
+        Get the effective policy of a channel. A channel policy takes
+        precedence over its inventory policy. If neither exists, an unsaved
+        policy with the default settings is returned.
+        """
+        policy = self.filter(channel=channel).first()
+        if policy is None:
+            policy = self.filter(
+                inventory_id=channel.station.network.inventory_id
+            ).first()
+        if policy is None:
+            policy = self.model(
+                compress_after=_days(settings.DATASTREAM_COMPRESS_AFTER_DAYS),
+                drop_after=_days(settings.DATASTREAM_RETENTION_DAYS),
+            )
+        return policy
+
+
+def _days(days: float | None) -> timedelta | None:
+    if days is None:
+        return None
+    return timedelta(days=days)
+
+
+class DataStreamPolicy(models.Model):
+    """
+    This class describes the compression and retention policy of datastream
+    tables, either for a single channel or for all channels of an inventory.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    inventory = models.OneToOneField(
+        "inventory.Inventory",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="datastream_policy",
+    )
+    channel = models.OneToOneField(
+        "inventory.Channel",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="datastream_policy",
+    )
+    compress_after = models.DurationField(
+        null=True,
+        blank=True,
+        help_text=_("Compress chunks older than this. If empty, disable compression."),
+    )
+    drop_after = models.DurationField(
+        null=True,
+        blank=True,
+        help_text=_("Drop chunks older than this. If empty, keep data forever."),
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DataStreamPolicyManager()
+
+    class Meta:
+        verbose_name = _("datastream policy")
+        verbose_name_plural = _("datastream policies")
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(inventory__isnull=True) ^ models.Q(channel__isnull=True),
+                name="datastream_policy_inventory_xor_channel",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return str(self.channel or self.inventory or "default")
+
+    def __repr__(self) -> str:
+        return f"<DataStreamPolicy: {self}>"
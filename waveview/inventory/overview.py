@@ -0,0 +1,232 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+from obspy import Stream, Trace, UTCDateTime
+from obspy.core import Stats
+
+OverviewRowType = tuple[int, datetime, float, float, float, int]
+
+
+@dataclass
+class OverviewLevel:
+    """
+    Min/max/mean summary of a waveform over fixed-size time buckets.
+
+    Buckets are aligned to the epoch, so bucket ``i`` covers the time range
+    ``[i * level, (i + 1) * level)`` in seconds.
+    """
+
+    level: int
+    index: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    sum: np.ndarray
+    count: np.ndarray
+
+    @classmethod
+    def empty(cls, level: int) -> "OverviewLevel":
+        return cls(
+            level=level,
+            index=np.zeros(0, dtype=np.int64),
+            min=np.zeros(0, dtype=np.float64),
+            max=np.zeros(0, dtype=np.float64),
+            sum=np.zeros(0, dtype=np.float64),
+            count=np.zeros(0, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_rows(
+        cls, level: int, rows: list[tuple[datetime, float, float, float, int]]
+    ) -> "OverviewLevel":
+        """
+        Build overview from (st, min, max, mean, count) rows.
+        """
+        if len(rows) == 0:
+            return cls.empty(level)
+        st, vmin, vmax, mean, count = zip(*rows)
+        count = np.array(count, dtype=np.int64)
+        return cls(
+            level=level,
+            index=np.array([int(t.timestamp()) // level for t in st], dtype=np.int64),
+            min=np.array(vmin, dtype=np.float64),
+            max=np.array(vmax, dtype=np.float64),
+            sum=np.array(mean, dtype=np.float64) * count,
+            count=count,
+        )
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def to_rows(self) -> list[OverviewRowType]:
+        """
+        Convert overview to (level, st, min, max, mean, count) rows.
+        """
+        mean = self.sum / np.maximum(self.count, 1)
+        return [
+            (
+                self.level,
+                datetime.fromtimestamp(int(i) * self.level, timezone.utc),
+                float(vmin),
+                float(vmax),
+                float(vmean),
+                int(count),
+            )
+            for i, vmin, vmax, vmean, count in zip(
+                self.index, self.min, self.max, mean, self.count
+            )
+        ]
+
+    def select(self, start: int, end: int) -> "OverviewLevel":
+        """
+        Select buckets with index in the range [start, end).
+        """
+        mask = (self.index >= start) & (self.index < end)
+        return OverviewLevel(
+            level=self.level,
+            index=self.index[mask],
+            min=self.min[mask],
+            max=self.max[mask],
+            sum=self.sum[mask],
+            count=self.count[mask],
+        )
+
+    def concat(self, other: "OverviewLevel") -> "OverviewLevel":
+        return OverviewLevel(
+            level=self.level,
+            index=np.concatenate([self.index, other.index]),
+            min=np.concatenate([self.min, other.min]),
+            max=np.concatenate([self.max, other.max]),
+            sum=np.concatenate([self.sum, other.sum]),
+            count=np.concatenate([self.count, other.count]),
+        )
+
+    def downsample(self, level: int) -> "OverviewLevel":
+        """
+        Reduce this overview to a coarser level. The new level must be a
+        multiple of the current one.
+        """
+        if level % self.level != 0:
+            raise ValueError(f"Level {level} is not a multiple of {self.level}.")
+        return _reduce(
+            level,
+            self.index // (level // self.level),
+            self.min,
+            self.max,
+            self.sum,
+            self.count,
+        )
+
+    def to_trace(
+        self,
+        start: int,
+        end: int,
+        network: str = "",
+        station: str = "",
+        location: str = "",
+        channel: str = "",
+        demean: bool = False,
+    ) -> Trace:
+        """
+        Convert buckets in the index range [start, end) to an envelope trace.
+
+        Each bucket is represented by two samples, its minimum followed by its
+        maximum, so the trace sampling rate is ``2 / level``. Missing buckets
+        are masked.
+        """
+        n = max(end - start, 0)
+        data = np.zeros(2 * n, dtype=np.float64)
+        mask = np.ones(2 * n, dtype=bool)
+
+        ov = self.select(start, end)
+        offset = 0.0
+        if demean and ov.count.sum() > 0:
+            offset = ov.sum.sum() / ov.count.sum()
+
+        pos = (ov.index - start) * 2
+        data[pos] = ov.min - offset
+        data[pos + 1] = ov.max - offset
+        mask[pos] = False
+        mask[pos + 1] = False
+
+        stats = Stats()
+        stats.network = network
+        stats.station = station
+        stats.location = location
+        stats.channel = channel
+        stats.starttime = UTCDateTime(start * self.level)
+        stats.sampling_rate = 2 / self.level
+        stats.npts = len(data)
+        return Trace(data=np.ma.masked_array(data, mask=mask), header=stats)
+
+
+def _reduce(
+    level: int,
+    index: np.ndarray,
+    vmin: np.ndarray,
+    vmax: np.ndarray,
+    vsum: np.ndarray,
+    count: np.ndarray,
+) -> OverviewLevel:
+    if len(index) == 0:
+        return OverviewLevel.empty(level)
+    order = np.argsort(index, kind="stable")
+    index = index[order]
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    return OverviewLevel(
+        level=level,
+        index=index[starts],
+        min=np.minimum.reduceat(vmin[order], starts),
+        max=np.maximum.reduceat(vmax[order], starts),
+        sum=np.add.reduceat(vsum[order], starts),
+        count=np.add.reduceat(count[order], starts),
+    )
+
+
+def compute_overview(stream: Stream, levels: list[int]) -> dict[int, OverviewLevel]:
+    """
+    Compute min/max/mean overview of a stream for each of the given levels.
+
+    Parameters
+    ----------
+    stream : Stream
+        ObsPy Stream object of a single channel. Traces may overlap or
+        contain masked samples.
+    levels : list[int]
+        Bucket sizes in seconds. Every level must be a multiple of the
+        smallest one.
+
+    Returns
+    -------
+    dict[int, OverviewLevel]
+        Mapping of level to its overview.
+    """
+    indexes: list[np.ndarray] = []
+    values: list[np.ndarray] = []
+    levels = sorted(levels)
+    finest = levels[0]
+    for tr in stream:
+        tr: Trace
+        if tr.stats.npts == 0:
+            continue
+        data = np.ma.getdata(tr.data).astype(np.float64)
+        valid = ~np.ma.getmaskarray(tr.data)
+        t0 = tr.stats.starttime.ns
+        delta = 1e9 / tr.stats.sampling_rate
+        times = t0 + np.round(np.arange(tr.stats.npts) * delta).astype(np.int64)
+        indexes.append((times // (finest * 1_000_000_000))[valid])
+        values.append(data[valid])
+
+    if len(indexes) == 0:
+        return {level: OverviewLevel.empty(level) for level in levels}
+
+    index = np.concatenate(indexes)
+    data = np.concatenate(values)
+    result = {
+        finest: _reduce(
+            finest, index, data, data, data, np.ones(len(data), dtype=np.int64)
+        )
+    }
+    for level in levels[1:]:
+        result[level] = result[finest].downsample(level)
+    return result
@@ -0,0 +1,354 @@
+import hashlib
+import io
+import logging
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from obspy import read
+
+from waveview.inventory.datastream import (
+    BufferType,
+    UUIDType,
+    WaveformBuffer,
+    decode_rows,
+    to_nanoseconds,
+)
+from waveview.inventory.models.datasource import DataSource, DataSourceType, SDSData
+
+logger = logging.getLogger(__name__)
+
+FIXED_HEADER_SIZE = 48
+
+# Records are stored in the day file of their start time, so a record
+# starting shortly before midnight may hold data of the next day.
+DAY_MARGIN = timedelta(hours=1)
+
+RECORD_INDEX_DTYPE = np.dtype(
+    [
+        ("start", "i8"),
+        ("end", "i8"),
+        ("offset", "i8"),
+        ("length", "i4"),
+    ]
+)
+
+
+def get_sample_rate(factor: int, multiplier: int) -> float:
+    """
+    Get the sample rate from the SEED sample rate factor and multiplier.
+    """
+    if factor == 0 or multiplier == 0:
+        return 0.0
+    if factor > 0 and multiplier > 0:
+        return float(factor * multiplier)
+    if factor > 0:
+        return -factor / multiplier
+    if multiplier > 0:
+        return -multiplier / factor
+    return 1 / (factor * multiplier)
+
+
+def parse_record_header(
+    buf: bytes | mmap.mmap, offset: int
+) -> tuple[int, int, float, int] | None:
+    """
+    Parse the fixed header and blockettes of a MiniSEED 2 record.
+
+    Returns a tuple of (start time in nanoseconds, number of samples, sample
+    rate, record length), or None if the record has no blockette 1000 and
+    its length cannot be determined.
+    """
+    year = struct.unpack_from(">H", buf, offset + 20)[0]
+    order = ">" if 1900 <= year <= 2500 else "<"
+    (
+        year,
+        doy,
+        hour,
+        minute,
+        second,
+        __,
+        fract,
+        npts,
+        factor,
+        multiplier,
+        activity,
+        __,
+        __,
+        nblockettes,
+        correction,
+        __,
+        blockette,
+    ) = struct.unpack_from(order + "HHBBBBHHhhBBBBiHH", buf, offset + 20)
+
+    days = (date(year, 1, 1) - date(1970, 1, 1)).days + doy - 1
+    seconds = days * 86400 + hour * 3600 + minute * 60 + second
+    start = seconds * 1_000_000_000 + fract * 100_000
+    if correction and not activity & 0x02:
+        start += correction * 100_000
+    sample_rate = get_sample_rate(factor, multiplier)
+
+    length = None
+    for __ in range(nblockettes):
+        if not blockette or blockette + 4 > len(buf) - offset:
+            break
+        kind, following = struct.unpack_from(order + "HH", buf, offset + blockette)
+        if kind == 100:
+            sample_rate = struct.unpack_from(order + "f", buf, offset + blockette + 4)[
+                0
+            ]
+        elif kind == 1000:
+            length = 1 << buf[offset + blockette + 6]
+        elif kind == 1001:
+            start += struct.unpack_from("b", buf, offset + blockette + 5)[0] * 1000
+        blockette = following
+
+    if length is None:
+        return None
+    return start, npts, sample_rate, length
+
+
+def build_record_index(buf: bytes | mmap.mmap, offset: int = 0) -> np.ndarray:
+    """
+    Build the record index of a MiniSEED file starting at byte ``offset``.
+    Records without samples, e.g. log records, are skipped.
+    """
+    entries = []
+    size = len(buf)
+    while offset + FIXED_HEADER_SIZE <= size:
+        header = parse_record_header(buf, offset)
+        if header is None:
+            logger.warning(f"Record at offset {offset} has no blockette 1000.")
+            break
+        start, npts, sample_rate, length = header
+        if offset + length > size:
+            break
+        if npts > 0 and sample_rate > 0:
+            end = start + round((npts - 1) / sample_rate * 1e9)
+            entries.append((start, end, offset, length))
+        offset += length
+    return np.array(entries, dtype=RECORD_INDEX_DTYPE)
+
+
+class RecordIndexCache:
+    """
+    Record indexes of MiniSEED files, persisted on disk.
+
+    Each index is stored in ``index_dir`` together with the modification time
+    and size of the file it was built from. A stale index of a file that only
+    grew, e.g. the day file being written by the archiver, is extended from
+    its last record instead of being rebuilt.
+    """
+
+    def __init__(self, index_dir: Path | None = None, max_entries: int = 256) -> None:
+        self._index_dir = index_dir
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[int, int, np.ndarray]] = OrderedDict()
+
+    @property
+    def index_dir(self) -> Path:
+        if self._index_dir is None:
+            return Path(settings.SDS_INDEX_DIR)
+        return self._index_dir
+
+    def get_index_path(self, path: str) -> Path:
+        digest = hashlib.sha1(path.encode("utf-8")).hexdigest()
+        return self.index_dir / f"{digest}.npz"
+
+    def load(self, path: str) -> tuple[int, int, np.ndarray] | None:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+                return entry
+        try:
+            with np.load(self.get_index_path(path)) as f:
+                mtime, size = f["meta"].tolist()
+                return mtime, size, f["index"]
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, path: str, mtime: int, size: int, index: np.ndarray) -> None:
+        with self._lock:
+            self._entries[path] = (mtime, size, index)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            target = self.get_index_path(path)
+            tmp = target.with_suffix(f".{os.getpid()}.tmp.npz")
+            np.savez(tmp, meta=np.array([mtime, size], dtype=np.int64), index=index)
+            os.replace(tmp, target)
+        except OSError as e:
+            logger.warning(f"Failed to save record index of {path}: {e}")
+
+    def get(self, path: str, buf: mmap.mmap, mtime: int) -> np.ndarray:
+        """
+        Get the record index of the memory-mapped file at ``path``.
+        """
+        size = len(buf)
+        cached = self.load(path)
+        if cached is not None:
+            cached_mtime, cached_size, index = cached
+            if cached_mtime == mtime and cached_size == size:
+                return index
+            if cached_size < size:
+                offset = int((index["offset"] + index["length"]).max(initial=0))
+                index = np.concatenate([index, build_record_index(buf, offset)])
+                self.save(path, mtime, size, index)
+                return index
+
+        index = build_record_index(buf)
+        self.save(path, mtime, size, index)
+        return index
+
+
+record_index_cache = RecordIndexCache()
+
+
+class SDSArchive:
+    """
+    Read waveform data from an SDS (SeisComP Data Structure) archive of
+    MiniSEED day files.
+
+    Day files are memory-mapped and only the records overlapping the
+    requested time range are decoded.
+    """
+
+    def __init__(self, root: str, index_cache: RecordIndexCache | None = None) -> None:
+        self.root = Path(root)
+        self.index_cache = index_cache or record_index_cache
+
+    def get_path(self, stream_id: str, day: date) -> Path:
+        """
+        Get the path of the day file of a stream, i.e.
+        ``YEAR/NET/STA/CHAN.D/NET.STA.LOC.CHAN.D.YEAR.DAY``.
+        """
+        network, station, location, channel = stream_id.split(".")
+        year = day.year
+        doy = day.timetuple().tm_yday
+        return (
+            self.root
+            / str(year)
+            / network
+            / station
+            / f"{channel}.D"
+            / f"{network}.{station}.{location}.{channel}.D.{year}.{doy:03d}"
+        )
+
+    def read_records(self, path: Path, start: int, end: int) -> bytes:
+        """
+        Read the raw records of a day file overlapping [start, end] given in
+        nanoseconds since the epoch.
+        """
+        try:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_size == 0:
+                    return b""
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    index = self.index_cache.get(str(path), buf, stat.st_mtime_ns)
+                    selected = index[(index["end"] >= start) & (index["start"] <= end)]
+                    return b"".join(
+                        buf[offset : offset + length]
+                        for offset, length in zip(
+                            selected["offset"].tolist(), selected["length"].tolist()
+                        )
+                    )
+        except FileNotFoundError:
+            return b""
+
+    def get_rows(
+        self, stream_id: str, start: datetime, end: datetime
+    ) -> list[BufferType]:
+        """
+        Get decoded rows of the records overlapping the time range, sorted by
+        start time. Buffers hold the decoded samples.
+        """
+        start_ns = to_nanoseconds(start)
+        end_ns = to_nanoseconds(end)
+        day = (start - DAY_MARGIN).date()
+        records = []
+        while day <= end.date():
+            data = self.read_records(self.get_path(stream_id, day), start_ns, end_ns)
+            if data:
+                records.append(data)
+            day += timedelta(days=1)
+        if not records:
+            return []
+
+        try:
+            stream = read(io.BytesIO(b"".join(records)), format="MSEED")
+        except Exception as e:
+            logger.error(f"Failed to decode records of {stream_id}: {e}")
+            return []
+
+        stream.sort(keys=["starttime"])
+        return [
+            (
+                trace.stats.starttime.datetime,
+                trace.stats.endtime.datetime,
+                trace.stats.sampling_rate,
+                str(trace.data.dtype),
+                trace.data,
+            )
+            for trace in stream
+        ]
+
+    def get_buffer(
+        self, stream_id: str, start: datetime, end: datetime
+    ) -> WaveformBuffer | None:
+        """
+        Get waveform data of a stream in the time range as a single
+        contiguous buffer, or None if there is no data in the range.
+
+        Parameters
+        ----------
+        stream_id : str
+            Stream ID, e.g. 'IU.ANMO.00.BHZ'.
+        start : datetime
+            Start time in UTC.
+        end : datetime
+            End time in UTC.
+
+        Returns
+        -------
+        WaveformBuffer | None
+            Waveform buffer, or None if there is no data in the range.
+        """
+        rows = self.get_rows(stream_id, start, end)
+        return decode_rows(rows, start, end)
+
+    def __repr__(self) -> str:
+        return f"SDSArchive(root={str(self.root)!r})"
+
+
+def get_archive(channel_id: UUIDType) -> SDSArchive | None:
+    """
+    Get the SDS archive of the inventory a channel belongs to, or None if the
+    inventory has no SDS data source.
+    """
+    source = (
+        DataSource.objects.filter(
+            source=DataSourceType.SDS,
+            inventory__network__station__channel__id=channel_id,
+        )
+        .order_by("created_at")
+        .first()
+    )
+    if source is None:
+        return None
+    try:
+        data = SDSData(**source.data)
+    except TypeError:
+        logger.error(f"Invalid SDS data source {source.id}: {source.data}")
+        return None
+    return SDSArchive(data.root)
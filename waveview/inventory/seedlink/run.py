@@ -1,11 +1,23 @@
 import logging
+import threading
 import time
+from collections import defaultdict
+from uuid import UUID
 
+from django.conf import settings
+from django.db import connection
 from obspy import Trace
 from obspy.clients.seedlink.slpacket import SLPacket
 
+from waveview.inventory.availability import SegmentType, merge_segments
+from waveview.inventory.compression import registry
 from waveview.inventory.datastream import prepare_buffer
-from waveview.inventory.models import Channel, Inventory
+from waveview.inventory.models import (
+    Channel,
+    ChannelLatestPacket,
+    DataAvailability,
+    Inventory,
+)
 from waveview.inventory.models.datasource import DataSource, DataSourceType
 from waveview.inventory.seedlink.client import EasySeedLinkClient, get_statefile
 
@@ -13,12 +25,60 @@ logger = logging.getLogger(__name__)
 
 
 class SeedLinkClient(EasySeedLinkClient):
+    """
+    SeedLink client that inserts every packet into its channel's datastream
+    table. Latest packets and availability segments are collected in memory
+    and written by a background thread every SEEDLINK_FLUSH_INTERVAL seconds,
+    and when the client is closed, so the ingest path costs one insert per
+    packet.
+    """
+
+    def __init__(
+        self, server_url: str, autoconnect: bool = True, debug: bool = False
+    ) -> None:
+        super().__init__(server_url, autoconnect=autoconnect, debug=debug)
+        self.channels: dict[tuple[str, str, str], Channel] = {}
+        self.packets: dict[UUID, SegmentType] = {}
+        self.segments: dict[UUID, list[SegmentType]] = defaultdict(list)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.flusher = threading.Thread(
+            target=self._run_flusher, name="seedlink-flush", daemon=True
+        )
+
+    def run(self) -> None:
+        if not self.flusher.is_alive() and not self.stopped.is_set():
+            self.flusher.start()
+        super().run()
+
+    def _run_flusher(self) -> None:
+        try:
+            while not self.stopped.wait(settings.SEEDLINK_FLUSH_INTERVAL):
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Error flushing packet metadata: {e}")
+        finally:
+            # Database connections are per thread.
+            connection.close()
+
     def on_data(self, packet: SLPacket) -> None:
         try:
             self._on_data(packet)
         except Exception as e:
             logger.error(f"Error processing packet: {e}")
 
+    def get_channel(self, network: str, station: str, channel: str) -> Channel | None:
+        key = (network, station, channel)
+        instance = self.channels.get(key)
+        if instance is None:
+            instance = Channel.objects.filter(
+                code=channel, station__code=station, station__network__code=network
+            ).first()
+            if instance is not None:
+                self.channels[key] = instance
+        return instance
+
     def _on_data(self, packet: SLPacket) -> None:
         trace: Trace = packet.get_trace()
         if self.debug:
@@ -27,17 +87,50 @@ class SeedLinkClient(EasySeedLinkClient):
         station: str = trace.stats.station
         channel: str = trace.stats.channel
 
-        instance = Channel.objects.filter(
-            code=channel, station__code=station, station__network__code=network
-        ).first()
+        instance = self.get_channel(network, station, channel)
         if not instance:
             logger.error(f"Channel {network}.{station}.{channel} not found.")
             return
 
         table = instance.get_datastream_id()
-        st, et, sr, dtype, buf = prepare_buffer(trace)
+        dict_id = registry.get_active(instance.id, str(trace.data.dtype))
+        st, et, sr, dtype, buf = prepare_buffer(trace, dict_id=dict_id)
         self.schema.insert(table, st, et, sr, dtype, buf)
 
+        with self.lock:
+            latest = self.packets.get(instance.id)
+            if latest is None or latest[0] <= st:
+                self.packets[instance.id] = (st, et, sr)
+            self.segments[instance.id].append((st, et, sr))
+
+    def flush(self) -> None:
+        """
+        Write the latest packets and availability segments collected since
+        the last flush. Contiguous packets are merged first, so a channel
+        streaming without gaps costs one availability update per flush.
+        """
+        with self.lock:
+            packets, self.packets = self.packets, {}
+            segments, self.segments = self.segments, defaultdict(list)
+
+        ChannelLatestPacket.objects.update_packets(
+            [(channel_id, *packet) for channel_id, packet in packets.items()]
+        )
+        for channel_id, items in segments.items():
+            for start, end, sample_rate in merge_segments(items):
+                DataAvailability.objects.add_segment(
+                    channel_id, start, end, sample_rate
+                )
+
+    def close(self) -> None:
+        self.stopped.set()
+        if self.flusher.is_alive():
+            self.flusher.join()
+        try:
+            self.flush()
+        finally:
+            super().close()
+
 
 def run_seedlink(inventory_id: str, debug: bool = False) -> None:
     datasource = DataSource.objects.filter(
@@ -4,8 +4,9 @@ from django.db import connection
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from waveview.inventory.datastream import DataStream
 from waveview.inventory.db.schema import TimescaleSchemaEditor
-from waveview.inventory.models import InventoryFile
+from waveview.inventory.models import DataStreamPolicy, InventoryFile
 from waveview.inventory.models.channel import Channel
 from waveview.tasks.update_inventory import update_inventory
 
@@ -17,6 +18,9 @@ def channel_post_save(sender: Any, instance: Channel, **kwargs: Dict[str, Any])
     if not schema.is_table_exists(table):
         schema.create_table(table)
         schema.create_hypertable(table)
+        DataStream(connection).apply_policy(instance)
+    if not schema.is_table_exists(schema.get_overview_table(table)):
+        schema.create_overview_table(table)
 
 
 @receiver(post_delete, sender=Channel)
@@ -26,6 +30,39 @@ def channel_post_delete(
     schema = TimescaleSchemaEditor(connection, atomic=True)
     table = instance.get_datastream_id()
     schema.drop_table(table)
+    schema.drop_overview_table(table)
+
+
+def apply_policies(policy: DataStreamPolicy) -> None:
+    """
+    Apply the effective policies of the channels covered by a policy, e.g.
+    after it is saved or deleted.
+    """
+    if policy.channel_id:
+        channels = Channel.objects.filter(id=policy.channel_id)
+    else:
+        channels = Channel.objects.filter(
+            station__network__inventory_id=policy.inventory_id
+        )
+    datastream = DataStream(connection)
+    for channel in channels.select_related("station__network"):
+        if datastream.db.is_table_exists(channel.get_datastream_id()):
+            datastream.apply_policy(channel)
+
+
+@receiver(post_save, sender=DataStreamPolicy)
+def datastream_policy_post_save(
+    sender: Any, instance: DataStreamPolicy, **kwargs: Dict[str, Any]
+) -> None:
+    apply_policies(instance)
+
+
+@receiver(post_delete, sender=DataStreamPolicy)
+def datastream_policy_post_delete(
+    sender: Any, instance: DataStreamPolicy, **kwargs: Dict[str, Any]
+) -> None:
+    # Fall back to the inventory policy or the default settings.
+    apply_policies(instance)
 
 
 @receiver(post_save, sender=InventoryFile)
@@ -28,6 +28,12 @@ RUN_DIR.mkdir(exist_ok=True, parents=True)
 DB_DIR = STORAGE_DIR / "db"
 DB_DIR.mkdir(exist_ok=True, parents=True)
 
+SDS_INDEX_DIR = STORAGE_DIR / "sds"
+SDS_INDEX_DIR.mkdir(exist_ok=True, parents=True)
+
+COLD_STORAGE_DIR = Path(env("COLD_STORAGE_DIR", default=str(STORAGE_DIR / "cold")))
+COLD_STORAGE_DIR.mkdir(exist_ok=True, parents=True)
+
 PREREQUISITE_APPS = [
     "daphne",
     "django.contrib.admin",
@@ -319,10 +325,26 @@ CELERY_IMPORTS = (
     "waveview.tasks.send_email",
     "waveview.tasks.send_trace_buffer",
     "waveview.tasks.update_inventory",
+    "waveview.tasks.update_overview",
+    "waveview.tasks.compact_datastream",
+    "waveview.tasks.export_cold_storage",
     "waveview.contrib.autopicker.task",
 )
 CELERYBEAT_SCHEDULE_FILENAME = str(Path(tempfile.gettempdir()) / "waveview-celerybeat")
-CELERYBEAT_SCHEDULE = {}
+CELERYBEAT_SCHEDULE = {
+    "update-datastream-overview": {
+        "task": "waveview.tasks.update_overview",
+        "schedule": timedelta(minutes=1),
+    },
+    "compact-datastream": {
+        "task": "waveview.tasks.compact_datastream",
+        "schedule": timedelta(minutes=10),
+    },
+    "export-cold-storage": {
+        "task": "waveview.tasks.export_cold_storage",
+        "schedule": timedelta(hours=6),
+    },
+}
 
 redis = urlparse(REDIS_URL)
 CHANNEL_LAYERS = {
@@ -347,6 +369,82 @@ AMPLITUDE_CALCULATOR_REGISTRY = [
     "waveview.contrib.bpptkg.amplitude.BPPTKGAmplitudeCalculator",
 ]
 
+# Zstd compression level of datastream chunks.
+DATASTREAM_COMPRESSION_LEVEL = env.int("DATASTREAM_COMPRESSION_LEVEL", default=3)
+
+# Zstd compression level of stream and spectrogram messages sent to clients.
+STREAM_COMPRESSION_LEVEL = env.int("STREAM_COMPRESSION_LEVEL", default=3)
+
+# Maximum size in bytes of the in-process cache of decoded datastream chunks.
+# Set to 0 to disable the cache.
+DATASTREAM_CHUNK_CACHE_SIZE = env.int(
+    "DATASTREAM_CHUNK_CACHE_SIZE", default=128 * 1024 * 1024
+)
+
+# Default margin in seconds filtered on both sides of a stream.filter range and
+# then discarded, so adjacent ranges join without taper or filter edge effects.
+# With a margin the taper is kept within it. Disabled by default, so the taper
+# covers the requested range as before. Clients can also send their own.
+DATASTREAM_FILTER_PADDING = env.float("DATASTREAM_FILTER_PADDING", default=0.0)
+
+# Maximum size in bytes of the in-process cache of spectrogram STFT columns.
+# Set to 0 to disable the cache.
+SPECTROGRAM_COLUMN_CACHE_SIZE = env.int(
+    "SPECTROGRAM_COLUMN_CACHE_SIZE", default=64 * 1024 * 1024
+)
+
+# Block size in seconds datastream rows are repacked into by the compactor, and
+# the age in minutes after which a time range is considered closed. Each run
+# compacts the closed range of the last DATASTREAM_COMPACT_LOOKBACK minutes.
+# Readers look back DATASTREAM_COMPACT_BLOCK_SIZE seconds for rows overlapping a
+# range, so do not lower it below the block size of rows already compacted.
+DATASTREAM_COMPACT_BLOCK_SIZE = env.int("DATASTREAM_COMPACT_BLOCK_SIZE", default=300)
+DATASTREAM_COMPACT_AFTER = env.int("DATASTREAM_COMPACT_AFTER", default=10)
+DATASTREAM_COMPACT_LOOKBACK = env.int("DATASTREAM_COMPACT_LOOKBACK", default=60)
+
+# Tile sizes in seconds accepted by the stream.tile command, the cache alias
+# tiles are stored in, and their timeouts in seconds. Tiles that ended more than
+# DATASTREAM_TILE_SETTLE_DELAY seconds ago get DATASTREAM_TILE_TIMEOUT, tiles at
+# the live edge get DATASTREAM_TILE_LIVE_TIMEOUT.
+DATASTREAM_TILE_SIZES = env.list(
+    "DATASTREAM_TILE_SIZES", cast=int, default=[10, 60, 300, 1800, 10800, 86400]
+)
+DATASTREAM_TILE_CACHE = env("DATASTREAM_TILE_CACHE", default="default")
+DATASTREAM_TILE_TIMEOUT = env.int("DATASTREAM_TILE_TIMEOUT", default=86400)
+DATASTREAM_TILE_LIVE_TIMEOUT = env.int("DATASTREAM_TILE_LIVE_TIMEOUT", default=5)
+DATASTREAM_TILE_SETTLE_DELAY = env.int("DATASTREAM_TILE_SETTLE_DELAY", default=120)
+
+# Default age in days after which datastream chunks are compressed, and after
+# which they are dropped. Both are disabled by default. Inventories and channels
+# can opt in with a DataStreamPolicy, e.g. with the datastream_policy command.
+DATASTREAM_COMPRESS_AFTER_DAYS = env.float(
+    "DATASTREAM_COMPRESS_AFTER_DAYS", default=None
+)
+DATASTREAM_RETENTION_DAYS = env.float("DATASTREAM_RETENTION_DAYS", default=None)
+
+# Age in days after which whole days of datastream rows are exported to files
+# in COLD_STORAGE_DIR and deleted from the hypertables. Set to empty to disable.
+# It must be shorter than the retention, or rows are dropped before export.
+# Cold storage files are only read while it is set, so keep it set as long as
+# files exist in COLD_STORAGE_DIR.
+DATASTREAM_COLD_AFTER_DAYS = env.int("DATASTREAM_COLD_AFTER_DAYS", default=None)
+
+# Bucket sizes in seconds of the min/max overview levels of datastream tables.
+# Every level must be a multiple of the smallest one.
+DATASTREAM_OVERVIEW_LEVELS = env.list(
+    "DATASTREAM_OVERVIEW_LEVELS", cast=int, default=[1, 10, 60]
+)
+# Minimum window duration in seconds for which the fetcher reads the overview
+# levels instead of raw samples.
+DATASTREAM_OVERVIEW_MIN_DURATION = env.float(
+    "DATASTREAM_OVERVIEW_MIN_DURATION", default=600
+)
+
+# Interval in seconds at which a background thread of the seedlink ingester
+# writes the latest packets and availability segments of the packets received
+# since the last write. Pending ones are also written when the client closes.
+SEEDLINK_FLUSH_INTERVAL = env.float("SEEDLINK_FLUSH_INTERVAL", default=5)
+
 SINOAS_WINSTON_URL = env("SINOAS_WINSTON_URL", default="http://127.0.0.1:16030")
 BMA_URL = env("BMA_URL", default="https://bma.cendana15.com")
 BMA_API_KEY = env("BMA_API_KEY", default="")
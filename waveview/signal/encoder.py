@@ -1,17 +1,92 @@
+import enum
+import functools
 import io
 import struct
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
-import zstandard as zstd
+from django.conf import settings
 from matplotlib.colors import LinearSegmentedColormap, Normalize
 from obspy import Trace
+from PIL import Image
+
+from waveview.inventory import compression
+
+if TYPE_CHECKING:
+    from waveview.inventory.datastream import WaveformBuffer
 
 matplotlib.use("Agg")
 
 
+def get_stream_version(raw: dict) -> int:
+    """
+    Get the stream message version requested by a client. Clients that do not
+    ask for one, or ask for an unknown one, get version 0.
+    """
+    version = raw.get("encoderVersion", 0)
+    if version not in STREAM_VERSIONS:
+        return 0
+    return version
+
+
+class SpectrogramFormat(enum.StrEnum):
+    PNG = "png"
+    RASTER = "raster"
+    MATRIX = "matrix"
+
+
+def get_spectrogram_format(raw: dict) -> SpectrogramFormat:
+    """
+    Get the spectrogram payload format requested by a client. Clients that do
+    not ask for one, or ask for an unknown one, get PNG images rendered with
+    matplotlib. ``raster`` PNG images are rendered at the requested size
+    without matplotlib.
+    """
+    try:
+        return SpectrogramFormat(raw.get("format", SpectrogramFormat.PNG))
+    except ValueError:
+        return SpectrogramFormat.PNG
+
+
+def quantize_spectrogram(specgram: np.ndarray, norm: Normalize) -> np.ndarray:
+    """
+    Quantize spectrogram values to uint8 between the norm bounds, so 0 maps to
+    ``norm.vmin`` and 255 to ``norm.vmax``. Values outside are clipped and
+    NaN values, e.g. blank gap columns, map to 0.
+    """
+    vmin, vmax = float(norm.vmin), float(norm.vmax)
+    scale = 255 / (vmax - vmin) if vmax > vmin else 0.0
+    with np.errstate(invalid="ignore"):
+        scaled = np.nan_to_num((specgram - vmin) * scale, nan=0, posinf=255, neginf=0)
+    return np.rint(np.clip(scaled, 0, 255)).astype(np.uint8)
+
+
+def get_nbytes(part: bytes | bytearray | np.ndarray) -> int:
+    return part.nbytes if isinstance(part, np.ndarray) else len(part)
+
+
+def compress_parts(parts: list[bytes | bytearray | np.ndarray]) -> bytes:
+    """
+    Compress the concatenation of the parts into a single zstd frame without
+    concatenating them first. The frame records the content size, so it can
+    be decompressed in one call.
+    """
+    size = sum(get_nbytes(part) for part in parts)
+    compressor = compression.get_compressor(level=settings.STREAM_COMPRESSION_LEVEL)
+    cobj = compressor.compressobj(size=size)
+    chunks = [
+        cobj.compress(
+            np.ascontiguousarray(part) if isinstance(part, np.ndarray) else part
+        )
+        for part in parts
+    ]
+    chunks.append(cobj.flush())
+    return b"".join(chunks)
+
+
 def pad(a: bytes, n: int) -> bytes:
     if len(a) >= n:
         return a[:n]
@@ -26,6 +101,7 @@ class StreamData:
     start: int
     end: int
     trace: Trace | None
+    buffer: "WaveformBuffer | None" = None
 
 
 @dataclass
@@ -43,6 +119,84 @@ class SpectrogramData:
     width: int
     height: int
     command: str = "stream.spectrogram"
+    format: str = "png"
+
+
+STREAM_VERSIONS = (0, 1)
+
+# version, request ID, command, channel ID, start, end, time, sampling rate,
+# number of samples, min and max value.
+STREAM_HEADER = struct.Struct("<i64s64s64sqqdfiff")
+# Sample format, scale and offset of version 1 samples.
+SAMPLES_HEADER = struct.Struct("<Bdd")
+# version, request ID, command, channel ID, start, end, time min, time max,
+# frequency min, frequency max, time length, frequency length, min and max
+# value.
+SPECTROGRAM_HEADER = struct.Struct("<i64s64s64sqqddddiiff")
+# Norm bounds of the quantized matrix of spectrogram packets of version 1.
+SPECTROGRAM_NORM = struct.Struct("<dd")
+MULTI_MAGIC = b"WVMF"
+MULTI_HEADER = struct.Struct("<4sI")
+FRAME_LENGTH = struct.Struct("<I")
+
+SAMPLE_FORMAT_INT16 = 1
+SAMPLE_FORMAT_INT32 = 2
+
+# Number of levels float samples are quantized to in version 1 if the request
+# does not ask for a coarser quantization.
+DEFAULT_QUANTIZE_LEVELS = 65536
+
+
+def quantize_samples(
+    data: np.ndarray, gaps: np.ndarray, levels: int | None = None
+) -> tuple[np.ndarray, float, float]:
+    """
+    Quantize samples to integers ``q`` such that ``data ~ offset + scale * q``.
+
+    Integer samples are kept exactly unless ``levels`` is given. Otherwise
+    samples are mapped onto ``levels`` steps between their min and max. Gaps
+    take the value of the previous valid sample, so they cost nothing after
+    delta encoding.
+    """
+    n = len(data)
+    valid = ~gaps
+    if np.issubdtype(data.dtype, np.floating):
+        valid &= np.isfinite(data)
+    if not valid.any():
+        return np.zeros(n, dtype=np.int64), 1.0, 0.0
+
+    if levels is None and np.issubdtype(data.dtype, np.integer):
+        q = data.astype(np.int64)
+        scale, offset = 1.0, 0.0
+    else:
+        levels = levels or DEFAULT_QUANTIZE_LEVELS
+        lo = float(np.min(data[valid]))
+        hi = float(np.max(data[valid]))
+        scale = (hi - lo) / (levels - 1) if hi > lo and levels > 1 else 1.0
+        offset = lo
+        q = np.zeros(n, dtype=np.int64)
+        q[valid] = np.rint((data[valid] - lo) / scale).astype(np.int64)
+
+    if not valid.all():
+        index = np.where(valid, np.arange(n), np.argmax(valid))
+        q = q[np.maximum.accumulate(index)]
+    return q, scale, offset
+
+
+def encode_deltas(q: np.ndarray) -> tuple[int, np.ndarray] | None:
+    """
+    Delta encode quantized samples with the smallest integer type that fits.
+    The first delta is the first sample. Returns None if int32 is too small.
+    """
+    deltas = np.diff(q, prepend=0)
+    if len(deltas) == 0:
+        return SAMPLE_FORMAT_INT16, deltas.astype("<i2")
+    lo, hi = deltas.min(), deltas.max()
+    if lo >= np.iinfo(np.int16).min and hi <= np.iinfo(np.int16).max:
+        return SAMPLE_FORMAT_INT16, deltas.astype("<i2")
+    if lo >= np.iinfo(np.int32).min and hi <= np.iinfo(np.int32).max:
+        return SAMPLE_FORMAT_INT32, deltas.astype("<i4")
+    return None
 
 
 def get_cmap() -> LinearSegmentedColormap:
@@ -110,30 +264,174 @@ def generate_image(
     fig.tight_layout(pad=0)
     buf = io.BytesIO()
     fig.savefig(buf, format="png", transparent=True, bbox_inches="tight", pad_inches=0)
+    plt.close(fig)
     buf.seek(0)
     return buf.read()
 
 
+@functools.lru_cache(maxsize=1)
+def get_colormap_lut() -> np.ndarray:
+    """
+    Get the spectrogram colormap as a 256-entry RGBA lookup table.
+    """
+    return (get_cmap()(np.linspace(0, 1, 256)) * 255).round().astype(np.uint8)
+
+
+def interpolate_axis(
+    data: np.ndarray, coords: np.ndarray, points: np.ndarray, axis: int
+) -> np.ndarray:
+    """
+    Linearly interpolate data along an axis at the given points. Points
+    outside the coordinates take the edge values.
+    """
+    if len(coords) == 1:
+        return np.repeat(data, len(points), axis=axis)
+    pos = np.interp(points, coords, np.arange(len(coords)))
+    i0 = np.minimum(np.floor(pos).astype(np.intp), len(coords) - 2)
+    frac = pos - i0
+    shape = [1, 1]
+    shape[axis] = len(points)
+    frac = frac.reshape(shape)
+    a = np.take(data, i0, axis=axis)
+    b = np.take(data, i0 + 1, axis=axis)
+    return a + (b - a) * frac
+
+
+def render_image(
+    specgram: np.ndarray,
+    time: np.ndarray,
+    freq: np.ndarray,
+    norm: Normalize,
+    tmin: float,
+    tmax: float,
+    width: int | None = None,
+    height: int | None = None,
+) -> bytes:
+    """
+    Render a spectrogram PNG image without matplotlib.
+
+    It draws the same view as :func:`generate_image`: time from ``tmin`` to
+    ``tmax`` and frequency from 0 to ``freq.max()``, with the highest
+    frequency at the top. The normalized values are resized with separable
+    linear interpolation, mapped through the colormap lookup table and
+    encoded directly. NaN values, e.g. blank gap columns, are transparent.
+
+    Parameters
+    ----------
+    specgram : np.ndarray
+        The spectrogram data, one row per frequency.
+    time : np.ndarray
+        The offset time of the spectrogram, e.g. array([0.5, 1.5, 2.5, ...]).
+    freq : np.ndarray
+        The frequency of the spectrogram, e.g. array([0, 1, 2, 3, ...]).
+    norm : Normalize
+        The normalization object.
+    tmin : float
+        The minimum time of the image.
+    tmax : float
+        The maximum time of the image.
+    width : int, optional
+        Image width in pixels. Defaults to 5 pixels per time bin.
+    height : int, optional
+        Image height in pixels. Defaults to 5 pixels per frequency bin.
+    """
+    pixels_per_bin = 5
+    width = max(1, width or len(time) * pixels_per_bin)
+    height = max(1, height or len(freq) * pixels_per_bin)
+
+    vmin, vmax = float(norm.vmin), float(norm.vmax)
+    scale = 1 / (vmax - vmin) if vmax > vmin else 0.0
+    blank = np.isnan(specgram).astype(np.float64)
+    values = np.nan_to_num((specgram - vmin) * scale, nan=0, posinf=1, neginf=0)
+
+    x = tmin + (np.arange(width) + 0.5) * (tmax - tmin) / width
+    y = freq.max() * (1 - (np.arange(height) + 0.5) / height)
+    values = interpolate_axis(values, time, x, axis=1)
+    values = interpolate_axis(values, freq, y, axis=0)
+
+    index = np.rint(np.clip(values, 0, 1) * 255).astype(np.uint8)
+    rgba = get_colormap_lut()[index]
+    if blank.any():
+        # Blank gap columns are transparent.
+        blank = interpolate_axis(interpolate_axis(blank, time, x, axis=1), freq, y, 0)
+        rgba[blank > 0.5, 3] = 0
+    image = Image.fromarray(rgba)
+    buf = io.BytesIO()
+    image.save(buf, format="png", compress_level=1)
+    return buf.getvalue()
+
+
 class StreamEncoder:
-    version: int = 0
+    """
+    Encode stream and spectrogram messages sent over the websocket.
+
+    Stream messages of version 0 carry float32 samples. Version 1 carries
+    delta encoded int16 or int32 samples, optionally quantized to
+    ``quantize`` levels, e.g. the pixel height of the plot, with the scale
+    and offset to restore them in the header.
+    """
+
+    def __init__(self, version: int = 0, quantize: int | None = None) -> None:
+        if version not in STREAM_VERSIONS:
+            raise ValueError(f"Unsupported encoder version: {version}")
+        self.version = version
+        self.quantize = quantize
 
     def encode_stream(self, data: StreamData) -> bytes:
-        request_id = pad(data.request_id.encode("utf-8"), 64)
-        command = pad(data.command.encode("utf-8"), 64)
-        channel_id = pad(data.channel_id.encode("utf-8"), 64)
+        return compress_parts(self.stream_parts(data))
 
-        if data.trace is None or data.trace.stats.npts == 0:
+    def encode_streams(self, items: list[StreamData]) -> bytes:
+        """
+        Encode several stream messages, e.g. of several channels, into one
+        compressed message. It starts with the magic ``WVMF`` and the number
+        of frames, followed by each frame prefixed with its uint32 length.
+        Each frame is an uncompressed stream message.
+        """
+        parts: list[bytes | np.ndarray] = [MULTI_HEADER.pack(MULTI_MAGIC, len(items))]
+        for data in items:
+            frame = self.stream_parts(data)
+            parts.append(FRAME_LENGTH.pack(sum(get_nbytes(part) for part in frame)))
+            parts.extend(frame)
+        return compress_parts(parts)
+
+    def stream_parts(self, data: StreamData) -> list[bytes | np.ndarray]:
+        """
+        Get the parts of an uncompressed stream message. Sample and mask
+        arrays are returned as is, so they are not copied before compression.
+        """
+        if data.buffer is not None and data.buffer.npts > 0:
+            buffer = data.buffer
+            raw = buffer.data
+            values = buffer.data.astype(np.float32, copy=False)
+            mask_bytes = buffer.mask
+            n_samples = values.size
+            time = buffer.starttime.timestamp * 1000
+            sampling_rate = buffer.sampling_rate
+            if buffer.has_gaps:
+                valid = values[~buffer.gaps]
+            else:
+                valid = values
+            if valid.size > 0:
+                min_value = np.nanmin(valid)
+                max_value = np.nanmax(valid)
+            else:
+                # A slice that falls entirely in a gap is sent as an all-gap
+                # part.
+                min_value = 0
+                max_value = 0
+        elif data.trace is None or data.trace.stats.npts == 0:
             time = 0
             n_samples = 0
             sampling_rate = 1
             min_value = 0
             max_value = 0
             values = np.zeros(0, dtype=np.float32)
-            mask = np.zeros(0, dtype=bool)
+            raw = values
             mask_bytes = np.zeros(0, dtype=np.uint8)
         else:
             trace = data.trace
             array = np.ma.masked_array(trace.data)
+            raw = array.data
             values = array.data.astype(np.float32)
             mask = array.mask.astype(bool)
 
@@ -147,28 +445,53 @@ class StreamEncoder:
             min_value = np.nanmin(values)
             max_value = np.nanmax(values)
 
-        binary = b""
-        binary += struct.pack("<i", self.version)
-        binary += request_id
-        binary += command
-        binary += channel_id
-        binary += struct.pack("<qq", data.start, data.end)
-        binary += struct.pack("<d", time)
-        binary += struct.pack("<f", sampling_rate)
-        binary += struct.pack("<i", n_samples)
-        binary += struct.pack("<f", min_value)
-        binary += struct.pack("<f", max_value)
-        binary += values.tobytes()
-        binary += mask_bytes.tobytes()
-
-        compressor = zstd.ZstdCompressor()
-        compressed = compressor.compress(binary)
-        return compressed
+        header = STREAM_HEADER.pack(
+            self.version,
+            data.request_id.encode("utf-8"),
+            data.command.encode("utf-8"),
+            data.channel_id.encode("utf-8"),
+            data.start,
+            data.end,
+            time,
+            sampling_rate,
+            n_samples,
+            min_value,
+            max_value,
+        )
+        if self.version == 1:
+            return [
+                header,
+                *self.encode_samples(raw, mask_bytes, n_samples),
+                mask_bytes,
+            ]
+        return [header, values, mask_bytes]
+
+    def encode_samples(
+        self, raw: np.ndarray, mask: np.ndarray, n_samples: int
+    ) -> tuple[bytes, np.ndarray]:
+        """
+        Encode the samples of a version 1 message: the sample format, scale
+        and offset followed by the delta encoded samples.
+        """
+        gaps = np.unpackbits(mask, count=n_samples).astype(bool)
+        q, scale, offset = quantize_samples(raw, gaps, self.quantize)
+        encoded = encode_deltas(q)
+        if encoded is None:
+            q, scale, offset = quantize_samples(raw, gaps, DEFAULT_QUANTIZE_LEVELS)
+            encoded = encode_deltas(q)
+        sample_format, deltas = encoded
+        return SAMPLES_HEADER.pack(sample_format, scale, offset), deltas
+
+    def replace_request_id(self, data: bytes, request_id: str) -> bytes:
+        """
+        Replace the request ID in the header of an encoded message, so a
+        cached message can be sent in reply to another request.
+        """
+        binary = bytearray(compression.get_decompressor().decompress(data))
+        binary[4:68] = pad(request_id.encode("utf-8"), 64)
+        return compress_parts([binary])
 
     def encode_spectrogram(self, data: SpectrogramData) -> bytes:
-        request_id = pad(data.request_id.encode("utf-8"), 64)
-        command = pad(data.command.encode("utf-8"), 64)
-        channel_id = pad(data.channel_id.encode("utf-8"), 64)
         time_signal = np.arange(data.npoints) / data.sample_rate
 
         freq_length = len(data.freq)
@@ -190,35 +513,67 @@ class StreamEncoder:
         if len(data.data) == 0:
             min_val = 0
             max_val = 0
-            image = b""
         else:
             min_val = data.data.min()
             max_val = data.data.max()
-            image = generate_image(
-                data.data,
-                data.time,
-                data.freq,
-                data.norm,
-                time_signal.min(),
-                time_signal.max(),
-            )
-
-        binary = b""
-        binary += struct.pack("<i", self.version)
-        binary += request_id
-        binary += command
-        binary += channel_id
-        binary += struct.pack("<qq", int(data.start), int(data.end))
-        binary += struct.pack("<d", time_min)
-        binary += struct.pack("<d", time_max)
-        binary += struct.pack("<d", freq_min)
-        binary += struct.pack("<d", freq_max)
-        binary += struct.pack("<i", time_length)
-        binary += struct.pack("<i", freq_length)
-        binary += struct.pack("<f", min_val)
-        binary += struct.pack("<f", max_val)
-        binary += image
-
-        compressor = zstd.ZstdCompressor()
-        compressed = compressor.compress(binary)
-        return compressed
+
+        # Version 0 packets carry a PNG image, version 1 packets the
+        # quantized power matrix for the client to apply the colormap.
+        if data.format == SpectrogramFormat.MATRIX:
+            version = 1
+            if len(data.data) == 0:
+                matrix = np.zeros((0, 0), dtype=np.uint8)
+            else:
+                matrix = quantize_spectrogram(data.data, data.norm)
+            payload = [
+                SPECTROGRAM_NORM.pack(float(data.norm.vmin), float(data.norm.vmax)),
+                data.time.astype("<f4"),
+                data.freq.astype("<f4"),
+                matrix,
+            ]
+        else:
+            version = 0
+            if len(data.data) == 0:
+                payload = [b""]
+            elif data.format == SpectrogramFormat.RASTER:
+                payload = [
+                    render_image(
+                        data.data,
+                        data.time,
+                        data.freq,
+                        data.norm,
+                        time_signal.min(),
+                        time_signal.max(),
+                        width=data.width,
+                        height=data.height,
+                    )
+                ]
+            else:
+                payload = [
+                    generate_image(
+                        data.data,
+                        data.time,
+                        data.freq,
+                        data.norm,
+                        time_signal.min(),
+                        time_signal.max(),
+                    )
+                ]
+
+        header = SPECTROGRAM_HEADER.pack(
+            version,
+            data.request_id.encode("utf-8"),
+            data.command.encode("utf-8"),
+            data.channel_id.encode("utf-8"),
+            int(data.start),
+            int(data.end),
+            time_min,
+            time_max,
+            freq_min,
+            freq_max,
+            time_length,
+            freq_length,
+            min_val,
+            max_val,
+        )
+        return compress_parts([header, *payload])
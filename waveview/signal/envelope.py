@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import numpy as np
+from obspy import Trace, UTCDateTime
+from obspy.core import Stats
+
+from waveview.inventory.datastream import WaveformBuffer
+
+
+def first_match(matches: np.ndarray, group: np.ndarray) -> np.ndarray:
+    """
+    Get the position of the first match of each group. Every group must have
+    at least one match.
+    """
+    positions = np.flatnonzero(matches)
+    __, first = np.unique(group[positions], return_index=True)
+    return positions[first]
+
+
+def compute_envelope(
+    buffer: WaveformBuffer,
+    start: datetime,
+    end: datetime,
+    width: int,
+    demean: bool = False,
+) -> Trace:
+    """
+    Reduce a buffer to the first, min, max and last sample of each pixel
+    (M4 aggregation), so drawing the result as a line is pixel-identical to
+    drawing every sample.
+
+    The time range [start, end) is split into ``width`` pixels. Each pixel is
+    represented by four samples: its first value, its min and max in the
+    order they occur, and its last value. The trace sampling rate is thus
+    ``4 * width / (end - start)``. Pixels without data are masked.
+
+    Parameters
+    ----------
+    buffer : WaveformBuffer
+        Waveform buffer.
+    start : datetime
+        Start time of the first pixel in UTC.
+    end : datetime
+        End time of the last pixel in UTC.
+    width : int
+        Number of pixels.
+    demean : bool, optional
+        Remove the mean of the samples. Default is False.
+
+    Returns
+    -------
+    Trace
+        ObsPy Trace object with four samples per pixel, or without samples if
+        the time range or ``width`` is empty.
+    """
+    t0 = UTCDateTime(start)
+    duration = UTCDateTime(end) - t0
+    if duration <= 0 or width < 1:
+        return Trace(data=np.zeros(0, dtype=np.float64), header={"starttime": t0})
+    data = np.zeros(4 * width, dtype=np.float64)
+    mask = np.ones(4 * width, dtype=bool)
+
+    valid = ~buffer.gaps
+    indices = np.flatnonzero(valid)
+    values = buffer.data[valid].astype(np.float64)
+    if demean and len(values) > 0:
+        values -= values.mean()
+
+    # Pixel of each valid sample. Samples are sorted by time, so pixels are
+    # non-decreasing and each pixel is a contiguous run.
+    offset = buffer.starttime - t0
+    times = offset + indices / buffer.sampling_rate
+    pixels = np.floor(times * width / duration).astype(np.int64)
+    inside = (pixels >= 0) & (pixels < width)
+    values = values[inside]
+    pixels = pixels[inside]
+
+    if len(values) > 0:
+        starts = np.flatnonzero(np.r_[True, pixels[1:] != pixels[:-1]])
+        ends = np.r_[starts[1:], len(values)]
+        counts = ends - starts
+        group = np.repeat(np.arange(len(starts)), counts)
+
+        vmin = np.minimum.reduceat(values, starts)
+        vmax = np.maximum.reduceat(values, starts)
+        min_pos = first_match(values == vmin[group], group)
+        max_pos = first_match(values == vmax[group], group)
+        min_first = min_pos <= max_pos
+
+        pos = pixels[starts] * 4
+        data[pos] = values[starts]
+        data[pos + 1] = np.where(min_first, vmin, vmax)
+        data[pos + 2] = np.where(min_first, vmax, vmin)
+        data[pos + 3] = values[ends - 1]
+        for k in range(4):
+            mask[pos + k] = False
+
+    stats = Stats()
+    stats.starttime = t0
+    stats.sampling_rate = 4 * width / duration
+    stats.npts = len(data)
+    return Trace(data=np.ma.masked_array(data, mask=mask), header=stats)
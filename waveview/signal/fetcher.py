@@ -1,17 +1,28 @@
+import enum
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
+import numpy as np
 from django.db import connection
+from obspy import Stream
 
-from waveview.inventory.datastream import DataStream
+from waveview.inventory.datastream import DataStream, UUIDType, WaveformBuffer
 from waveview.inventory.models import Channel
-from waveview.signal.encoder import StreamData, StreamEncoder
+from waveview.inventory.sds.archive import SDSArchive, get_archive
+from waveview.signal.encoder import StreamData, StreamEncoder, get_stream_version
+from waveview.signal.envelope import compute_envelope
+from waveview.signal.sds import SDSBufferMixin
 from waveview.utils import timestamp
 
 logger = logging.getLogger(__name__)
 
 
+class FetchMode(enum.StrEnum):
+    RESAMPLE = "resample"
+    ENVELOPE = "envelope"
+
+
 @dataclass
 class FetcherRequestData:
     request_id: str
@@ -21,6 +32,10 @@ class FetcherRequestData:
     force_center: bool
     resample: bool
     sample_rate: int
+    version: int = 0
+    quantize: int | None = None
+    mode: str = "resample"
+    width: int | None = None
 
     @classmethod
     def from_raw_data(cls, raw: dict) -> "FetcherRequestData":
@@ -34,6 +49,10 @@ class FetcherRequestData:
             force_center=raw.get("forceCenter", True),
             resample=raw.get("resample", True),
             sample_rate=raw.get("sampleRate", 1),
+            version=get_stream_version(raw),
+            quantize=raw.get("quantize"),
+            mode=raw.get("mode", FetchMode.RESAMPLE),
+            width=raw.get("width"),
         )
 
 
@@ -43,9 +62,16 @@ class BaseStreamFetcher:
 
 
 class TimescaleStreamFetcher(BaseStreamFetcher):
+    use_overview: bool = True
+
     def __init__(self) -> None:
         self.datastream = DataStream(connection)
 
+    def get_buffer(
+        self, channel_id: UUIDType, start: datetime, end: datetime
+    ) -> WaveformBuffer | None:
+        return self.datastream.get_buffer(channel_id, start, end)
+
     def fetch(self, payload: FetcherRequestData) -> bytes:
         request_id = payload.request_id
         channel_id = payload.channel_id
@@ -56,7 +82,7 @@ class TimescaleStreamFetcher(BaseStreamFetcher):
         start = datetime.fromtimestamp(payload.start / 1000, timezone.utc)
         end = datetime.fromtimestamp(payload.end / 1000, timezone.utc)
 
-        encoder = StreamEncoder()
+        encoder = StreamEncoder(version=payload.version, quantize=payload.quantize)
 
         empty = encoder.encode_stream(
             StreamData(
@@ -75,18 +101,74 @@ class TimescaleStreamFetcher(BaseStreamFetcher):
             logger.debug(f"Channel {channel_id} not found.")
             return empty
 
-        st = self.datastream.get_waveform(channel_id, start, end)
-        if len(st) == 0:
+        if payload.mode == FetchMode.ENVELOPE and payload.width:
+            buffer = self.get_buffer(channel_id, start, end)
+            if buffer is None:
+                return empty
+            trace = compute_envelope(
+                buffer, start, end, payload.width, demean=force_center
+            )
+            return encoder.encode_stream(
+                StreamData(
+                    request_id=request_id,
+                    channel_id=channel_id,
+                    command="stream.fetch",
+                    start=timestamp.to_milliseconds(start),
+                    end=timestamp.to_milliseconds(end),
+                    trace=trace,
+                )
+            )
+
+        # For zoomed-out views, read the precomputed min/max overview instead
+        # of decoding and resampling every raw sample.
+        level = (
+            self.datastream.select_overview_level(start, end, sample_rate)
+            if resample and self.use_overview
+            else None
+        )
+        if level is not None:
+            trace = self.datastream.get_overview(
+                channel_id, start, end, level, demean=force_center
+            )
+            if np.ma.getmaskarray(trace.data).all():
+                return empty
+            return encoder.encode_stream(
+                StreamData(
+                    request_id=request_id,
+                    channel_id=channel_id,
+                    command="stream.fetch",
+                    start=timestamp.to_milliseconds(start),
+                    end=timestamp.to_milliseconds(end),
+                    trace=trace,
+                )
+            )
+
+        buffer = self.get_buffer(channel_id, start, end)
+        if buffer is None:
             return empty
 
-        st.merge(method=0, fill_value=None)
-        st = st.split()
+        # Without resampling the contiguous buffer is encoded directly.
+        if not resample:
+            if force_center:
+                buffer = buffer.demean()
+            return encoder.encode_stream(
+                StreamData(
+                    request_id=request_id,
+                    channel_id=channel_id,
+                    command="stream.fetch",
+                    start=timestamp.to_milliseconds(start),
+                    end=timestamp.to_milliseconds(end),
+                    trace=None,
+                    buffer=buffer,
+                )
+            )
+
+        st = Stream(traces=[buffer.to_trace()]).split()
 
         if force_center:
             st.detrend("demean")
 
-        if resample:
-            st.resample(sample_rate)
+        st.resample(sample_rate)
 
         st.merge(method=0, fill_value=None)
         trace = st[0]
@@ -105,5 +187,22 @@ class TimescaleStreamFetcher(BaseStreamFetcher):
         )
 
 
-def get_fetcher_adapter() -> BaseStreamFetcher:
+class SDSStreamFetcher(SDSBufferMixin, TimescaleStreamFetcher):
+    """
+    Fetch waveform data from an SDS archive. Ranges not found in the archive
+    fall back to the Timescale datastream. Overviews are not used since they
+    are only built from the datastream.
+    """
+
+    use_overview = False
+
+    def __init__(self, archive: SDSArchive) -> None:
+        super().__init__()
+        self.archive = archive
+
+
+def get_fetcher_adapter(channel_id: UUIDType | None = None) -> BaseStreamFetcher:
+    archive = get_archive(channel_id) if channel_id else None
+    if archive is not None:
+        return SDSStreamFetcher(archive)
     return TimescaleStreamFetcher()
@@ -1,13 +1,19 @@
 import enum
 import logging
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
+import numpy as np
+from django.conf import settings
 from django.db import connection
+from obspy import Stream
 
-from waveview.inventory.datastream import DataStream
+from waveview.inventory.datastream import DataStream, UUIDType, WaveformBuffer
 from waveview.inventory.models import Channel
-from waveview.signal.encoder import StreamData, StreamEncoder
+from waveview.inventory.sds.archive import SDSArchive, get_archive
+from waveview.signal.encoder import StreamData, StreamEncoder, get_stream_version
+from waveview.signal.sds import SDSBufferMixin
+from waveview.signal.sosfilter import filter_buffer, get_sos
 from waveview.utils import timestamp
 
 logger = logging.getLogger(__name__)
@@ -35,6 +41,11 @@ class BandpassFilterParam:
             zerophase=zerophase,
         )
 
+    def get_sos(self, sampling_rate: float) -> np.ndarray | None:
+        return get_sos(
+            "bandpass", self.order, (self.freqmin, self.freqmax), sampling_rate
+        )
+
 
 @dataclass
 class LowpassFilterParam:
@@ -55,6 +66,9 @@ class LowpassFilterParam:
             zerophase=zerophase,
         )
 
+    def get_sos(self, sampling_rate: float) -> np.ndarray | None:
+        return get_sos("lowpass", self.order, (self.freq,), sampling_rate)
+
 
 @dataclass
 class HighpassFilterParam:
@@ -75,6 +89,9 @@ class HighpassFilterParam:
             zerophase=zerophase,
         )
 
+    def get_sos(self, sampling_rate: float) -> np.ndarray | None:
+        return get_sos("highpass", self.order, (self.freq,), sampling_rate)
+
 
 class FilterType(enum.StrEnum):
     BANDPASS = "bandpass"
@@ -82,6 +99,23 @@ class FilterType(enum.StrEnum):
     HIGHPASS = "highpass"
 
 
+FilterParam = BandpassFilterParam | LowpassFilterParam | HighpassFilterParam
+
+
+def get_filter_param(filter_type: str, options: dict) -> FilterParam | None:
+    """
+    Get the filter parameters of a filter type, or None if the type is not
+    supported.
+    """
+    if filter_type == FilterType.BANDPASS:
+        return BandpassFilterParam.from_dict(options)
+    elif filter_type == FilterType.LOWPASS:
+        return LowpassFilterParam.from_dict(options)
+    elif filter_type == FilterType.HIGHPASS:
+        return HighpassFilterParam.from_dict(options)
+    return None
+
+
 @dataclass
 class FilterRequestData:
     request_id: str
@@ -94,6 +128,9 @@ class FilterRequestData:
     taper_width: float
     resample: bool
     sample_rate: int
+    version: int = 0
+    quantize: int | None = None
+    padding: float = 0.0
 
     @classmethod
     def from_raw_data(cls, data: dict) -> "FilterRequestData":
@@ -110,6 +147,9 @@ class FilterRequestData:
             taper_width=data["taperWidth"],
             resample=data.get("resample", True),
             sample_rate=data.get("sampleRate", 10),
+            version=get_stream_version(data),
+            quantize=data.get("quantize"),
+            padding=float(data.get("padding", settings.DATASTREAM_FILTER_PADDING)),
         )
 
 
@@ -122,6 +162,11 @@ class TimescaleFilterAdapter(BaseFilterAdapter):
     def __init__(self) -> None:
         self.datastream = DataStream(connection)
 
+    def get_buffer(
+        self, channel_id: UUIDType, start: datetime, end: datetime
+    ) -> WaveformBuffer | None:
+        return self.datastream.get_buffer(channel_id, start, end)
+
     def filter(self, payload: FilterRequestData) -> bytes:
         request_id = payload.request_id
         channel_id = payload.channel_id
@@ -130,7 +175,7 @@ class TimescaleFilterAdapter(BaseFilterAdapter):
         resample = payload.resample
         sample_rate = payload.sample_rate
 
-        encoder = StreamEncoder()
+        encoder = StreamEncoder(version=payload.version, quantize=payload.quantize)
         empty = encoder.encode_stream(
             StreamData(
                 request_id=request_id,
@@ -148,50 +193,41 @@ class TimescaleFilterAdapter(BaseFilterAdapter):
             logger.debug(f"Channel {channel_id} not found.")
             return empty
 
-        st = self.datastream.get_waveform(channel_id, start, end)
-        if len(st) == 0:
+        # Filter a margin around the requested range and slice it off, so the
+        # taper and filter edge effects stay outside of the range.
+        padding = timedelta(seconds=max(payload.padding, 0))
+        buffer = self.get_buffer(channel_id, start - padding, end + padding)
+        if buffer is None:
             return empty
 
-        st.merge(method=0, fill_value=None)
-        st = st.split()
-
-        st.detrend("demean")
-
-        if payload.taper_type != "none":
-            st.taper(max_percentage=payload.taper_width, type=payload.taper_type)
+        # Keep the taper within the margin.
+        taper_width = payload.taper_width
+        if padding:
+            taper_width = min(
+                taper_width,
+                padding.total_seconds() * buffer.sampling_rate / buffer.npts,
+            )
 
         try:
-            if payload.filter_type == FilterType.BANDPASS:
-                filter_param = BandpassFilterParam.from_dict(payload.filter_options)
-                st.filter(
-                    "bandpass",
-                    freqmin=filter_param.freqmin,
-                    freqmax=filter_param.freqmax,
-                    corners=filter_param.order,
-                    zerophase=filter_param.zerophase,
-                )
-            elif payload.filter_type == FilterType.LOWPASS:
-                filter_param = LowpassFilterParam.from_dict(payload.filter_options)
-                st.filter(
-                    "lowpass",
-                    freq=filter_param.freq,
-                    corners=filter_param.order,
-                    zerophase=filter_param.zerophase,
-                )
-            elif payload.filter_type == FilterType.HIGHPASS:
-                filter_param = HighpassFilterParam.from_dict(payload.filter_options)
-                st.filter(
-                    "highpass",
-                    freq=filter_param.freq,
-                    corners=filter_param.order,
-                    zerophase=filter_param.zerophase,
-                )
-            else:
+            filter_param = get_filter_param(payload.filter_type, payload.filter_options)
+            if filter_param is None:
                 return empty
+            filtered = filter_buffer(
+                buffer,
+                filter_param.get_sos(buffer.sampling_rate),
+                zerophase=filter_param.zerophase,
+                taper_type=payload.taper_type,
+                taper_width=taper_width,
+            )
         except Exception as e:
             logger.error(f"Error filtering data: {e}")
             return empty
 
+        filtered = filtered.slice(start, end)
+        if filtered is None:
+            return empty
+
+        st = Stream(traces=[filtered.to_trace()]).split()
         if resample:
             st.resample(sample_rate)
 
@@ -215,5 +251,19 @@ class TimescaleFilterAdapter(BaseFilterAdapter):
         )
 
 
-def get_filter_adapter() -> BaseFilterAdapter:
+class SDSFilterAdapter(SDSBufferMixin, TimescaleFilterAdapter):
+    """
+    Filter waveform data from an SDS archive. Ranges not found in the archive
+    fall back to the Timescale datastream.
+    """
+
+    def __init__(self, archive: SDSArchive) -> None:
+        super().__init__()
+        self.archive = archive
+
+
+def get_filter_adapter(channel_id: UUIDType | None = None) -> BaseFilterAdapter:
+    archive = get_archive(channel_id) if channel_id else None
+    if archive is not None:
+        return SDSFilterAdapter(archive)
     return TimescaleFilterAdapter()
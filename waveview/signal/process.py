@@ -0,0 +1,476 @@
+import hashlib
+import json
+import logging
+import math
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from fractions import Fraction
+from typing import Callable
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import connection
+from obspy import Inventory as ObspyInventory
+from obspy import UTCDateTime, read_inventory
+from obspy.core.inventory.response import Response
+from obspy.signal.invsim import cosine_sac_taper, invert_spectrum
+from scipy.fft import next_fast_len
+from scipy.signal import detrend, hilbert, resample_poly
+
+from waveview.inventory.datastream import DataStream, UUIDType, WaveformBuffer
+from waveview.inventory.models import Channel
+from waveview.inventory.sds.archive import SDSArchive, get_archive
+from waveview.signal.encoder import StreamData, StreamEncoder, get_stream_version
+from waveview.signal.sds import SDSBufferMixin
+from waveview.signal.sosfilter import filter_segments, get_sos, taper_edges
+from waveview.signal.tile import get_cache_timeout
+from waveview.utils import timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessContext:
+    """
+    Channel information available to the operations of a processing chain,
+    e.g. the instrument response.
+    """
+
+    def __init__(
+        self,
+        stream_id: str,
+        channel: Channel | None = None,
+        inventories: list[ObspyInventory] | None = None,
+    ) -> None:
+        self.stream_id = stream_id
+        self.channel = channel
+        self._inventories = inventories
+
+    def get_inventories(self) -> list[ObspyInventory]:
+        """
+        Get the inventories of the channel, read from its inventory files the
+        first time they are needed.
+        """
+        if self._inventories is None:
+            self._inventories = []
+            if self.channel is not None:
+                inventory = self.channel.station.network.inventory
+                for inv_file in inventory.files.all():
+                    try:
+                        self._inventories.append(read_inventory(inv_file.file))
+                    except Exception as e:
+                        logger.error(f"Failed to read {inv_file.file.name}: {e}")
+        return self._inventories
+
+    def get_response(self, time: UTCDateTime) -> Response:
+        for inventory in self.get_inventories():
+            try:
+                return inventory.get_response(self.stream_id, time)
+            except Exception:
+                pass
+        raise ValueError(f"No matching inventory found for {self.stream_id}.")
+
+
+class Operation:
+    """
+    Base class of the operations of a processing chain. Operations work in
+    place on the float64 samples of the chain buffer, segment by segment, and
+    return the buffer, or a new one if they change the sampling rate.
+    """
+
+    name: str = ""
+
+    @classmethod
+    def from_dict(cls, params: dict) -> "Operation":
+        return cls()
+
+    def apply(self, buffer: WaveformBuffer, context: ProcessContext) -> WaveformBuffer:
+        raise NotImplementedError("apply method must be implemented")
+
+
+OPERATIONS: dict[str, type[Operation]] = {}
+
+
+def register_operation(name: str) -> Callable[[type[Operation]], type[Operation]]:
+    """
+    Register an operation class under a name usable in processing chains.
+    """
+
+    def decorator(cls: type[Operation]) -> type[Operation]:
+        cls.name = name
+        OPERATIONS[name] = cls
+        return cls
+
+    return decorator
+
+
+@register_operation("demean")
+class Demean(Operation):
+    def apply(self, buffer: WaveformBuffer, context: ProcessContext) -> WaveformBuffer:
+        for lo, hi in buffer.segments():
+            buffer.data[lo:hi] -= buffer.data[lo:hi].mean()
+        return buffer
+
+
+@register_operation("detrend")
+class Detrend(Operation):
+    def apply(self, buffer: WaveformBuffer, context: ProcessContext) -> WaveformBuffer:
+        for lo, hi in buffer.segments():
+            buffer.data[lo:hi] = detrend(buffer.data[lo:hi], type="linear")
+        return buffer
+
+
+@register_operation("taper")
+class Taper(Operation):
+    def __init__(self, taper_type: str = "hann", width: float = 0.05) -> None:
+        self.taper_type = taper_type
+        self.width = width
+
+    @classmethod
+    def from_dict(cls, params: dict) -> "Taper":
+        return cls(
+            taper_type=params.get("type", "hann"),
+            width=float(params.get("width", 0.05)),
+        )
+
+    def apply(self, buffer: WaveformBuffer, context: ProcessContext) -> WaveformBuffer:
+        segments = buffer.segments()
+        if segments:
+            lo, hi = segments[0][0], segments[-1][1]
+            taper_edges(buffer.data[lo:hi], self.width, self.taper_type)
+        return buffer
+
+
+class Filter(Operation):
+    def __init__(
+        self, freqs: tuple[float, ...], order: int = 4, zerophase: bool = False
+    ) -> None:
+        self.freqs = freqs
+        self.order = order
+        self.zerophase = zerophase
+
+    def apply(self, buffer: WaveformBuffer, context: ProcessContext) -> WaveformBuffer:
+        sos = get_sos(self.name, self.order, self.freqs, buffer.sampling_rate)
+        if sos is not None:
+            filter_segments(
+                buffer.data, buffer.segments(), sos, zerophase=self.zerophase
+            )
+        return buffer
+
+
+@register_operation("bandpass")
+class Bandpass(Filter):
+    @classmethod
+    def from_dict(cls, params: dict) -> "Bandpass":
+        return cls(
+            freqs=(float(params["freqmin"]), float(params["freqmax"])),
+            order=int(params.get("order", 4)),
+            zerophase=bool(params.get("zerophase", False)),
+        )
+
+
+class CornerFilter(Filter):
+    """
+    Base class of filters with a single corner frequency.
+    """
+
+    @classmethod
+    def from_dict(cls, params: dict) -> "CornerFilter":
+        return cls(
+            freqs=(float(params["freq"]),),
+            order=int(params.get("order", 4)),
+            zerophase=bool(params.get("zerophase", False)),
+        )
+
+
+@register_operation("lowpass")
+class Lowpass(CornerFilter):
+    pass
+
+
+@register_operation("highpass")
+class Highpass(CornerFilter):
+    pass
+
+
+@register_operation("remove_response")
+class RemoveResponse(Operation):
+    """
+    Deconvolve the instrument response of each segment in the frequency
+    domain, like ObsPy ``Trace.remove_response`` without its taper.
+    """
+
+    def __init__(
+        self,
+        output: str = "VEL",
+        pre_filt: tuple[float, float, float, float] | None = None,
+        water_level: float | None = 60,
+    ) -> None:
+        self.output = output
+        self.pre_filt = pre_filt
+        self.water_level = water_level
+
+    @classmethod
+    def from_dict(cls, params: dict) -> "RemoveResponse":
+        pre_filt = params.get("preFilt")
+        return cls(
+            output=params.get("output", "VEL"),
+            pre_filt=tuple(pre_filt) if pre_filt else None,
+            water_level=params.get("waterLevel", 60),
+        )
+
+    def apply(self, buffer: WaveformBuffer, context: ProcessContext) -> WaveformBuffer:
+        response = context.get_response(buffer.starttime)
+        delta = 1 / buffer.sampling_rate
+        for lo, hi in buffer.segments():
+            segment = buffer.data[lo:hi]
+            nfft = next_fast_len(2 * len(segment))
+            spec = np.fft.rfft(segment, nfft)
+            freq_response, freqs = response.get_evalresp_response(
+                delta, nfft, output=self.output
+            )
+            if self.pre_filt:
+                spec *= cosine_sac_taper(freqs, flimit=self.pre_filt)
+            if self.water_level is None:
+                nonzero = freq_response != 0
+                freq_response[nonzero] = 1 / freq_response[nonzero]
+            else:
+                invert_spectrum(freq_response, self.water_level)
+            segment[:] = np.fft.irfft(spec * freq_response, nfft)[: len(segment)]
+        return buffer
+
+
+@register_operation("envelope")
+class Envelope(Operation):
+    def apply(self, buffer: WaveformBuffer, context: ProcessContext) -> WaveformBuffer:
+        for lo, hi in buffer.segments():
+            buffer.data[lo:hi] = np.abs(hilbert(buffer.data[lo:hi]))
+        return buffer
+
+
+@register_operation("resample")
+class Resample(Operation):
+    """
+    Resample each segment to a lower sampling rate. Upsampling is rejected,
+    so a request cannot grow the buffer beyond the size of the source data.
+    """
+
+    def __init__(self, sample_rate: float) -> None:
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_dict(cls, params: dict) -> "Resample":
+        sample_rate = float(params["sampleRate"])
+        if not math.isfinite(sample_rate) or sample_rate <= 0:
+            raise ValueError(f"Invalid sample rate: {sample_rate}")
+        return cls(sample_rate=sample_rate)
+
+    def apply(self, buffer: WaveformBuffer, context: ProcessContext) -> WaveformBuffer:
+        if self.sample_rate > buffer.sampling_rate:
+            raise ValueError(
+                f"Sample rate {self.sample_rate} Hz is above the sampling rate "
+                f"{buffer.sampling_rate} Hz of the data."
+            )
+        ratio = Fraction(self.sample_rate / buffer.sampling_rate).limit_denominator(
+            1000
+        )
+        if ratio == 1:
+            return buffer
+        up, down = ratio.numerator, ratio.denominator
+        npts = math.ceil(buffer.npts * up / down)
+        data = np.zeros(npts, dtype=np.float64)
+        gaps = np.ones(npts, dtype=bool)
+        for lo, hi in buffer.segments():
+            resampled = resample_poly(buffer.data[lo:hi], up, down)
+            a = min(npts, round(lo * up / down))
+            b = min(npts, a + len(resampled))
+            data[a:b] = resampled[: b - a]
+            gaps[a:b] = False
+        return WaveformBuffer(
+            starttime=buffer.starttime,
+            sampling_rate=buffer.sampling_rate * up / down,
+            data=data,
+            mask=np.packbits(gaps),
+        )
+
+
+class ProcessChain:
+    """
+    Ordered list of registered operations run on a single float64 copy of a
+    waveform buffer.
+    """
+
+    def __init__(self, operations: list[Operation]) -> None:
+        self.operations = operations
+
+    @classmethod
+    def from_list(cls, raw: list[dict]) -> "ProcessChain":
+        """
+        Build a chain from a list of operations such as
+        ``{"name": "highpass", "freq": 1}``. Raises ValueError for unknown
+        operations or invalid parameters.
+        """
+        operations = []
+        for item in raw:
+            params = dict(item)
+            name = params.pop("name", None)
+            if name not in OPERATIONS:
+                raise ValueError(f"Unsupported operation: {name}")
+            try:
+                operations.append(OPERATIONS[name].from_dict(params))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Invalid parameters of {name}: {e}") from e
+        return cls(operations)
+
+    def run(self, buffer: WaveformBuffer, context: ProcessContext) -> WaveformBuffer:
+        buffer = WaveformBuffer(
+            starttime=buffer.starttime,
+            sampling_rate=buffer.sampling_rate,
+            data=buffer.data.astype(np.float64),
+            mask=buffer.mask,
+        )
+        for operation in self.operations:
+            buffer = operation.apply(buffer, context)
+        return buffer
+
+
+@dataclass
+class ProcessRequestData:
+    request_id: str
+    channel_id: str
+    start: int
+    end: int
+    operations: list[dict] = field(default_factory=list)
+    padding: float = 0.0
+    version: int = 0
+    quantize: int | None = None
+
+    @classmethod
+    def from_raw_data(cls, data: dict) -> "ProcessRequestData":
+        operations = data["operations"]
+        if not isinstance(operations, list):
+            raise ValueError("Operations must be a list.")
+        return cls(
+            request_id=data["requestId"],
+            channel_id=data["channelId"],
+            start=int(data["start"]),
+            end=int(data["end"]),
+            operations=operations,
+            padding=float(data.get("padding", settings.DATASTREAM_FILTER_PADDING)),
+            version=get_stream_version(data),
+            quantize=data.get("quantize"),
+        )
+
+    def get_cache_key(self) -> str:
+        """
+        Get the cache key of the request. Identical chains over the same range
+        share the key, whatever the request ID.
+        """
+        options = json.dumps(
+            [self.operations, self.padding, self.version, self.quantize],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        digest = hashlib.sha1(options.encode("utf-8")).hexdigest()
+        return f"process:{self.channel_id}:{self.start}:{self.end}:{digest}"
+
+
+class BaseProcessAdapter:
+    def process(self, payload: ProcessRequestData) -> bytes:
+        raise NotImplementedError("process method must be implemented")
+
+
+class TimescaleProcessAdapter(BaseProcessAdapter):
+    """
+    Run processing chains on waveform data, in a single pass over the
+    contiguous buffer. Results are shared through the Django cache by the
+    hash of the chain.
+    """
+
+    def __init__(self, cache: BaseCache | None = None) -> None:
+        self.datastream = DataStream(connection)
+        self.cache = cache or caches[settings.DATASTREAM_TILE_CACHE]
+
+    def get_channel(self, channel_id: UUIDType) -> Channel | None:
+        try:
+            return Channel.objects.select_related("station__network").get(id=channel_id)
+        except Channel.DoesNotExist:
+            return None
+
+    def get_buffer(
+        self, channel_id: UUIDType, start: datetime, end: datetime
+    ) -> WaveformBuffer | None:
+        return self.datastream.get_buffer(channel_id, start, end)
+
+    def process(self, payload: ProcessRequestData) -> bytes:
+        encoder = StreamEncoder(version=payload.version, quantize=payload.quantize)
+        key = payload.get_cache_key()
+        data = self.cache.get(key)
+        if data is not None:
+            return encoder.replace_request_id(data, payload.request_id)
+
+        start = datetime.fromtimestamp(payload.start / 1000, timezone.utc)
+        end = datetime.fromtimestamp(payload.end / 1000, timezone.utc)
+        stream_data = StreamData(
+            request_id=payload.request_id,
+            channel_id=payload.channel_id,
+            command="stream.process",
+            start=timestamp.to_milliseconds(start),
+            end=timestamp.to_milliseconds(end),
+            trace=None,
+        )
+        empty = encoder.encode_stream(stream_data)
+
+        try:
+            chain = ProcessChain.from_list(payload.operations)
+        except ValueError as e:
+            logger.debug(f"Invalid processing chain: {e}")
+            return empty
+
+        channel = self.get_channel(payload.channel_id)
+        if channel is None:
+            logger.debug(f"Channel {payload.channel_id} not found.")
+            return empty
+
+        # Process a margin around the requested range and slice it off, so the
+        # edge effects of the operations stay outside of the range.
+        padding = timedelta(seconds=max(payload.padding, 0))
+        buffer = self.get_buffer(channel.id, start - padding, end + padding)
+        if buffer is None:
+            return empty
+
+        try:
+            context = ProcessContext(channel.stream_id, channel=channel)
+            buffer = chain.run(buffer, context)
+        except Exception as e:
+            logger.error(f"Error processing data: {e}")
+            return empty
+
+        buffer = buffer.slice(start, end)
+        if buffer is None:
+            return empty
+
+        data = encoder.encode_stream(replace(stream_data, buffer=buffer))
+        try:
+            self.cache.set(key, data, timeout=get_cache_timeout(payload.end))
+        except Exception as e:
+            logger.warning(f"Failed to cache processing result {key}: {e}")
+        return data
+
+
+class SDSProcessAdapter(SDSBufferMixin, TimescaleProcessAdapter):
+    """
+    Run processing chains on waveform data from an SDS archive. Ranges not
+    found in the archive fall back to the Timescale datastream.
+    """
+
+    def __init__(self, archive: SDSArchive, cache: BaseCache | None = None) -> None:
+        super().__init__(cache=cache)
+        self.archive = archive
+
+
+def get_process_adapter(channel_id: UUIDType | None = None) -> BaseProcessAdapter:
+    archive = get_archive(channel_id) if channel_id else None
+    if archive is not None:
+        return SDSProcessAdapter(archive)
+    return TimescaleProcessAdapter()
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from waveview.inventory.datastream import UUIDType, WaveformBuffer
+from waveview.inventory.models import Channel
+from waveview.inventory.sds.archive import SDSArchive
+
+
+class SDSBufferMixin:
+    """
+    Mixin for stream adapters that read waveform buffers from an SDS archive.
+    Ranges not found in the archive fall back to the ``get_buffer`` method of
+    the next class, e.g. the Timescale datastream adapter.
+    """
+
+    archive: SDSArchive
+
+    def get_buffer(
+        self, channel_id: UUIDType, start: datetime, end: datetime
+    ) -> WaveformBuffer | None:
+        channel = Channel.objects.get(id=channel_id)
+        buffer = self.archive.get_buffer(channel.stream_id, start, end)
+        if buffer is None:
+            return super().get_buffer(channel_id, start, end)
+        return buffer
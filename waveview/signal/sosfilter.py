@@ -0,0 +1,142 @@
+import functools
+
+import numpy as np
+from scipy.signal import get_window, iirfilter, sosfilt, sosfiltfilt
+
+from waveview.inventory.datastream import WaveformBuffer
+
+
+@functools.lru_cache(maxsize=256)
+def get_sos(
+    filter_type: str, order: int, freqs: tuple[float, ...], sampling_rate: float
+) -> np.ndarray | None:
+    """
+    Design a Butterworth filter as second-order sections. Designs are cached
+    by their parameters, so repeated requests do not design them again.
+
+    Like ObsPy, a bandpass whose upper corner is at or above the Nyquist
+    frequency becomes a highpass. A lowpass at or above the Nyquist frequency
+    removes nothing and returns None.
+
+    Parameters
+    ----------
+    filter_type : str
+        One of ``bandpass``, ``lowpass`` or ``highpass``.
+    order : int
+        Filter order.
+    freqs : tuple[float, ...]
+        Corner frequencies in Hz, (freqmin, freqmax) for a bandpass and
+        (freq,) otherwise.
+    sampling_rate : float
+        Sampling rate of the data.
+
+    Returns
+    -------
+    np.ndarray | None
+        Read-only second-order sections, shared by every caller, or None if
+        there is nothing to filter.
+    """
+    nyquist = 0.5 * sampling_rate
+    if filter_type == "bandpass":
+        low, high = freqs[0] / nyquist, freqs[1] / nyquist
+        if low >= 1:
+            raise ValueError(
+                f"Bandpass lower corner {freqs[0]} Hz is above the Nyquist "
+                f"frequency {nyquist} Hz."
+            )
+        if high >= 1:
+            btype, wn = "highpass", low
+        else:
+            btype, wn = "bandpass", [low, high]
+    elif filter_type == "lowpass":
+        wn = freqs[0] / nyquist
+        if wn >= 1:
+            return None
+        btype = "lowpass"
+    elif filter_type == "highpass":
+        wn = freqs[0] / nyquist
+        if wn >= 1:
+            raise ValueError(
+                f"Highpass corner {freqs[0]} Hz is above the Nyquist frequency "
+                f"{nyquist} Hz."
+            )
+        btype = "highpass"
+    else:
+        raise ValueError(f"Unsupported filter type: {filter_type}")
+
+    sos = iirfilter(order, wn, btype=btype, ftype="butter", output="sos")
+    sos.flags.writeable = False
+    return sos
+
+
+def taper_edges(data: np.ndarray, max_percentage: float, taper_type: str) -> None:
+    """
+    Taper both ends of data in place with half of a ``taper_type`` window of
+    ``max_percentage`` of its length each, like ObsPy ``Trace.taper``.
+    """
+    wlen = int(max_percentage * len(data))
+    if wlen < 1:
+        return
+    window = get_window(taper_type, 2 * wlen, fftbins=False)
+    data[:wlen] *= window[:wlen]
+    data[-wlen:] *= window[wlen:]
+
+
+def filter_segments(
+    data: np.ndarray,
+    segments: list[tuple[int, int]],
+    sos: np.ndarray,
+    zerophase: bool = False,
+) -> None:
+    """
+    Filter the (start, end) segments of float64 data in place.
+    """
+    # The SciPy filters do not accept the read-only cached designs, so filter
+    # with a private copy of the few sections.
+    sos = np.array(sos)
+    for lo, hi in segments:
+        segment = data[lo:hi]
+        if len(segment) < 2:
+            continue
+        if zerophase:
+            padlen = min(3 * (2 * len(sos) + 1), len(segment) - 1)
+            segment[:] = sosfiltfilt(sos, segment, padlen=padlen)
+        else:
+            segment[:] = sosfilt(sos, segment)
+
+
+def filter_buffer(
+    buffer: WaveformBuffer,
+    sos: np.ndarray | None,
+    zerophase: bool = False,
+    taper_type: str | None = None,
+    taper_width: float = 0.0,
+) -> WaveformBuffer:
+    """
+    Demean and filter each contiguous segment of a buffer.
+
+    Segments are filtered in place over views of a single float64 copy of
+    the samples, with ``sosfiltfilt`` if ``zerophase`` is True and
+    ``sosfilt`` otherwise. The taper, if any, is only applied to the outer
+    ends of the buffer, not at every gap. Requests padded with a margin on
+    both sides and then sliced back therefore have no taper or filter edge
+    effects, and adjacent requests join seamlessly.
+    """
+    data = buffer.data.astype(np.float64)
+    segments = buffer.segments()
+    for lo, hi in segments:
+        data[lo:hi] -= data[lo:hi].mean()
+
+    if taper_type and taper_type != "none" and segments:
+        lo, hi = segments[0][0], segments[-1][1]
+        taper_edges(data[lo:hi], taper_width, taper_type)
+
+    if sos is not None:
+        filter_segments(data, segments, sos, zerophase=zerophase)
+
+    return WaveformBuffer(
+        starttime=buffer.starttime,
+        sampling_rate=buffer.sampling_rate,
+        data=data,
+        mask=buffer.mask,
+    )
@@ -2,38 +2,61 @@ import logging
 import math
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import Hashable
 
 import numpy as np
 from django.db import connection
 from matplotlib.colors import Normalize
-from scipy.interpolate import interp1d
-from scipy.signal import get_window
-from scipy.signal import spectrogram as scipy_spectrogram
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import get_window, resample_poly
 
-from waveview.inventory.datastream import DataStream
+from waveview.inventory.datastream import DataStream, UUIDType, WaveformBuffer
 from waveview.inventory.models import Channel
-from waveview.signal.encoder import SpectrogramData, StreamEncoder
+from waveview.inventory.sds.archive import SDSArchive, get_archive
+from waveview.signal.encoder import (
+    SpectrogramData,
+    SpectrogramFormat,
+    StreamEncoder,
+    get_spectrogram_format,
+)
+from waveview.signal.sds import SDSBufferMixin
+from waveview.signal.stftcache import STFTColumnCache, stft_column_cache
 
 logger = logging.getLogger(__name__)
 
 
-def nearest_power_of_two(x: int) -> int:
-    a = math.pow(2, math.ceil(np.log2(x)))
-    b = math.pow(2, math.floor(np.log2(x)))
-    if abs(a - x) < abs(b - x):
-        return int(a)
-    else:
-        return int(b)
-
-
-def interpolate_gaps(data: np.ndarray, threshold: float = 1e-12) -> np.ndarray:
-    """Interpolate over gaps (values near zero)."""
-    x = np.arange(len(data))
-    mask = np.abs(data) > threshold
-    if np.sum(mask) < 2:
+def interpolate_gaps(data: np.ndarray, gaps: np.ndarray) -> np.ndarray:
+    """
+    Fill gaps flagged in the boolean mask by linear interpolation between the
+    samples around each gap. Gaps at the edges take the nearest sample value.
+    """
+    if not gaps.any():
+        return np.asarray(data, dtype=np.float64)
+    if np.count_nonzero(~gaps) < 2:
         raise ValueError("Not enough valid data to interpolate.")
-    f = interp1d(x[mask], data[mask], kind="linear", fill_value="extrapolate")
-    return f(x)
+
+    data = np.array(data, dtype=np.float64)
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], gaps.view(np.int8), [0]])))
+    starts, ends = edges[::2], edges[1::2]
+    bounds = np.concatenate([starts - 1, ends])
+    bounds = np.unique(bounds[(bounds >= 0) & (bounds < len(data))])
+    missing = np.flatnonzero(gaps)
+    data[missing] = np.interp(missing, bounds, data[bounds])
+    return data
+
+
+def blank_gap_columns(
+    Sxx: np.ndarray, gaps: np.ndarray, starts: np.ndarray, length: int
+) -> np.ndarray:
+    """
+    Set to NaN the columns whose samples ``[start, start + length)`` contain
+    a gap, so they are left blank instead of showing interpolated data.
+    """
+    gap_count = np.concatenate([[0], np.cumsum(gaps)])
+    a = np.clip(starts, 0, len(gaps))
+    b = np.clip(starts + length, 0, len(gaps))
+    Sxx[:, gap_count[b] > gap_count[a]] = np.nan
+    return Sxx
 
 
 def _nearest_pow_2(x: float) -> int:
@@ -41,48 +64,248 @@ def _nearest_pow_2(x: float) -> int:
     return 1 << (int(x) - 1).bit_length()
 
 
-def spectrogram(
-    data: np.ndarray,
-    sample_rate: float,
-    per_lap: float = 0.9,
-    wlen: float | None = None,
-    mult: float | None = 16.0,
-    dbscale: bool = False,
-    clip: list[float] = [0.0, 1.0],
-    gap_threshold: float = 1e-12,
-    freqmax: float | None = None,
-) -> tuple[np.ndarray, np.ndarray, np.ndarray, Normalize]:
-    """Compute a spectrogram (ObsPy-like) with gap handling and scaling."""
+def get_decimation_factor(
+    sample_rate: float, freqmax: float, factor: float = 2.5
+) -> int:
+    """
+    Get the decimation factor bringing the sampling rate to about
+    ``factor * freqmax``, never below it.
+    """
+    return max(1, int(sample_rate // (factor * freqmax)))
+
+
+def decimate(
+    data: np.ndarray, sample_rate: float, freqmax: float, factor: float = 2.5
+) -> tuple[np.ndarray, float]:
+    """
+    Decimate data with an anti-aliasing polyphase filter to a sampling rate
+    of about ``factor * freqmax``, never below it. Returns the decimated data
+    and its sampling rate.
+    """
+    q = get_decimation_factor(sample_rate, freqmax, factor=factor)
+    if q == 1:
+        return data, sample_rate
+    return resample_poly(data, 1, q), sample_rate / q
+
+
+# Number of decimated samples at each edge affected by the edge effect of the
+# resample_poly anti-aliasing filter.
+DECIMATION_MARGIN = 10
+
+
+@dataclass(frozen=True)
+class STFTPlan:
+    """
+    STFT parameters of a spectrogram. The data is decimated by ``factor`` to
+    ``sample_rate``. Column ``k`` starts at decimated sample ``k * hop`` and
+    is the mean of ``average`` Hann windows of ``nfft`` samples every
+    ``step`` samples, where ``hop == average * step``.
+    """
+
+    factor: int
+    sample_rate: float
+    nfft: int
+    hop: int
+    step: int
+    average: int
+
+    @property
+    def span(self) -> int:
+        """
+        Number of decimated samples a column depends on.
+        """
+        return self.hop - self.step + self.nfft
 
-    data = interpolate_gaps(data, threshold=gap_threshold)
-    data = data - np.mean(data)
+    @classmethod
+    def from_size(
+        cls,
+        npts: int,
+        sample_rate: float,
+        freqmax: float | None,
+        width: int,
+        height: int,
+    ) -> "STFTPlan":
+        """
+        Plan the STFT of ``npts`` samples for an output of ``width`` by
+        ``height`` pixels: about ``height`` frequency bins up to ``freqmax``
+        and between ``width`` and twice ``width`` columns. The hop is a power
+        of two, so windows of about the same duration share their column
+        grid. Raises ValueError if the size or ``freqmax`` is not positive.
+        """
+        if width < 1 or height < 1:
+            raise ValueError(f"Invalid spectrogram size: {width}x{height}.")
+        if freqmax is not None and not (math.isfinite(freqmax) and freqmax > 0):
+            raise ValueError(f"Invalid maximum frequency: {freqmax}.")
+        if freqmax is not None:
+            factor = get_decimation_factor(sample_rate, freqmax)
+            sample_rate = sample_rate / factor
+            nbins = height * sample_rate / freqmax
+        else:
+            factor = 1
+            nbins = 2 * height
+        npts = npts // factor
+        nfft = min(_nearest_pow_2(nbins), 1 << (npts.bit_length() - 1))
+        if nfft < 16:
+            raise ValueError("Input data too short to compute spectrogram.")
+
+        hop = max(1, (npts - nfft) // max(width - 1, 1))
+        hop = 1 << (hop.bit_length() - 1)
+        average = max(1, hop // nfft)
+        return cls(
+            factor=factor,
+            sample_rate=sample_rate,
+            nfft=nfft,
+            hop=hop,
+            step=hop // average,
+            average=average,
+        )
+
+    def get_columns(self, n0: int, npts: int) -> range:
+        """
+        Get the indices on the column grid of the columns that fit in
+        ``npts`` samples starting at sample ``n0`` since the epoch.
+        """
+        stride = self.hop * self.factor
+        first = -(-n0 // stride)
+        last = (n0 + npts - self.span * self.factor) // stride
+        return range(first, max(first, last + 1))
+
+
+def stft_power(
+    data: np.ndarray, sample_rate: float, nfft: int, step: int, average: int = 1
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute the one-sided power spectral density of Hann-windowed segments of
+    ``nfft`` samples every ``step`` samples, scaled like
+    ``scipy.signal.spectrogram``. Each column is the mean of ``average``
+    consecutive segments.
+
+    Returns the frequency, the time of each column center and the power with
+    one row per frequency.
+    """
+    segments = sliding_window_view(data, nfft)[::step]
+    n = len(segments) // average * average
+    segments = segments[:n]
+    window = get_window("hann", nfft)
+
+    spec = np.fft.rfft(
+        (segments - segments.mean(axis=1, keepdims=True)) * window, axis=1
+    )
+    power = np.square(np.abs(spec)) / (sample_rate * np.sum(window**2))
+    if nfft % 2 == 0:
+        power[:, 1:-1] *= 2
+    else:
+        power[:, 1:] *= 2
+
+    time = (np.arange(n) * step + nfft / 2) / sample_rate
+    if average > 1:
+        power = power.reshape(-1, average, power.shape[1]).mean(axis=1)
+        time = time.reshape(-1, average).mean(axis=1)
+    freq = np.fft.rfftfreq(nfft, 1 / sample_rate)
+    return freq, time, power.T
 
-    if wlen is None:
-        wlen = 256 / sample_rate
 
-    nfft = int(_nearest_pow_2(wlen * sample_rate))
-    if len(data) < nfft:
+def cached_stft_power(
+    data: np.ndarray,
+    gaps: np.ndarray,
+    sample_rate: float,
+    starttime: float,
+    plan: STFTPlan,
+    key: Hashable,
+    cache: STFTColumnCache | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute the STFT power of data on the absolute column grid of the plan,
+    reusing the columns cached for the same key by previous requests. Only
+    the missing columns are computed.
+
+    Column ``k`` of the grid starts ``k * hop`` decimated samples after the
+    epoch. Columns are cached only if every sample they depend on, including
+    the margin of the decimation filter, is in the data and is not a gap, so
+    columns at the live edge or near gaps are computed again next time.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Samples with gaps already filled.
+    gaps : np.ndarray
+        Boolean gap mask of the samples.
+    sample_rate : float
+        Sampling rate of the data.
+    starttime : float
+        Time of the first sample in seconds since the epoch.
+    plan : STFTPlan
+        STFT parameters.
+    key : Hashable
+        Cache key of the channel and plan.
+    cache : STFTColumnCache, optional
+        Column cache. Defaults to the process-wide cache.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        The frequency, the time offset of each column center from
+        ``starttime`` and the power with one row per frequency.
+    """
+    if cache is None:
+        cache = stft_column_cache
+
+    q = plan.factor
+    npts = len(data)
+    n0 = round(starttime * sample_rate)
+    stride = plan.hop * q
+    span = plan.span * q
+    margin = DECIMATION_MARGIN * q if q > 1 else 0
+
+    indices = plan.get_columns(n0, npts)
+    if len(indices) == 0:
         raise ValueError("Input data too short to compute spectrogram.")
+    columns = [cache.get(key, j) for j in indices]
+    gap_count = np.concatenate([[0], np.cumsum(gaps)])
+
+    missing = [i for i, column in enumerate(columns) if column is None]
+    runs = np.split(missing, np.flatnonzero(np.diff(missing) > 1) + 1)
+    for run in runs:
+        if len(run) == 0:
+            continue
+        ja, jb = indices[run[0]], indices[run[-1]]
+        lo = max(ja * stride - margin, n0)
+        lo = -(-lo // q) * q
+        hi = min(jb * stride + span + margin, n0 + npts)
+        segment = data[lo - n0 : hi - n0]
+        if q > 1:
+            segment = resample_poly(segment, 1, q)
+        offset = ja * plan.hop - lo // q
+        segment = segment[offset : offset + (jb - ja) * plan.hop + plan.span]
+        __, __, power = stft_power(
+            segment, plan.sample_rate, plan.nfft, plan.step, average=plan.average
+        )
 
-    # Pad to smoother output.
-    if mult is not None:
-        mult = int(_nearest_pow_2(mult)) * nfft
-    nlap = int(nfft * per_lap)
+        for k, i in enumerate(run):
+            column = np.ascontiguousarray(power[:, k])
+            columns[i] = column
+            a = indices[i] * stride - margin - n0
+            b = indices[i] * stride + span + margin - n0
+            if a >= 0 and b <= npts and gap_count[b] == gap_count[a]:
+                cache.put(key, indices[i], column)
 
-    window = get_window("hann", nfft)
+    center = ((plan.average - 1) * plan.step + plan.nfft) * q / 2
+    time = (np.array(indices) * stride + center) / sample_rate - starttime
+    freq = np.fft.rfftfreq(plan.nfft, 1 / plan.sample_rate)
+    return freq, time, np.stack(columns, axis=1)
 
-    # Compute spectrogram using scipy.
-    freq, time, Sxx = scipy_spectrogram(
-        data,
-        fs=sample_rate,
-        nperseg=nfft,
-        noverlap=nlap,
-        nfft=nfft,
-        scaling="density",
-        mode="psd",
-        window=window,
-    )
 
+def scale_power(
+    freq: np.ndarray,
+    Sxx: np.ndarray,
+    freqmax: float | None = None,
+    dbscale: bool = False,
+    clip: list[float] = [0.0, 1.0],
+) -> tuple[np.ndarray, np.ndarray, Normalize]:
+    """
+    Discard the DC component and frequencies above ``freqmax``, apply db or
+    sqrt scale and get the normalization of the power.
+    """
     # Discard DC component.
     freq = freq[1:]
     Sxx = Sxx[1:, :]
@@ -100,15 +323,117 @@ def spectrogram(
         else:
             Sxx = np.sqrt(Sxx)
 
-    # Clip based on amplitude percentiles.
+    # Clip based on amplitude percentiles. Blank columns are NaN.
     vmin_pct, vmax_pct = clip
     if not (0 <= vmin_pct < vmax_pct <= 1):
         raise ValueError("Clip values must be between 0 and 1 and vmin < vmax.")
-    _range = Sxx.max() - Sxx.min()
-    vmin = Sxx.min() + vmin_pct * _range
-    vmax = Sxx.min() + vmax_pct * _range
+    if np.isnan(Sxx).all():
+        raise ValueError("No valid data to compute spectrogram.")
+    smin = np.nanmin(Sxx)
+    _range = np.nanmax(Sxx) - smin
+    vmin = smin + vmin_pct * _range
+    vmax = smin + vmax_pct * _range
     norm = Normalize(vmin=vmin, vmax=vmax, clip=True)
 
+    return Sxx, freq, norm
+
+
+def spectrogram(
+    data: np.ndarray,
+    sample_rate: float,
+    per_lap: float = 0.9,
+    wlen: float | None = None,
+    dbscale: bool = False,
+    clip: list[float] = [0.0, 1.0],
+    freqmax: float | None = None,
+    width: int | None = None,
+    height: int | None = None,
+    gaps: np.ndarray | None = None,
+    blank_gaps: bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, Normalize]:
+    """
+    Compute a spectrogram (ObsPy-like) with gap handling and scaling.
+
+    If the output ``width`` and ``height`` in pixels are given, the data is
+    first decimated to about 2.5 times ``freqmax``, and the window length and
+    overlap are planned by :meth:`STFTPlan.from_size` instead of taken from
+    ``wlen`` and ``per_lap``.
+
+    Gaps are given by the ``gaps`` mask, or by the mask of a masked array.
+    They are filled by linear interpolation, and if ``blank_gaps`` is True,
+    the columns containing a gap are set to NaN.
+    """
+    if gaps is None:
+        gaps = np.ma.getmaskarray(data)
+    data = interpolate_gaps(np.ma.getdata(data), gaps)
+    data = data - np.mean(data)
+
+    if width is not None and height is not None:
+        plan = STFTPlan.from_size(len(data), sample_rate, freqmax, width, height)
+        if plan.factor > 1:
+            data = resample_poly(data, 1, plan.factor)
+        sample_rate = plan.sample_rate
+        nfft = plan.nfft
+        step = plan.step
+        average = plan.average
+        stride = plan.hop * plan.factor
+        length = plan.span * plan.factor
+    else:
+        if wlen is None:
+            wlen = 256 / sample_rate
+
+        nfft = int(_nearest_pow_2(wlen * sample_rate))
+        if len(data) < nfft:
+            raise ValueError("Input data too short to compute spectrogram.")
+        nlap = int(nfft * per_lap)
+        step = nfft - nlap
+        average = 1
+        stride = step
+        length = nfft
+
+    freq, time, Sxx = stft_power(data, sample_rate, nfft, step, average=average)
+    if blank_gaps:
+        starts = np.arange(Sxx.shape[1]) * stride
+        Sxx = blank_gap_columns(Sxx, gaps, starts, length)
+    Sxx, freq, norm = scale_power(freq, Sxx, freqmax, dbscale=dbscale, clip=clip)
+    return Sxx, time, freq, norm
+
+
+def cached_spectrogram(
+    data: np.ndarray,
+    gaps: np.ndarray,
+    sample_rate: float,
+    starttime: float,
+    key: Hashable,
+    freqmax: float | None,
+    width: int,
+    height: int,
+    blank_gaps: bool = False,
+    cache: STFTColumnCache | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, Normalize]:
+    """
+    Compute a spectrogram for an output of ``width`` by ``height`` pixels
+    like :func:`spectrogram`, sharing STFT columns with previous requests of
+    the same key, e.g. the channel ID, through the column cache. Time offsets
+    are relative to ``starttime``, in seconds since the epoch.
+    """
+    data = interpolate_gaps(data, gaps)
+    plan = STFTPlan.from_size(len(data), sample_rate, freqmax, width, height)
+    freq, time, Sxx = cached_stft_power(
+        data,
+        gaps,
+        sample_rate,
+        starttime,
+        plan,
+        (key, sample_rate, plan),
+        cache=cache,
+    )
+    if blank_gaps:
+        n0 = round(starttime * sample_rate)
+        stride = plan.hop * plan.factor
+        starts = np.array(plan.get_columns(n0, len(data))) * stride - n0
+        Sxx = blank_gap_columns(Sxx, gaps, starts, plan.span * plan.factor)
+    Sxx, freq, norm = scale_power(freq, Sxx, freqmax)
     return Sxx, time, freq, norm
 
 
@@ -123,6 +448,8 @@ class SpectrogramRequestData:
     resample: bool
     sample_rate: int
     freqmax: float | None = None
+    format: SpectrogramFormat = SpectrogramFormat.PNG
+    blank_gaps: bool = False
 
     @classmethod
     def from_raw_data(cls, raw: dict) -> "SpectrogramRequestData":
@@ -138,6 +465,8 @@ class SpectrogramRequestData:
             width=raw.get("width", 300),
             height=raw.get("height", 150),
             freqmax=raw.get("freqMax", 25),
+            format=get_spectrogram_format(raw),
+            blank_gaps=bool(raw.get("blankGaps", False)),
         )
 
 
@@ -150,6 +479,11 @@ class TimescaleSpectrogramAdapter(BaseSpectrogramAdapter):
     def __init__(self) -> None:
         self.datastream = DataStream(connection=connection)
 
+    def get_buffer(
+        self, channel_id: UUIDType, start: datetime, end: datetime
+    ) -> WaveformBuffer | None:
+        return self.datastream.get_buffer(channel_id, start, end)
+
     def spectrogram(self, payload: SpectrogramRequestData) -> bytes:
         request_id = payload.request_id
         channel_id = payload.channel_id
@@ -175,6 +509,7 @@ class TimescaleSpectrogramAdapter(BaseSpectrogramAdapter):
                 norm=Normalize(0, 1),
                 width=width,
                 height=height,
+                format=payload.format,
             )
         )
 
@@ -183,38 +518,37 @@ class TimescaleSpectrogramAdapter(BaseSpectrogramAdapter):
         except Channel.DoesNotExist:
             return empty
 
-        st = self.datastream.get_waveform(channel_id, start, end)
-        st.merge(method=0, fill_value=None)
-
-        if len(st) == 0 or len(st[0].data) == 0:
+        buffer = self.get_buffer(channel_id, start, end)
+        if buffer is None:
             return empty
 
-        trace = st[0]
-        data = trace.data
-        sample_rate = trace.stats.sampling_rate
-        starttime = trace.stats.starttime
-        npts = trace.stats.npts
-        delta = trace.stats.delta
-        endtime = starttime + npts * delta
+        sample_rate = buffer.sampling_rate
+        starttime = buffer.starttime
+        npts = buffer.npts
 
         try:
-            specgram, time, freq, norm = spectrogram(data, sample_rate, freqmax=freqmax)
+            specgram, time, freq, norm = cached_spectrogram(
+                buffer.data,
+                buffer.gaps,
+                sample_rate,
+                starttime.timestamp,
+                str(channel_id),
+                freqmax=freqmax,
+                width=width,
+                height=height,
+                blank_gaps=payload.blank_gaps,
+            )
         except ValueError as e:
             logger.error(f"Error computing spectrogram: {e}")
             return empty
 
-        # If signal is resampled, update the start and end time of the signal as
-        # the original start and end time of the signal will be different after
-        # resampling. Therefore, the spectrogram coordinates need to be updated
-        # as well.
-        if payload.resample:
-            st.resample(payload.sample_rate)
+        # If signal is resampled, report the number of samples and end time the
+        # signal would have at the requested sampling rate, like ObsPy
+        # Trace.resample. The samples themselves are not needed.
+        if payload.resample and payload.sample_rate > 0:
+            npts = max(int(npts / (sample_rate / payload.sample_rate)), 1)
             sample_rate = payload.sample_rate
-            starttime = st[0].stats.starttime
-            npts = st[0].stats.npts
-            delta = st[0].stats.delta
-            endtime = starttime + npts * delta
-            data = st[0].data
+        endtime = starttime + npts / sample_rate
 
         return encoder.encode_spectrogram(
             SpectrogramData(
@@ -230,9 +564,26 @@ class TimescaleSpectrogramAdapter(BaseSpectrogramAdapter):
                 norm=norm,
                 width=width,
                 height=height,
+                format=payload.format,
             )
         )
 
 
-def get_spectrogram_adapter() -> BaseSpectrogramAdapter:
+class SDSSpectrogramAdapter(SDSBufferMixin, TimescaleSpectrogramAdapter):
+    """
+    Compute spectrograms of waveform data from an SDS archive. Ranges not
+    found in the archive fall back to the Timescale datastream.
+    """
+
+    def __init__(self, archive: SDSArchive) -> None:
+        super().__init__()
+        self.archive = archive
+
+
+def get_spectrogram_adapter(
+    channel_id: UUIDType | None = None,
+) -> BaseSpectrogramAdapter:
+    archive = get_archive(channel_id) if channel_id else None
+    if archive is not None:
+        return SDSSpectrogramAdapter(archive)
     return TimescaleSpectrogramAdapter()
@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+import numpy as np
+from django.conf import settings
+
+
+class STFTColumnCache:
+    """
+    Process-wide LRU cache of spectrogram STFT columns.
+
+    Entries are keyed by the STFT parameters, e.g. channel, sampling rate,
+    nfft, hop and window, and the index of the column on the absolute column
+    grid, so overlapping windows requested by any client share the columns
+    they have in common. Columns are stored as read-only numpy arrays.
+    """
+
+    def __init__(self, max_bytes: int | None = None) -> None:
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[Hashable, int], np.ndarray] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_bytes(self) -> int:
+        if self._max_bytes is None:
+            return settings.SPECTROGRAM_COLUMN_CACHE_SIZE
+        return self._max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: Hashable, index: int) -> np.ndarray | None:
+        with self._lock:
+            column = self._entries.get((key, index))
+            if column is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((key, index))
+            self.hits += 1
+            return column
+
+    def put(self, key: Hashable, index: int, column: np.ndarray) -> None:
+        if column.nbytes > self.max_bytes:
+            return
+        column.flags.writeable = False
+        with self._lock:
+            old = self._entries.pop((key, index), None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._entries[(key, index)] = column
+            self.nbytes += column.nbytes
+            while self.nbytes > self.max_bytes:
+                __, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+stft_column_cache = STFTColumnCache()
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+
+from waveview.signal.encoder import StreamEncoder
+from waveview.signal.fetcher import (
+    BaseStreamFetcher,
+    FetcherRequestData,
+    get_fetcher_adapter,
+)
+from waveview.signal.filtering import (
+    BaseFilterAdapter,
+    FilterRequestData,
+    get_filter_adapter,
+)
+
+logger = logging.getLogger(__name__)
+
+TILE_COMMANDS = ("stream.fetch", "stream.filter")
+
+
+def get_cache_timeout(end: float, now: float | None = None) -> int:
+    """
+    Get the cache timeout in seconds of a result ending at ``end`` in
+    milliseconds. Results that ended before the settle delay are immutable and
+    kept for long, results at the live edge expire quickly.
+    """
+    if now is None:
+        now = time.time()
+    if end / 1000 + settings.DATASTREAM_TILE_SETTLE_DELAY < now:
+        return settings.DATASTREAM_TILE_TIMEOUT
+    return settings.DATASTREAM_TILE_LIVE_TIMEOUT
+
+
+@dataclass
+class TileRequestData:
+    """
+    Request of a fixed-duration tile of a fetch or filter result.
+
+    Tile ``index`` of size ``size`` seconds covers the time range
+    ``[index * size, (index + 1) * size)`` since the epoch, so every client
+    asking for the same tile at the same zoom level gets the same window.
+    """
+
+    request_id: str
+    channel_id: str
+    command: str
+    size: int
+    index: int
+    options: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_raw_data(cls, raw: dict) -> "TileRequestData":
+        command = raw["tileCommand"]
+        if command not in TILE_COMMANDS:
+            raise ValueError(f"Unsupported tile command: {command}")
+        size = int(raw["tileSize"])
+        if size not in settings.DATASTREAM_TILE_SIZES:
+            raise ValueError(f"Unsupported tile size: {size}")
+        reserved = {
+            "requestId",
+            "channelId",
+            "tileCommand",
+            "tileSize",
+            "tileIndex",
+            "start",
+            "end",
+        }
+        return cls(
+            request_id=raw["requestId"],
+            channel_id=raw["channelId"],
+            command=command,
+            size=size,
+            index=int(raw["tileIndex"]),
+            options={k: v for k, v in raw.items() if k not in reserved},
+        )
+
+    @property
+    def start(self) -> int:
+        """
+        Start time of the tile in milliseconds.
+        """
+        return self.index * self.size * 1000
+
+    @property
+    def end(self) -> int:
+        """
+        End time of the tile in milliseconds.
+        """
+        return (self.index + 1) * self.size * 1000
+
+    def get_cache_key(self) -> str:
+        options = json.dumps(self.options, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha1(options.encode("utf-8")).hexdigest()
+        return (
+            f"tile:{self.command}:{self.channel_id}:{self.size}:{self.index}:{digest}"
+        )
+
+    def get_timeout(self, now: float | None = None) -> int:
+        """
+        Get the cache timeout of the tile in seconds. Tiles that ended before
+        the settle delay are immutable and kept for long, tiles at the live
+        edge expire quickly.
+        """
+        return get_cache_timeout(self.end, now=now)
+
+    def to_raw_data(self) -> dict:
+        """
+        Convert to the raw payload of the underlying fetch or filter request.
+        The request ID is left empty so the result can be shared.
+        """
+        return {
+            **self.options,
+            "requestId": "",
+            "channelId": self.channel_id,
+            "start": self.start,
+            "end": self.end,
+        }
+
+
+class TileAdapter:
+    """
+    Serve fetch and filter results as tiles shared through the Django cache.
+
+    Concurrent requests for a missing tile are collapsed: the first one
+    computes it while the others briefly wait for the cached result. The wait
+    is short because it holds a worker thread of the consumer, so a request
+    that is still waiting after ``wait_timeout`` computes the tile itself.
+    """
+
+    lock_timeout: int = 30
+    wait_timeout: float = 0.5
+    poll_interval: float = 0.05
+
+    def __init__(
+        self,
+        cache: BaseCache | None = None,
+        fetcher: BaseStreamFetcher | None = None,
+        filter_adapter: BaseFilterAdapter | None = None,
+    ) -> None:
+        self.cache = cache or caches[settings.DATASTREAM_TILE_CACHE]
+        self.fetcher = fetcher
+        self.filter_adapter = filter_adapter
+        self.encoder = StreamEncoder()
+
+    def tile(self, payload: TileRequestData) -> bytes:
+        key = payload.get_cache_key()
+        data = self.cache.get(key)
+        if data is None:
+            data = self._get_or_compute(key, payload)
+        return self.encoder.replace_request_id(data, payload.request_id)
+
+    def _get_or_compute(self, key: str, payload: TileRequestData) -> bytes:
+        lock = f"{key}:lock"
+        locked = self.cache.add(lock, 1, timeout=self.lock_timeout)
+        if not locked:
+            deadline = time.monotonic() + self.wait_timeout
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                data = self.cache.get(key)
+                if data is not None:
+                    return data
+            logger.debug(f"Timed out waiting for tile {key}, computing it.")
+
+        try:
+            data = self.compute(payload)
+            try:
+                self.cache.set(key, data, timeout=payload.get_timeout())
+            except Exception as e:
+                logger.warning(f"Failed to cache tile {key}: {e}")
+        finally:
+            # Only release the lock if it is ours, the worker holding it is
+            # still computing the tile.
+            if locked:
+                self.cache.delete(lock)
+        return data
+
+    def compute(self, payload: TileRequestData) -> bytes:
+        raw = payload.to_raw_data()
+        if payload.command == "stream.filter":
+            filter_adapter = self.filter_adapter or get_filter_adapter(
+                payload.channel_id
+            )
+            return filter_adapter.filter(FilterRequestData.from_raw_data(raw))
+        fetcher = self.fetcher or get_fetcher_adapter(payload.channel_id)
+        return fetcher.fetch(FetcherRequestData.from_raw_data(raw))
+
+
+def get_tile_adapter() -> TileAdapter:
+    return TileAdapter()
@@ -0,0 +1,32 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db import connection
+
+from waveview.celery import app
+from waveview.inventory.compactor import DataStreamCompactor
+from waveview.inventory.models import Channel
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(
+    name="waveview.tasks.compact_datastream",
+    autoretry_for=(),
+    max_retries=0,
+)
+def compact_datastream() -> None:
+    end = datetime.now(timezone.utc) - timedelta(
+        minutes=settings.DATASTREAM_COMPACT_AFTER
+    )
+    start = end - timedelta(minutes=settings.DATASTREAM_COMPACT_LOOKBACK)
+    compactor = DataStreamCompactor(connection)
+    for channel in Channel.objects.all():
+        try:
+            stats = compactor.compact(channel, start, end)
+        except Exception as e:
+            logger.error(f"Failed to compact datastream of channel {channel}: {e}")
+            continue
+        if stats.blocks:
+            logger.info(f"{channel.stream_id}: {stats}")
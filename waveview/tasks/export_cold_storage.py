@@ -0,0 +1,33 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db import connection
+
+from waveview.celery import app
+from waveview.inventory.coldstorage import ColdStorage
+from waveview.inventory.models import Channel
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(
+    name="waveview.tasks.export_cold_storage",
+    autoretry_for=(),
+    max_retries=0,
+)
+def export_cold_storage() -> None:
+    if settings.DATASTREAM_COLD_AFTER_DAYS is None:
+        return
+    before = (
+        datetime.now(timezone.utc) - timedelta(days=settings.DATASTREAM_COLD_AFTER_DAYS)
+    ).date()
+    storage = ColdStorage(connection)
+    for channel in Channel.objects.all():
+        try:
+            files = storage.export(channel, before)
+        except Exception as e:
+            logger.error(f"Failed to export cold storage of channel {channel}: {e}")
+            continue
+        if files:
+            logger.info(f"{channel.stream_id}: exported {len(files)} days.")
@@ -0,0 +1,23 @@
+import logging
+
+from django.db import connection
+
+from waveview.celery import app
+from waveview.inventory.datastream import DataStream
+from waveview.inventory.models import Channel
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(
+    name="waveview.tasks.update_overview",
+    autoretry_for=(),
+    max_retries=0,
+)
+def update_overview() -> None:
+    datastream = DataStream(connection)
+    for channel in Channel.objects.all():
+        try:
+            datastream.update_overview(channel)
+        except Exception as e:
+            logger.error(f"Failed to update overview of channel {channel}: {e}")
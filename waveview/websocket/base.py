@@ -17,6 +17,8 @@ class CommandType(enum.StrEnum):
     STREAM_SUBSCRIBE = "stream.subscribe"
     STREAM_UNSUBSCRIBE = "stream.unsubscribe"
     STREAM_FILTER = "stream.filter"
+    STREAM_TILE = "stream.tile"
+    STREAM_PROCESS = "stream.process"
     PING = "ping"
     NOTIFY = "notify"
     JOIN = "join"
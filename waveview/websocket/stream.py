@@ -6,7 +6,9 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 
 from waveview.signal.fetcher import FetcherRequestData, get_fetcher_adapter
 from waveview.signal.filtering import FilterRequestData, get_filter_adapter
+from waveview.signal.process import ProcessRequestData, get_process_adapter
 from waveview.signal.spectrogram import SpectrogramRequestData, get_spectrogram_adapter
+from waveview.signal.tile import TileRequestData, get_tile_adapter
 from waveview.websocket.base import CommandType, MessageEvent, WebSocketRequest
 from waveview.websocket.subscribe import StreamSubscribeData, StreamUnsubscribeData
 
@@ -37,6 +39,10 @@ class StreamConsumer(AsyncWebsocketConsumer):
             await self.stream_spectrogram(request)
         elif request.command == CommandType.STREAM_FILTER:
             await self.stream_filter(request)
+        elif request.command == CommandType.STREAM_TILE:
+            await self.stream_tile(request)
+        elif request.command == CommandType.STREAM_PROCESS:
+            await self.stream_process(request)
         elif request.command == CommandType.STREAM_SUBSCRIBE:
             await self.stream_subscribe(request)
         elif request.command == CommandType.STREAM_UNSUBSCRIBE:
@@ -49,7 +55,7 @@ class StreamConsumer(AsyncWebsocketConsumer):
         if not payload.channel_id:
             return
 
-        fetcher = get_fetcher_adapter()
+        fetcher = await database_sync_to_async(get_fetcher_adapter)(payload.channel_id)
         data = await database_sync_to_async(fetcher.fetch)(payload)
 
         await self.send(bytes_data=data)
@@ -61,7 +67,9 @@ class StreamConsumer(AsyncWebsocketConsumer):
         if not payload.channel_id:
             return
 
-        adapter = get_spectrogram_adapter()
+        adapter = await database_sync_to_async(get_spectrogram_adapter)(
+            payload.channel_id
+        )
         data = await database_sync_to_async(adapter.spectrogram)(payload)
 
         await self.send(bytes_data=data)
@@ -73,11 +81,43 @@ class StreamConsumer(AsyncWebsocketConsumer):
         if not payload.channel_id:
             return
 
-        adapter = get_filter_adapter()
+        adapter = await database_sync_to_async(get_filter_adapter)(payload.channel_id)
         data = await database_sync_to_async(adapter.filter)(payload)
 
         await self.send(bytes_data=data)
 
+    async def stream_tile(self, request: WebSocketRequest) -> None:
+        raw = request.data
+
+        try:
+            payload = TileRequestData.from_raw_data(raw)
+        except (KeyError, ValueError) as e:
+            logger.debug(f"Invalid tile request: {e}")
+            return
+        if not payload.channel_id:
+            return
+
+        adapter = get_tile_adapter()
+        data = await database_sync_to_async(adapter.tile)(payload)
+
+        await self.send(bytes_data=data)
+
+    async def stream_process(self, request: WebSocketRequest) -> None:
+        raw = request.data
+
+        try:
+            payload = ProcessRequestData.from_raw_data(raw)
+        except (KeyError, ValueError) as e:
+            logger.debug(f"Invalid process request: {e}")
+            return
+        if not payload.channel_id:
+            return
+
+        adapter = await database_sync_to_async(get_process_adapter)(payload.channel_id)
+        data = await database_sync_to_async(adapter.process)(payload)
+
+        await self.send(bytes_data=data)
+
     async def stream_subscribe(self, request: WebSocketRequest) -> None:
         raw = request.data
         payload = StreamSubscribeData.from_raw_data(raw)